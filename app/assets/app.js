@@ -1,10 +1,15 @@
 // app/assets/app.js
+
+// Data source: raw GitHub by default; `?api=http://localhost:8765` (or window.GG_API_BASE)
+// points the page at pipelines/serve.py. Fetches revalidate (ETag → 304) instead of bypassing caches.
+const API_BASE = (new URLSearchParams(location.search).get('api') || window.GG_API_BASE ||
+  'https://raw.githubusercontent.com/firemansghost/grayghost-risk/main/data').replace(/\/$/, '');
+
 async function main() {
   try {
-    const DATA_URL =
-      'https://raw.githubusercontent.com/firemansghost/grayghost-risk/main/data/latest.json?ts=' + Date.now();
+    const DATA_URL = `${API_BASE}/latest.json`;
 
-    const res = await fetch(DATA_URL, { cache: 'no-store' });
+    const res = await fetch(DATA_URL, { cache: 'no-cache' });
     if (!res.ok) throw new Error('Fetch failed: ' + res.status + ' ' + res.statusText);
     const data = await res.json();
 
@@ -261,20 +266,62 @@ async function main() {
 main();
 
 // -------- history renderer (with banded background) ----------
+// data/history_tiles/ (pipelines/pyramid.py): draw the coarsest rollup that fits first, then
+// fetch the per-year daily tiles if the chart is wide enough to show every day. Tiles are
+// fetched as <file>?v=<content hash>, so the browser may keep them until they change.
+async function fetchJson(url, cache = 'no-cache') {
+  const r = await fetch(url, { cache });
+  if (!r.ok) throw new Error(url + ' ' + r.status);
+  return r.json();
+}
+
 async function renderRiskHistory() {
   const wrap = document.getElementById('history');
   if (!wrap) return;
+  const pixels = (wrap.clientWidth || 900) - 24;
 
-  let rows = [];
+  // CSV button
+  const btn = document.getElementById('downloadCsv');
+  if (btn) {
+    btn.href = `${API_BASE}/risk_history.csv`;
+  }
+
+  const TILES = `${API_BASE}/history_tiles`;
+  let index = null;
   try {
-    const url = 'https://raw.githubusercontent.com/firemansghost/grayghost-risk/main/data/risk_history.json?ts=' + Date.now();
-    const r = await fetch(url, { cache: 'no-store' });
-    if (!r.ok) throw new Error('hist ' + r.status);
-    rows = await r.json();
+    index = await fetchJson(`${TILES}/index.json`);
   } catch {
-    return; // no history yet → leave empty
+    // no pyramid yet: column-oriented history ({date: [...], risk: [...]}); serve.py also honours ?fields=
+    try {
+      const cols = await fetchJson(`${API_BASE}/risk_history.columns.json?fields=date,risk`);
+      drawRiskHistory(wrap, cols.risk);
+    } catch { /* no history yet → leave empty */ }
+    return;
+  }
+
+  const lv = index.levels || {};
+  const tiles = (lv.daily && lv.daily.tiles) || [];
+  const dailyRows = tiles.reduce((n, t) => n + (t.rows || 0), 0);
+  // overview: the finest rollup that still fits the width (weekly, else monthly)
+  const coarse = ['weekly', 'monthly'].find(k => lv[k] && lv[k].rows <= pixels) || 'monthly';
+  if (lv[coarse]) {
+    try {
+      const cols = await fetchJson(`${TILES}/${lv[coarse].file}?v=${lv[coarse].v}`, 'default');
+      drawRiskHistory(wrap, cols.risk_mean);
+    } catch { /* detail may still load */ }
   }
-  if (!Array.isArray(rows) || rows.length < 2) return;
+  if (!tiles.length || dailyRows > pixels) return;
+
+  // detail: every daily tile, in parallel, then redraw
+  const parts = await Promise.all(tiles.map(t =>
+    fetchJson(`${TILES}/${t.file}?v=${t.v}`, 'default').catch(() => null)));
+  if (parts.some(p => !p)) return;   // keep the overview rather than draw a gap
+  drawRiskHistory(wrap, parts.flatMap(p => p.risk || []));
+}
+
+function drawRiskHistory(wrap, risk) {
+  const ys = (Array.isArray(risk) ? risk : []).map(Number).filter(v => Number.isFinite(v));
+  if (ys.length < 2) return;
 
   wrap.innerHTML = '';
 
@@ -282,12 +329,9 @@ async function renderRiskHistory() {
   const h = 180;
   const pad = 12;
 
-  const ys = rows.map(r => Number(r.risk)).filter(v => Number.isFinite(v));
-  if (ys.length < 2) return;
-
   // Scale 0..1 so the band thresholds are fixed
   const min = 0, max = 1;
-  const x = (i) => pad + (i * (w - 2 * pad) / (rows.length - 1));
+  const x = (i) => pad + (i * (w - 2 * pad) / (ys.length - 1));
   const y = (v) => (h - pad) - ((v - min) / (max - min)) * (h - 2 * pad);
 
   // Band thresholds (edit if you change bands)
@@ -331,10 +375,4 @@ async function renderRiskHistory() {
   svg.appendChild(dot);
 
   wrap.appendChild(svg);
-
-  // CSV button
-  const btn = document.getElementById('downloadCsv');
-  if (btn) {
-    btn.href = 'https://raw.githubusercontent.com/firemansghost/grayghost-risk/main/data/risk_history.csv?ts=' + Date.now();
-  }
 }
@@ -0,0 +1,187 @@
+# bench/fixtures.py
+# Recorded (or synthetic) upstream responses for the stand-in server.
+#
+# A fixture set is a directory: index.json = [{"url", "status", "content_type", "body"}]
+# plus one body file per entry. URLs are stored redacted (no api keys). Recording happens
+# in bench/standin.py --record; synthetic() builds a deterministic set with the same shapes
+# as every endpoint the pipeline calls, so the suite also runs with no network at all.
+#
+#   python bench/fixtures.py synth bench/fixtures/synthetic     # write the synthetic set
+#   python bench/fixtures.py list  bench/fixtures/live          # show a recorded set
+import argparse, datetime, hashlib, json, pathlib, random, sys, urllib.parse
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "pipelines"))
+
+from http_client import redact_url   # noqa: E402
+import sources                       # noqa: E402
+
+# query params that name what is asked for (instrument, series); the rest (dates, limits,
+# page cursors) may drift between the recording and the run
+IDENTITY_PARAMS = frozenset(("symbol", "instId", "instrument_name", "series_id", "category"))
+
+class Fixtures:
+    """
+    url -> (status, content_type, body bytes). lookup() tolerates query drift (dates, limits)
+    but never answers for a different instrument or series.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = {}                 # redacted url -> (status, ctype, body)
+        for url, status, ctype, body in entries or ():
+            self.add(url, status, ctype, body)
+
+    def add(self, url, status, ctype, body):
+        self.entries[redact_url(url)] = (status, ctype, body if isinstance(body, bytes) else body.encode())
+
+    def lookup(self, url):
+        """
+        Exact redacted URL, else the same host+path and IDENTITY_PARAMS with the most matching
+        query params; None when nothing fits (an ETHUSDT query is not answered with BTCUSDT).
+        """
+        url = redact_url(url)
+        if url in self.entries:
+            return self.entries[url]
+        p = urllib.parse.urlsplit(url)
+        want = set(urllib.parse.parse_qsl(p.query))
+        ident = {kv for kv in want if kv[0] in IDENTITY_PARAMS}
+        best, score = None, -1
+        for u, e in self.entries.items():
+            q = urllib.parse.urlsplit(u)
+            if (q.netloc, q.path) != (p.netloc, p.path):
+                continue
+            have = set(urllib.parse.parse_qsl(q.query))
+            if {kv for kv in have if kv[0] in IDENTITY_PARAMS} != ident:
+                continue
+            s = len(want & have)
+            if s > score:
+                best, score = e, s
+        return best
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path):
+        path = pathlib.Path(path)
+        fx = cls()
+        for e in json.loads((path / "index.json").read_text()):
+            fx.add(e["url"], e["status"], e["content_type"], (path / e["body"]).read_bytes())
+        return fx
+
+    def save(self, path):
+        path = pathlib.Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        index = []
+        for url, (status, ctype, body) in sorted(self.entries.items()):
+            name = hashlib.sha1(url.encode()).hexdigest()[:16] + ".body"
+            (path / name).write_bytes(body)
+            index.append({"url": url, "status": status, "content_type": ctype, "body": name})
+        (path / "index.json").write_text(json.dumps(index, indent=2))
+
+# ---- synthetic responses (shapes match what pipelines/sources.py parses) ----
+FARSIDE_FUNDS = {
+    "BTC": ("IBIT", "FBTC", "BITB", "ARKB", "BTCO", "EZBC", "BRRR", "HODL", "BTCW", "GBTC", "BTC"),
+    "ETH": ("ETHA", "FETH", "ETHW", "CETH", "ETHV", "QETH", "EZET", "ETHE", "ETH"),
+}
+
+def farside_html(rows, seed=0, end=datetime.date(2026, 1, 30), funds=FARSIDE_FUNDS["BTC"]):
+    """Farside-like "all data" page with `rows` trading days ending at `end`, oldest first."""
+    rnd = random.Random(seed)
+    out = ["<html><body><table class='etf'><thead><tr><th></th>",
+           *(f"<th>{f}</th>" for f in funds), "<th>Total</th></tr></thead><tbody>"]
+    d, days = end, []
+    while len(days) < rows:
+        if d.weekday() < 5:
+            days.append(d)
+        d -= datetime.timedelta(days=1)
+    for day in reversed(days):
+        vals = [rnd.gauss(0, 60) for _ in funds]
+        cell = lambda v: "-" if abs(v) < 2 else (f"({abs(v):,.1f})" if v < 0 else f"{v:,.1f}")
+        out.append(f"<tr><td>{day.strftime('%d %b %Y')}</td>" + "".join(f"<td>{cell(v)}</td>" for v in vals)
+                   + f"<td>{cell(sum(vals))}</td></tr>")
+    out.append("<tr><td>Total</td>" + "<td>0</td>" * (len(funds) + 1) + "</tr></tbody></table></body></html>")
+    return "\n".join(out)
+
+def _venues(add, a, px, rnd, day_ts):
+    """Funding, premium and mark/index endpoints of every derivatives venue for asset `a`."""
+    J = lambda o: json.dumps(o)
+    fr = lambda: f"{rnd.gauss(0.0001, 0.00004):.8f}"
+    add(f"https://fapi.binance.com/fapi/v1/fundingRate?symbol={a.binance}&limit=1000",
+        J([{"symbol": a.binance, "fundingTime": int(day_ts(0) * 1000) - i * 28_800_000, "fundingRate": fr()} for i in range(1000)]))
+    add(f"https://fapi.binance.com/fapi/v1/premiumIndex?symbol={a.binance}",
+        J({"symbol": a.binance, "markPrice": f"{px + 12:.2f}", "indexPrice": f"{px:.2f}", "lastFundingRate": fr()}))
+    add(f"https://fapi.binance.com/fapi/v1/premiumIndexKlines?symbol={a.binance}&interval=1h&limit=168",
+        J([[0, "0", "0", "0", f"{rnd.gauss(0.0003, 0.0002):.6f}", "0", 0, "0", 0, "0", "0", "0"] for _ in range(168)]))
+    add(f"https://fapi.binance.com/fapi/v1/ticker/price?symbol={a.binance}", J({"symbol": a.binance, "price": f"{px + 15:.2f}"}))
+    add(f"https://www.okx.com/api/v5/public/funding-rate-history?instId={a.okx}&limit=100",
+        J({"code": "0", "data": [{"fundingRate": fr()} for _ in range(100)]}))
+    add(f"https://www.okx.com/api/v5/public/funding-rate?instId={a.okx}", J({"code": "0", "data": [{"fundingRate": fr()}]}))
+    add(f"https://www.okx.com/api/v5/public/mark-price?instId={a.okx}",
+        J({"code": "0", "data": [{"markPx": f"{px + 10:.1f}", "indexPx": f"{px:.1f}"}]}))
+    add(f"https://www.bitmex.com/api/v1/funding?symbol={a.bitmex}&count=100&reverse=true",
+        J([{"symbol": a.bitmex, "fundingRate": float(fr())} for _ in range(100)]))
+    add(f"https://api.bybit.com/v5/market/tickers?category=linear&symbol={a.bybit}",
+        J({"retCode": 0, "result": {"list": [{"markPrice": f"{px + 9:.2f}", "indexPrice": f"{px:.2f}"}]}}))
+    add(f"https://deribit.com/api/v2/public/ticker?instrument_name={a.deribit}",
+        J({"result": {"mark_price": px + 11, "index_price": px}}))
+
+def synthetic(seed=0, today=None):
+    """Deterministic fixture set covering every endpoint the pipeline calls, for each of sources.ASSETS."""
+    rnd = random.Random(seed)
+    today = today or datetime.date.today()
+    day_ts = lambda i: datetime.datetime.combine(today - datetime.timedelta(days=i), datetime.time(), datetime.timezone.utc).timestamp()
+    J = lambda o: json.dumps(o)
+    fx = Fixtures()
+    add = lambda url, body, ctype="application/json": fx.add(url, 200, ctype, body)
+    px = 65000 + rnd.uniform(-2000, 2000)
+
+    add("https://api.coinbase.com/v2/prices/BTC-USD/spot", J({"data": {"amount": f"{px:.2f}", "base": "BTC", "currency": "USD"}}))
+    add("https://farside.co.uk/bitcoin-etf-flow-all-data/", farside_html(450, seed, today), "text/html; charset=utf-8")
+    for coin, cap in (("tether", 140e9), ("usd-coin", 60e9)):
+        caps = [[int(day_ts(i) * 1000), cap * (1 - 0.0004 * i) + rnd.gauss(0, 2e8)] for i in range(60, -1, -1)]
+        add(f"https://api.coingecko.com/api/v3/coins/{coin}/market_chart?vs_currency=usd&days=23&interval=daily",
+            J({"prices": [], "market_caps": caps, "total_volumes": []}))
+    for sid, level, step in (("WALCL", 6.6e6, 7), ("WTREGEN", 7.5e5, 7), ("RRPONTSYD", 250.0, 1)):
+        obs = [{"date": (today - datetime.timedelta(days=i)).isoformat(), "value": f"{level * (1 + rnd.gauss(0, 0.01)):.1f}"}
+               for i in range(200, 0, -step)]
+        add(f"https://api.stlouisfed.org/fred/series/observations?series_id={sid}&file_type=json", J({"observations": obs}))
+    _venues(add, sources.BTC, px, rnd, day_ts)
+    for name, level in (("n-unique-addresses", 7.5e5), ("transaction-fees", 12.0), ("n-transactions", 4.2e5), ("hash-rate", 7.0e8)):
+        vals = [{"x": int(day_ts(i)), "y": level * (1 + rnd.gauss(0, 0.05))} for i in range(219, -1, -1)]
+        add(f"https://api.blockchain.info/charts/{name}?timespan=220days&format=json", J({"name": name, "values": vals}))
+    add("https://mempool.space/api/mempool", J({"count": 42000, "vsize": 31_000_000, "total_fee": 0.5}))
+    add("https://mempool.space/api/v1/fees/recommended", J({"fastestFee": 18, "halfHourFee": 12, "hourFee": 9, "minimumFee": 1}))
+    # price history for pipelines/backfill.py
+    prices = [[int(day_ts(i) * 1000), px * (1 + rnd.gauss(0, 0.02))] for i in range(365, -1, -1)]
+    add("https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?vs_currency=usd&days=365&interval=daily",
+        J({"prices": prices, "market_caps": [], "total_volumes": []}))
+    # second asset (engine.run_multi): its own stream, so the BTC responses above stay as they were
+    eth, rnd = sources.ETH, random.Random(f"{seed}-ETH")
+    px = 3200 + rnd.uniform(-150, 150)
+    add(f"https://api.coinbase.com/v2/prices/{eth.coinbase}/spot", J({"data": {"amount": f"{px:.2f}", "base": "ETH", "currency": "USD"}}))
+    add(f"https://farside.co.uk/{eth.farside}/", farside_html(200, seed + 1, today, FARSIDE_FUNDS["ETH"]), "text/html; charset=utf-8")
+    _venues(add, eth, px, rnd, day_ts)
+    prices = [[int(day_ts(i) * 1000), px * (1 + rnd.gauss(0, 0.03))] for i in range(365, -1, -1)]
+    add(f"https://api.coingecko.com/api/v3/coins/{eth.coingecko}/market_chart?vs_currency=usd&days=365&interval=daily",
+        J({"prices": prices, "market_caps": [], "total_volumes": []}))
+    return fx
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark fixture sets")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("synth", help="write the synthetic set")
+    s.add_argument("path"); s.add_argument("--seed", type=int, default=0)
+    ls = sub.add_parser("list", help="list a fixture set")
+    ls.add_argument("path")
+    a = ap.parse_args(argv)
+    if a.cmd == "synth":
+        fx = synthetic(a.seed)
+        fx.save(a.path)
+        print(f"[fixtures] {len(fx)} responses -> {a.path}")
+    else:
+        for url, (status, ctype, body) in sorted(Fixtures.load(a.path).entries.items()):
+            print(f"{status} {len(body):>9,d}  {url}")
+
+if __name__ == "__main__":
+    main()
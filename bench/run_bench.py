@@ -0,0 +1,264 @@
+# bench/run_bench.py
+# Reproducible benchmarks: the pipeline runs against bench/standin.py (fixtures + injected
+# latency/failures) instead of the live APIs, in a scratch copy of data/.
+#
+#   python bench/run_bench.py                       # full suite, compare with bench/baseline.json
+#   python bench/run_bench.py --quick               # smaller sizes, fewer repeats
+#   python bench/run_bench.py --only farside,history --save-baseline
+#   python bench/run_bench.py --fixtures bench/fixtures/live --check   # exit 1 on regressions
+#
+# Suites: e2e (engine.run under clean / slow / flaky upstreams, run_multi over every asset),
+# drivers (each compute_* path), farside (parser vs page size), history (build_history at
+# 1k/10k/100k snapshots: cold, unchanged, one appended), serve (pipelines/serve.py smoke check
+# of the BTC and ETH history CSVs, then cached / 304 fetch times). Each case reports the median
+# of its repeats; a case regresses when it is slower than the baseline by more than --tolerance
+# (and --min-delta). Any request the stand-in has no fixture for fails the run (exit 1).
+import argparse, contextlib, io, json, os, pathlib, platform, shutil, statistics, sys, tempfile, threading, time
+import urllib.error, urllib.request
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "pipelines"))
+
+import archive, engine, farside, history, http_client, memo, metrics, serve, series_store, source_calendar, sources   # noqa: E402
+from model import RiskConfig                                                   # noqa: E402
+from fixtures import Fixtures, farside_html, synthetic                         # noqa: E402
+from standin import Faults, serve_in_thread                                    # noqa: E402
+
+BASELINE = ROOT / "bench" / "baseline.json"
+SCENARIOS = {
+    "clean":    dict(),
+    "slow":     dict(latency=0.15, jitter=0.05),
+    "flaky":    dict(fail_rate=0.2),
+}
+
+def timeit(fn, repeat, quiet=True, setup=None):
+    times = []
+    for _ in range(repeat):
+        metrics.RUN.reset()
+        if setup:
+            setup()
+        sink = io.StringIO()
+        with contextlib.redirect_stderr(sink) if quiet else contextlib.nullcontext():
+            t = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t)
+    return {"median_s": round(statistics.median(times), 5), "min_s": round(min(times), 5), "runs": repeat}
+
+# ---- suites ----
+def _no_memo(ctx):
+    # each repeat scores from scratch instead of replaying the previous repeat's stage memo
+    (ctx["data"] / "cache" / "stage_memo.json").unlink(missing_ok=True)
+    memo.MEMO.reset()
+
+def suite_e2e(ctx, repeat):
+    out = {}
+    for name, faults in SCENARIOS.items():
+        ctx["server"].faults = Faults(seed=1, **faults)
+        out[f"e2e.{name}"] = timeit(lambda: engine.run(RiskConfig(), data_dir=ctx["data"]), repeat,
+                                    setup=lambda: _no_memo(ctx))
+    ctx["server"].faults = Faults()
+    out["e2e.multi"] = timeit(lambda: engine.run_multi(RiskConfig(), tuple(sources.ASSETS), data_dir=ctx["data"]),
+                              repeat, setup=lambda: _no_memo(ctx))
+    return out
+
+def suite_drivers(ctx, repeat):
+    cfg, w = RiskConfig(), RiskConfig().smooth_days
+    inputs = sources.fetch_onchain_inputs(engine.ONCHAIN_DAYS)
+    cases = {
+        "driver.etf_flows":      lambda: engine.etf_driver(sources.fetch_etf_trailing(w), cfg),
+        "driver.stablecoins":    lambda: engine.stablecoin_driver(engine.combine_stablecoin_issuance(w), cfg),
+        "driver.net_liquidity":  lambda: engine.compute_net_liquidity(w, 120, cfg),
+        "driver.term_structure": lambda: engine.compute_term_structure_driver(cfg),
+        "driver.onchain_fetch":  lambda: sources.fetch_onchain_inputs(engine.ONCHAIN_DAYS),
+        "driver.onchain_score":  lambda: engine.compute_onchain_driver(65000.0, w, inputs, cfg),
+    }
+    return {k: timeit(fn, repeat) for k, fn in cases.items()}
+
+def suite_farside(ctx, repeat, sizes=(500, 2000, 8000, 32000)):
+    out = {}
+    for n in sizes:
+        html = farside_html(n)
+        chunks = [html[i:i + http_client.CHUNK] for i in range(0, len(html), http_client.CHUNK)]
+        r = timeit(lambda: farside.parse_trailing(chunks, 21), repeat)
+        r.update(rows=n, bytes=len(html), us_per_row=round(r["median_s"] / n * 1e6, 2))
+        out[f"farside.rows_{n}"] = r
+    return out
+
+def _make_snapshots(hist, n, start_day=700_000):
+    import datetime
+    hist.mkdir(parents=True, exist_ok=True)
+    for i in range(n):
+        d = datetime.date.fromordinal(start_day + i).isoformat()
+        (hist / f"{d}.json").write_text(json.dumps({"as_of": d, "as_of_utc": f"{d}T12:00:00Z",
+                                                    "risk": 0.3 + (i % 40) / 100, "band": "yellow",
+                                                    "btc_price_usd": 50000 + i}))
+    return start_day + n
+
+def suite_history(ctx, repeat, sizes=(1000, 10000, 100000)):
+    out = {}
+    for n in sizes:
+        base = ctx["tmp"] / f"hist_{n}"
+        hist, data, man = base / "history", base / "data", base / "manifest.json"
+        data.mkdir(parents=True, exist_ok=True)
+        nxt = _make_snapshots(hist, n)
+        run = lambda: history.build_history(max_days=n + 10, hist_dir=hist, data_dir=data, manifest_path=man)
+
+        def cold():
+            man.unlink(missing_ok=True)
+            run()
+        out[f"history.{n}.cold"] = timeit(cold, 1 if n >= 100000 else repeat)
+        out[f"history.{n}.unchanged"] = timeit(run, repeat)
+
+        def append():
+            nonlocal nxt
+            nxt = _make_snapshots(hist, 1, nxt)
+            run()
+        out[f"history.{n}.append_one"] = timeit(append, repeat)
+        shutil.rmtree(base, ignore_errors=True)
+    return out
+
+def _get(url, headers=None):
+    """-> (status, headers, body); HTTP errors are returned, not raised."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=10) as r:
+            return r.status, r.headers, r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def suite_serve(ctx, repeat):
+    """Smoke check of pipelines/serve.py over a fresh BTC+ETH run, then the history CSV timings."""
+    with contextlib.redirect_stderr(io.StringIO()):
+        engine.run_multi(RiskConfig(), tuple(sources.ASSETS), data_dir=ctx["data"])
+    srv = serve.make_server(port=0, data_dir=ctx["data"])
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    try:
+        for path, price in (("/risk_history.csv", history.price_field("BTC")),
+                            ("/assets/eth/risk_history.csv", history.price_field("ETH"))):
+            last = (ctx["data"] / path.lstrip("/")).read_text().splitlines()[-1]
+            day, px = last[:10], last.rsplit(",", 1)[1]       # price is the last column
+            checks = {path: [history.csv_header(price), last],
+                      f"{path}?from={day}&fields=date,{price}": [f"date,{price}", f"{day},{px}"]}
+            for url, want in checks.items():
+                status, _, body = _get(base + url)
+                lines = body.decode().splitlines()
+                if status != 200 or lines[:1] != want[:1] or lines[-1:] != want[-1:]:
+                    raise SystemExit(f"[bench] serve smoke failed: GET {url} -> {status} {body[:200]!r}")
+        status, hdrs, _ = _get(base + "/risk_history.csv")
+        if _get(base + "/risk_history.csv", {"If-None-Match": hdrs["ETag"]})[0] != 304:
+            raise SystemExit("[bench] serve smoke failed: /risk_history.csv did not revalidate to 304")
+        return {"serve.history_csv": timeit(lambda: _get(base + "/risk_history.csv"), repeat),
+                "serve.history_csv_304": timeit(lambda: _get(base + "/risk_history.csv", {"If-None-Match": hdrs["ETag"]}),
+                                                repeat)}
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+SUITES = {"e2e": suite_e2e, "drivers": suite_drivers, "farside": suite_farside, "history": suite_history,
+          "serve": suite_serve}
+
+# ---- baseline ----
+def compare(results, baseline, tolerance, min_delta):
+    rows, regressions = [], []
+    for name, r in results.items():
+        b = (baseline or {}).get(name)
+        cur = r["median_s"]
+        if b is None:
+            rows.append((name, cur, None, None, "new"))
+            continue
+        ratio = cur / b["median_s"] if b["median_s"] else float("inf")
+        bad = ratio > 1 + tolerance and cur - b["median_s"] > min_delta
+        rows.append((name, cur, b["median_s"], ratio, "REGRESSION" if bad else ("faster" if ratio < 1 - tolerance else "ok")))
+        if bad:
+            regressions.append(name)
+    return rows, regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pipeline benchmarks against a local stand-in upstream")
+    ap.add_argument("--only", help="comma list of suites: " + ",".join(SUITES))
+    ap.add_argument("--fixtures", default="synthetic", help="fixture dir (bench/fixtures.py), or 'synthetic'")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--quick", action="store_true", help="repeat=2, history up to 10k, farside up to 8k")
+    ap.add_argument("--history-sizes", default="1000,10000,100000")
+    ap.add_argument("--baseline", type=pathlib.Path, default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio (0.25 = +25%%)")
+    ap.add_argument("--min-delta", type=float, default=0.005, help="ignore slowdowns below this many seconds")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any case regressed")
+    ap.add_argument("--json", help="write results here")
+    a = ap.parse_args(argv)
+
+    repeat = 2 if a.quick else a.repeat
+    hsizes = tuple(int(x) for x in a.history_sizes.split(",") if x)
+    if a.quick:
+        hsizes = tuple(n for n in hsizes if n <= 10000)
+    suites = [s for s in (a.only.split(",") if a.only else SUITES) if s]
+
+    fx = synthetic() if a.fixtures == "synthetic" else Fixtures.load(a.fixtures)
+    srv, base = serve_in_thread(fx)
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix="gg-bench-"))
+    saved = (http_client.UPSTREAM, http_client.CACHE_ENABLED, series_store.SERIES_DIR, source_calendar.ENABLED,
+             os.environ.get("FRED_API_KEY"))
+    try:
+        # upstream = stand-in, no HTTP cache and no release-calendar skips (every run pays full
+        # fetch cost), scratch data dir
+        http_client.UPSTREAM, http_client.CACHE_ENABLED = base, False
+        series_store.SERIES_DIR, source_calendar.ENABLED = tmp / "series", False
+        source_calendar.CAL.reset()
+        os.environ["FRED_API_KEY"] = "bench"
+        shutil.copytree(ROOT / "data", tmp / "data", ignore=shutil.ignore_patterns("cache"))
+        # steady state: the one-off packing of old snapshots into the archive is not timed
+        arch = archive.Archive(tmp / "data" / "archive")
+        archive.pack_snapshots(tmp / "data" / "history", arch)
+        archive.prune_snapshots(tmp / "data" / "history", arch)
+        ctx = {"server": srv, "tmp": tmp, "data": tmp / "data"}
+        results = {}
+        for s in suites:
+            t = time.perf_counter()
+            if s == "history":
+                results.update(suite_history(ctx, repeat, hsizes))
+            elif s == "farside":
+                results.update(suite_farside(ctx, repeat, (500, 2000, 8000) if a.quick else (500, 2000, 8000, 32000)))
+            else:
+                results.update(SUITES[s](ctx, repeat))
+            print(f"[bench] {s} done in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+        misses = dict(srv.misses)
+    finally:
+        srv.shutdown()
+        http_client.UPSTREAM, http_client.CACHE_ENABLED, series_store.SERIES_DIR, source_calendar.ENABLED = saved[:4]
+        source_calendar.CAL.reset()
+        memo.MEMO.reset()
+        if saved[4] is None:
+            os.environ.pop("FRED_API_KEY", None)
+        else:
+            os.environ["FRED_API_KEY"] = saved[4]
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    baseline = json.loads(a.baseline.read_text()).get("results") if a.baseline.exists() else None
+    rows, regressions = compare(results, baseline, a.tolerance, a.min_delta)
+    print(f"{'case':34s} {'median':>10s} {'baseline':>10s} {'ratio':>7s}")
+    for name, cur, b, ratio, verdict in rows:
+        print(f"{name:34s} {cur:10.4f} {'' if b is None else f'{b:10.4f}':>10s} "
+              f"{'' if ratio is None else f'{ratio:7.2f}':>7s}  {verdict}")
+    doc = {"machine": {"python": platform.python_version(), "platform": platform.platform(),
+                       "cpus": os.cpu_count()},
+           "fixtures": a.fixtures, "results": results}
+    if a.json:
+        pathlib.Path(a.json).write_text(json.dumps(doc, indent=2))
+    if a.save_baseline:
+        merged = dict(baseline or {}, **results)
+        a.baseline.write_text(json.dumps(dict(doc, results=merged), indent=2) + "\n")
+        print(f"[bench] baseline saved -> {a.baseline}", file=sys.stderr)
+    if regressions:
+        print(f"[bench] {len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+    if misses:
+        # timings taken against 404s are not comparable; fixture sets must cover every call
+        print(f"[bench] ERROR stand-in had no fixture for {len(misses)} url(s):", file=sys.stderr)
+        for url in sorted(misses):
+            print(f"  {url}", file=sys.stderr)
+        sys.exit(1)
+    if regressions and a.check:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
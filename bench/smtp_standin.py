@@ -0,0 +1,108 @@
+# bench/smtp_standin.py
+# Local SMTP stand-in for pipelines/alert_email.py: speaks enough ESMTP (EHLO/HELO, AUTH
+# PLAIN/LOGIN accepted blindly, MAIL, RCPT, DATA, RSET, NOOP, QUIT) to receive alerts, and
+# records every session and message. No STARTTLS, so clients connect with SMTP_STARTTLS=0.
+#
+#   python bench/smtp_standin.py --port 8025 --latency 0.05
+#   SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=0 ALERT_EMAILS=a@example.com python pipelines/alerts.py
+#
+# From Python: srv, (host, port) = serve_in_thread(); srv.sessions / srv.messages.
+import argparse, socketserver, sys, threading, time
+
+class Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        time.sleep(self.server.latency)
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        srv = self.server
+        with srv.lock:
+            srv.sessions += 1
+        sender, rcpts = None, []
+        self.reply("220 smtp-standin ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd, _, arg = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+            cmd = cmd.upper()
+            if cmd == "EHLO":
+                self.wfile.write(b"250-smtp-standin\r\n250-8BITMIME\r\n250-AUTH PLAIN LOGIN\r\n")
+                self.reply("250 SIZE 10485760")
+            elif cmd == "HELO":
+                self.reply("250 smtp-standin")
+            elif cmd == "AUTH":
+                # LOGIN: two 334 prompts; PLAIN with or without an initial response
+                steps = 2 if arg.upper().startswith("LOGIN") else (0 if " " in arg else 1)
+                for _ in range(steps):
+                    self.reply("334 ")
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif cmd == "MAIL":
+                sender, rcpts = arg.partition(":")[2].strip().split(" ")[0].strip("<>"), []
+                self.reply("250 OK")
+            elif cmd == "RCPT":
+                rcpt = arg.partition(":")[2].strip().strip("<>")
+                if rcpt in srv.refuse:
+                    self.reply("550 5.1.1 mailbox unavailable")
+                    continue
+                rcpts.append(rcpt)
+                self.reply("250 OK")
+            elif cmd == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    l = self.rfile.readline()
+                    if not l or l in (b".\r\n", b".\n"):
+                        break
+                    body.append(l[1:] if l.startswith(b"..") else l)
+                with srv.lock:
+                    srv.messages.append({"from": sender, "rcpts": rcpts, "data": b"".join(body)})
+                sender, rcpts = None, []
+                self.reply("250 OK queued")
+            elif cmd == "RSET":
+                sender, rcpts = None, []
+                self.reply("250 OK")
+            elif cmd == "NOOP":
+                self.reply("250 OK")
+            elif cmd == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 5.5.2 command not implemented")
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def make_server(host="127.0.0.1", port=0, latency=0.0, refuse=()):
+    """Bound (not yet serving) stand-in; refuse: recipients answered with 550."""
+    srv = Server((host, port), Handler)
+    srv.latency, srv.refuse = latency, set(refuse)
+    srv.lock, srv.sessions, srv.messages = threading.Lock(), 0, []
+    return srv
+
+def serve_in_thread(**kw):
+    """-> (server, (host, port)); call server.shutdown() when done."""
+    srv = make_server(**kw)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, srv.server_address
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local SMTP stand-in that records alert mail")
+    ap.add_argument("--port", type=int, default=8025)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds before every reply")
+    ap.add_argument("--refuse", action="append", default=[], metavar="ADDR", help="answer RCPT with 550")
+    a = ap.parse_args(argv)
+    srv = make_server(port=a.port, latency=a.latency, refuse=a.refuse)
+    print(f"[smtp_standin] smtp://127.0.0.1:{srv.server_address[1]}", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[smtp_standin] {srv.sessions} sessions, {len(srv.messages)} messages, "
+              f"{sum(len(m['rcpts']) for m in srv.messages)} recipients", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
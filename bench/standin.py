@@ -0,0 +1,144 @@
+# bench/standin.py
+# Local stand-in for every upstream the pipeline calls. Requests arrive as
+# /<host>/<path>?<query> (pipelines/http_client.py routes there when GG_HTTP_UPSTREAM is set)
+# and are answered from a fixture set, with optional injected latency and failures.
+#
+#   python bench/standin.py --fixtures synthetic --latency 0.15 --jitter 0.05 --fail-rate 0.1
+#   GG_HTTP_UPSTREAM=http://127.0.0.1:8770 GG_HTTP_CACHE=0 python pipelines/run_daily.py
+#
+# --record DIR turns it into a recording proxy: each request is forwarded to the real
+# https://<host>/<path>, answered, and saved into DIR as a fixture set (bench/fixtures.py).
+import argparse, functools, gzip, pathlib, random, sys, threading, time, urllib.error, urllib.parse, urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fixtures import Fixtures, synthetic
+
+class Faults:
+    """Latency/failure injection. fail_hosts: {host: status} always fail that host."""
+
+    def __init__(self, latency=0.0, jitter=0.0, fail_rate=0.0, fail_status=503, fail_hosts=None,
+                 timeout_rate=0.0, seed=0):
+        self.latency, self.jitter = latency, jitter
+        self.fail_rate, self.fail_status = fail_rate, fail_status
+        self.fail_hosts = dict(fail_hosts or {})
+        self.timeout_rate = timeout_rate      # requests that hang for 60s (client timeouts)
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self, host):
+        """-> (delay_s, status or None, hang)"""
+        with self._lock:
+            delay = max(0.0, self.latency + self._rnd.uniform(-self.jitter, self.jitter))
+            hang = self._rnd.random() < self.timeout_rate
+            fail = self._rnd.random() < self.fail_rate
+        if host in self.fail_hosts:
+            return delay, self.fail_hosts[host], False
+        return delay, (self.fail_status if fail else None), hang
+
+@functools.lru_cache(maxsize=256)
+def _gzipped(body):
+    return gzip.compress(body, 6)
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True    # headers and body are separate writes on a kept-alive socket
+
+    def do_GET(self):
+        srv = self.server
+        parts = urllib.parse.urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        url = f"https://{host}/{path}" + (f"?{parts.query}" if parts.query else "")
+        with srv.lock:
+            srv.hits[host] = srv.hits.get(host, 0) + 1
+        delay, fail, hang = srv.faults.draw(host)
+        if hang:
+            time.sleep(60)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send(fail, "text/plain", b"injected failure\n")
+        if srv.record_dir is not None:
+            return self._forward(url)
+        hit = srv.fixtures.lookup(url)
+        if hit is None:
+            # never silently: a missing fixture skews whatever is being timed
+            with srv.lock:
+                srv.misses[url] = srv.misses.get(url, 0) + 1
+            print(f"[standin] WARN no fixture for {url}", file=sys.__stderr__)
+            return self._send(404, "text/plain", f"no fixture for {url}\n".encode())
+        self._send(*hit)
+
+    def _forward(self, url):
+        srv = self.server
+        req = urllib.request.Request(url, headers={"User-Agent": self.headers.get("User-Agent", "gh-actions/1.0")})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as r:
+                status, ctype, body = r.status, r.headers.get("Content-Type", "application/octet-stream"), r.read()
+        except urllib.error.HTTPError as e:
+            status, ctype, body = e.code, e.headers.get("Content-Type", "text/plain"), e.read()
+        except Exception as e:
+            return self._send(502, "text/plain", f"upstream failed: {e}\n".encode())
+        with srv.lock:
+            srv.fixtures.add(url, status, ctype, body)
+            srv.fixtures.save(srv.record_dir)
+        self._send(status, ctype, body)
+
+    def _send(self, status, ctype, body):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        if len(body) >= 1024 and "gzip" in self.headers.get("Accept-Encoding", ""):   # like the real APIs
+            body = _gzipped(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            sys.stderr.write("[standin] %s\n" % (fmt % args))
+
+def make_server(fixtures, faults=None, host="127.0.0.1", port=0, record_dir=None, verbose=False):
+    """Bound (not yet serving) stand-in; port=0 picks a free port (see .server_address)."""
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    srv.fixtures, srv.faults = fixtures, faults or Faults()
+    srv.record_dir = pathlib.Path(record_dir) if record_dir else None
+    srv.verbose, srv.lock, srv.hits, srv.misses = verbose, threading.Lock(), {}, {}
+    return srv
+
+def serve_in_thread(fixtures, faults=None, **kw):
+    """-> (server, base_url); call server.shutdown() when done."""
+    srv = make_server(fixtures, faults, **kw)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://{srv.server_address[0]}:{srv.server_address[1]}"
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local stand-in for the pipeline's upstream APIs")
+    ap.add_argument("--fixtures", default="synthetic", help="fixture dir, or 'synthetic'")
+    ap.add_argument("--record", metavar="DIR", help="proxy to the real upstreams and record into DIR")
+    ap.add_argument("--port", type=int, default=8770)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--fail-status", type=int, default=503)
+    ap.add_argument("--fail-host", action="append", default=[], metavar="HOST[=STATUS]")
+    ap.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-v", "--verbose", action="store_true")
+    a = ap.parse_args(argv)
+    if a.record:
+        fx = Fixtures.load(a.record) if (pathlib.Path(a.record) / "index.json").exists() else Fixtures()
+    else:
+        fx = synthetic(a.seed) if a.fixtures == "synthetic" else Fixtures.load(a.fixtures)
+    fail_hosts = {h.partition("=")[0]: int(h.partition("=")[2] or a.fail_status) for h in a.fail_host}
+    faults = Faults(a.latency, a.jitter, a.fail_rate, a.fail_status, fail_hosts, a.timeout_rate, a.seed)
+    srv = make_server(fx, faults, port=a.port, record_dir=a.record, verbose=a.verbose)
+    print(f"[standin] http://127.0.0.1:{srv.server_address[1]} "
+          f"({'recording to ' + a.record if a.record else f'{len(fx)} fixtures'})", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
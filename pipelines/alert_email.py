@@ -1,42 +1,114 @@
-import os, smtplib, ssl, json
+# pipelines/alert_email.py
+# SMTP dispatch for alerts.py. One Mailer holds a single SMTP session (EHLO, STARTTLS when the
+# server offers it, AUTH when SMTP_USER is set) and reuses it for every message of a run,
+# reconnecting only after MAX_PER_SESSION messages or if the server drops the connection.
+# Recipients of an identical message share one envelope (Bcc, at most MAX_RCPT each), so
+# hundreds of subscribers cost a handful of transactions on one handshake.
+#
+# Environment: SMTP_HOST, SMTP_PORT (587), SMTP_USER, SMTP_PASS, SMTP_FROM,
+# SMTP_STARTTLS (1; 0 never upgrades, e.g. for bench/smtp_standin.py).
+import os, smtplib, ssl, sys
 from email.message import EmailMessage
-from pathlib import Path
+from email.utils import formatdate, make_msgid
 
-ROOT = Path(__file__).resolve().parents[1]
-DATA = ROOT / "data"
+MAX_RCPT = 50               # recipients per envelope (providers commonly cap at 50-100)
+MAX_PER_SESSION = 100       # messages before the session is recycled
 
-def send_mail(subject, body, to_emails):
+class Mailer:
+    def __init__(self, host, port=587, user=None, password=None, sender="alerts@example.com",
+                 starttls=True, timeout=30):
+        self.host, self.port, self.user, self.password = host, port, user, password
+        self.sender, self.starttls, self.timeout = sender, starttls, timeout
+        self._smtp = None
+        self._sent_in_session = 0
+        self.sessions = 0
+
+    @classmethod
+    def from_env(cls):
+        """Mailer configured from SMTP_* variables, or None without SMTP_HOST."""
+        host = os.environ.get("SMTP_HOST", "").strip()
+        if not host:
+            return None
+        # unset workflow secrets arrive as "", which counts as not set
+        return cls(host, int(os.environ.get("SMTP_PORT") or 587), os.environ.get("SMTP_USER") or None,
+                   os.environ.get("SMTP_PASS"), os.environ.get("SMTP_FROM") or "alerts@example.com",
+                   (os.environ.get("SMTP_STARTTLS") or "1") != "0")
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.starttls and smtp.has_extn("starttls"):
+            smtp.starttls(context=ssl.create_default_context())
+            smtp.ehlo()
+        if self.user:
+            smtp.login(self.user, self.password or "")
+        self._smtp, self._sent_in_session = smtp, 0
+        self.sessions += 1
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                self._smtp.close()
+            except OSError:
+                pass
+            self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, msg, rcpts):
+        """One envelope -> {refused recipient: (code, reply)}; one retry on a dropped session."""
+        for attempt in (0, 1):
+            if self._smtp is None or self._sent_in_session >= MAX_PER_SESSION:
+                self.close()
+                self._connect()
+            try:
+                refused = self._smtp.sendmail(self.sender, rcpts, msg.as_bytes())
+                self._sent_in_session += 1
+                return refused
+            except smtplib.SMTPRecipientsRefused as e:
+                return e.recipients
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = None
+                if attempt:
+                    raise
+
+def build_message(sender, subject, body):
     msg = EmailMessage()
     msg["Subject"] = subject
-    msg["From"] = os.environ.get("SMTP_FROM", "alerts@example.com")
-    msg["To"] = ", ".join(to_emails)
+    msg["From"] = sender
+    msg["To"] = "undisclosed-recipients:;"      # real recipients are envelope-only (Bcc)
+    msg["Date"] = formatdate(localtime=False)
+    msg["Message-ID"] = make_msgid(domain=sender.rpartition("@")[2] or None)
     msg.set_content(body)
+    return msg
 
-    host = os.environ["SMTP_HOST"]
-    port = int(os.environ.get("SMTP_PORT", "587"))
-    user = os.environ["SMTP_USER"]
-    pwd  = os.environ["SMTP_PASS"]
-
-    ctx = ssl.create_default_context()
-    with smtplib.SMTP(host, port) as server:
-        server.starttls(context=ctx)
-        server.login(user, pwd)
-        server.send_message(msg)
-
-if __name__ == "__main__":
-    # Compare previous band to current; if flip across thresholds, notify
-    latest_text = (DATA / "latest.json").read_text()
-doc = json.loads(latest_text)
-current_band = doc.get("band", "yellow")
-    prev_band_file = DATA / "prev_band.txt"
-    prev_band = prev_band_file.read_text().strip() if prev_band_file.exists() else "yellow"
-
-    if current_band != prev_band:
-        recipients = [e.strip() for e in os.environ.get("ALERT_EMAILS","").split(",") if e.strip()]
-        if recipients:
-            send_mail(
-                subject=f"[GrayGhost Risk] Band flip: {prev_band.upper()} → {current_band.upper()}",
-                body=f"Risk band changed from {prev_band} to {current_band}. See dashboard for details.",
-                to_emails=recipients
-            )
-    prev_band_file.write_text(current_band)
+def dispatch(messages, mailer, max_rcpt=MAX_RCPT):
+    """
+    [(subject, body, [recipients])] -> {"delivered": {recipient: [message index]},
+    "refused": [...], "failed": [...]}. Each message goes out in envelopes of at most max_rcpt
+    recipients over mailer's session. Recipients the server rejects are "refused" (permanent);
+    an envelope that errors as a whole is "failed" and dispatch goes on with the next one.
+    """
+    delivered, refused_all, failed = {}, [], []
+    for i, (subject, body, rcpts) in enumerate(messages):
+        msg = build_message(mailer.sender, subject, body)
+        for j in range(0, len(rcpts), max_rcpt):
+            batch = rcpts[j:j + max_rcpt]
+            try:
+                refused = mailer.send(msg, batch)
+            except (smtplib.SMTPException, OSError) as e:
+                print(f"[alert_email] WARN envelope of {len(batch)} failed: {e}", file=sys.stderr)
+                failed.extend(batch)
+                continue
+            for r in batch:
+                if r in refused:
+                    refused_all.append(r)
+                else:
+                    delivered.setdefault(r, []).append(i)
+    return {"delivered": delivered, "refused": refused_all, "failed": failed}
@@ -0,0 +1,262 @@
+# pipelines/alerts.py
+# Alert rules evaluated against the documents of the run that just finished, sent by email
+# (alert_email.py). Subscribers come from ALERT_SUBSCRIBERS (JSON text, e.g. a repository
+# secret) or the file named by GG_ALERT_SUBSCRIBERS:
+#
+#   [{"email": "a@example.com", "rules": [
+#       {"type": "band_flip", "hysteresis": 0.02},                   # band changed (and cleared the
+#                                                                    #   threshold by hysteresis)
+#       {"type": "risk_cross", "level": 0.7, "direction": "up"},     # up|down|both; re-arms after
+#                                                                    #   retreating hysteresis (0.02)
+#       {"type": "driver_down", "drivers": ["etf_flows"]},           # health went "down" (all if omitted)
+#       {"type": "score_move", "driver": "term_structure", "min_delta": 0.15},   # "risk" or a driver
+#       {"type": "band_flip", "asset": "ETH"}]}]                     # asset defaults to BTC
+#
+# ALERT_EMAILS (comma-separated) subscribes those addresses to a BTC band_flip, as before.
+#
+# One pass: identical rules across subscribers are evaluated once, then fanned out. Each
+# subscriber gets one digest with every event that fired for them; subscribers with the same
+# digest share a message (batched envelopes over one pooled SMTP session). Rule state
+# (alerted band, crossing side, last statuses/scores) and a ledger of delivered events
+# (hashed, never addresses) live in data/alert_state.json, so a re-run after a partial failure
+# sends only what is still missing. The first run of a rule records a baseline, it never fires.
+#
+#   python pipelines/alerts.py [--dry-run]
+import argparse, datetime, hashlib, json, os, pathlib, sys
+
+import alert_email
+import engine
+from model import RiskConfig
+from outputs import atomic_write
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+STATE_VERSION = 1
+LEDGER_KEEP_DAYS = 14
+
+RULE_DEFAULTS = {
+    "band_flip":   {"hysteresis": 0.02},
+    "risk_cross":  {"level": None, "direction": "up", "hysteresis": 0.02},
+    "driver_down": {"drivers": None},
+    "score_move":  {"driver": "risk", "min_delta": 0.1},
+}
+
+def _dump(v):
+    return json.dumps(v, sort_keys=True, separators=(",", ":"))
+
+def _hash(*parts):
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def normalize_rule(rule):
+    """Rule dict -> canonical form (defaults filled, asset upper-cased); ValueError if invalid."""
+    kind = rule.get("type")
+    if kind not in RULE_DEFAULTS:
+        raise ValueError(f"unknown rule type {kind!r}")
+    r = {"type": kind, "asset": str(rule.get("asset", "BTC")).upper(), **RULE_DEFAULTS[kind]}
+    r.update({k: v for k, v in rule.items() if k in RULE_DEFAULTS[kind]})
+    if kind == "risk_cross" and not isinstance(r["level"], (int, float)):
+        raise ValueError("risk_cross needs a numeric level")
+    if kind == "risk_cross" and r["direction"] not in ("up", "down", "both"):
+        raise ValueError(f"risk_cross direction {r['direction']!r}")
+    if kind == "driver_down" and r["drivers"] is not None:
+        r["drivers"] = sorted(r["drivers"])
+    return r
+
+# ---- rules: (rule, doc, state or None) -> (event or None, new state) ----
+# An event is {"key": what happened (stable across re-runs), "text": one line for the digest}.
+def _band_flip(rule, doc, st, config):
+    risk, h = float(doc["risk"]), rule["hysteresis"]
+    prev = (st or {}).get("band")
+    if prev is None:
+        return None, {"band": doc["band"]}
+    new = config.band(risk)
+    # leave the alerted band only once risk is clear of the threshold by h
+    if new == prev or config.band(risk - h) != new or config.band(risk + h) != new:
+        return None, {"band": prev}
+    text = f"{rule['asset']} risk band {prev.upper()} → {new.upper()} (risk {risk:.2f})"
+    return {"key": f"{prev}->{new}", "text": text}, {"band": new}
+
+def _risk_cross(rule, doc, st, config):
+    risk, level, h = float(doc["risk"]), float(rule["level"]), rule["hysteresis"]
+    prev = (st or {}).get("side")
+    if prev is None:
+        return None, {"side": "above" if risk >= level else "below"}
+    side = prev
+    if prev == "below" and risk >= level:
+        side = "above"
+    elif prev == "above" and risk < level - h:
+        side = "below"
+    if side == prev or rule["direction"] not in ("both", "up" if side == "above" else "down"):
+        return None, {"side": side}
+    text = f"{rule['asset']} risk {risk:.2f} crossed {'above' if side == 'above' else 'below'} {level:g}"
+    return {"key": f"{side}@{level:g}", "text": text}, {"side": side}
+
+def _driver_down(rule, doc, st, config):
+    drivers = doc.get("drivers") or {}
+    names = rule["drivers"] or sorted(drivers)
+    status = {k: ((drivers.get(k) or {}).get("health") or {}).get("status") for k in names}
+    if st is None:
+        return None, {"status": status}
+    went = [k for k in names if status[k] == "down" and (st.get("status") or {}).get(k) != "down"]
+    if not went:
+        return None, {"status": status}
+    text = f"{rule['asset']} driver{'s' if len(went) > 1 else ''} down: {', '.join(went)}"
+    return {"key": "down:" + ",".join(went), "text": text}, {"status": status}
+
+def _score_move(rule, doc, st, config):
+    d = rule["driver"]
+    cur = doc.get("risk") if d == "risk" else ((doc.get("drivers") or {}).get(d) or {}).get("score")
+    if cur is None:
+        return None, st
+    cur = float(cur)
+    last = (st or {}).get("last")
+    if last is None or abs(cur - last) < rule["min_delta"]:
+        return None, {"last": cur}
+    text = f"{rule['asset']} {d} score moved {cur - last:+.2f} to {cur:.2f}"
+    return {"key": f"{last:.4f}->{cur:.4f}", "text": text}, {"last": cur}
+
+RULES = {"band_flip": _band_flip, "risk_cross": _risk_cross,
+         "driver_down": _driver_down, "score_move": _score_move}
+
+def load_subscribers(env=None):
+    """[(email, [normalized rule])] from ALERT_SUBSCRIBERS / GG_ALERT_SUBSCRIBERS / ALERT_EMAILS."""
+    env = os.environ if env is None else env
+    raw = []
+    if env.get("ALERT_SUBSCRIBERS"):
+        raw = json.loads(env["ALERT_SUBSCRIBERS"])
+    elif env.get("GG_ALERT_SUBSCRIBERS"):
+        raw = json.loads(pathlib.Path(env["GG_ALERT_SUBSCRIBERS"]).read_text())
+    raw = raw + [{"email": e.strip(), "rules": [{"type": "band_flip"}]}
+                 for e in env.get("ALERT_EMAILS", "").split(",") if e.strip()]
+    subs = []
+    for s in raw:
+        rules = []
+        for r in s.get("rules") or []:
+            try:
+                rules.append(normalize_rule(r))
+            except ValueError as e:
+                print(f"[alerts] WARN skipping a rule of {s.get('email')}: {e}", file=sys.stderr)
+        if s.get("email") and rules:
+            subs.append((s["email"], rules))
+    return subs
+
+def load_state(path):
+    try:
+        st = json.loads(path.read_text())
+        if st.get("version") == STATE_VERSION:
+            return st
+    except Exception:
+        pass
+    return {"version": STATE_VERSION, "rules": {}, "sent": {}}
+
+def _legacy_band(data_dir):
+    # band_state.txt: the BTC band last alerted by the old single-rule script
+    try:
+        return (data_dir / "band_state.txt").read_text().strip() or None
+    except OSError:
+        return None
+
+def evaluate(subscribers, docs, state, config=None, data_dir=DATA):
+    """
+    Evaluate every distinct rule once -> ({rule key: event}, {rule key: new state}).
+    docs: {asset: latest document}; rules for an asset without a document are skipped.
+    """
+    config = config or RiskConfig()
+    rules = {_dump(r): r for _, rs in subscribers for r in rs}
+    events, new_state = {}, {}
+    for key, r in rules.items():
+        doc = docs.get(r["asset"])
+        if doc is None:
+            continue
+        st = state["rules"].get(key)
+        if st is None and r["type"] == "band_flip" and r["asset"] == "BTC":
+            legacy = _legacy_band(data_dir)
+            st = {"band": legacy} if legacy else None
+        ev, new_state[key] = RULES[r["type"]](r, doc, st, config)
+        if ev is not None:
+            ev["id"] = _hash(key, _dump(st), ev["key"])
+            events[key] = ev
+    return events, new_state
+
+def compose(subscribers, events, ledger):
+    """
+    -> [(subject, body, [recipients])], plus {recipient: [event id]} for the ledger.
+    One digest per subscriber (events deduplicated, already-delivered ones dropped); identical
+    digests are merged into one message.
+    """
+    by_body, pending = {}, {}
+    for email, rules in subscribers:
+        evs = {}
+        for r in rules:
+            ev = events.get(_dump(r))
+            if ev is not None and _hash(email.lower(), ev["id"]) not in ledger:
+                evs[ev["id"]] = ev
+        if not evs:
+            continue
+        evs = sorted(evs.values(), key=lambda e: e["text"])
+        if len(evs) == 1:
+            subject = f"[GrayGhost Risk] {evs[0]['text']}"
+        else:
+            subject = f"[GrayGhost Risk] {len(evs)} alerts"
+        body = "\n".join(f"- {e['text']}" for e in evs) + "\n\nSee the dashboard for details.\n"
+        by_body.setdefault((subject, body), []).append(email)
+        pending[email] = [e["id"] for e in evs]
+    return [(s, b, sorted(set(r))) for (s, b), r in by_body.items()], pending
+
+def run(data_dir=DATA, subscribers=None, mailer=None, dry_run=False, today=None):
+    """
+    Evaluate and send -> summary dict. Without a mailer (no SMTP_HOST) the digests are only
+    printed and, as with dry_run, the state is left as it was. Rule state advances unless an
+    envelope failed to send (connection/server errors), so the next run retries those; recipients
+    the server refuses outright are not retried.
+    """
+    subscribers = load_subscribers() if subscribers is None else subscribers
+    today = (today or datetime.date.today()).isoformat()
+    path = data_dir / "alert_state.json"
+    state = load_state(path)
+    assets = {r["asset"] for _, rs in subscribers for r in rs}
+    docs = {a: engine.load_prev_doc(engine.asset_data_dir(a, data_dir)) for a in assets}
+    docs = {a: d for a, d in docs.items() if d}
+    events, new_rules = evaluate(subscribers, docs, state, data_dir=data_dir)
+    messages, pending = compose(subscribers, events, state["sent"])
+    summary = {"subscribers": len(subscribers), "rules": len(new_rules), "events": len(events),
+               "messages": len(messages), "recipients": sum(len(m[2]) for m in messages),
+               "delivered": 0, "refused": 0, "failed": 0}
+    if dry_run or mailer is None:
+        for subject, body, rcpts in messages:
+            print(f"[alerts] {'DRY' if dry_run else 'NO SMTP_HOST'} {len(rcpts)} rcpt: {subject}",
+                  file=sys.stderr)
+        return summary          # nothing sent: keep the state so these events fire once mail is set up
+    with mailer:
+        res = alert_email.dispatch(messages, mailer)
+    failed = res["failed"]
+    for email in res["delivered"]:
+        for eid in pending.get(email, ()):
+            state["sent"][_hash(email.lower(), eid)] = today
+    for email in res["refused"]:
+        print(f"[alerts] WARN recipient refused: {email}", file=sys.stderr)
+    summary.update(delivered=len(res["delivered"]), refused=len(res["refused"]), failed=len(failed),
+                   sessions=mailer.sessions)
+    if not failed:
+        state["rules"].update(new_rules)
+    cutoff = (datetime.date.fromisoformat(today) - datetime.timedelta(days=LEDGER_KEEP_DAYS)).isoformat()
+    state["sent"] = {k: d for k, d in state["sent"].items() if d >= cutoff}
+    atomic_write(path, json.dumps(state, indent=1, sort_keys=True))
+    return summary
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Evaluate alert rules against the latest run and email subscribers")
+    ap.add_argument("--dry-run", action="store_true", help="print the digests, send nothing, keep state")
+    a = ap.parse_args(argv)
+    subs = load_subscribers()
+    if not subs:
+        print("[alerts] no subscribers configured", file=sys.stderr)
+        return
+    summary = run(subscribers=subs, mailer=None if a.dry_run else alert_email.Mailer.from_env(),
+                  dry_run=a.dry_run)
+    print(f"[alerts] OK {json.dumps(summary)}")
+    if summary["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
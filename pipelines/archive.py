@@ -0,0 +1,310 @@
+# pipelines/archive.py
+# Delta-encoded snapshot archive: data/archive/<YYYY-MM>.jsonl, one line per day.
+# The first day of each month segment is a keyframe (the full document), every later day is a
+# patch against the day before it:
+#
+#   {"d":"2025-09-01","k":{...full doc...}}
+#   {"d":"2025-09-02","p":{"risk":0.47,"drivers":{"etf_flows":{"trailing":{"$head":[{...}],"$keep":6}}}}}
+#
+# Patch ops (keys of the documents never start with "$"):
+#   plain value / list   replaces the old value
+#   {"$set": v}          replaces it with a dict (or adds a dict-valued key)
+#   {"$head": [...], "$keep": n}   new list = $head + old[:n]  (trailing arrays shifting by a day)
+#   {"$items": [i | [v], ...]}     new list item by item: old[i], or the literal v
+#   {"$del": [keys]}     inside a dict patch, drops those keys
+#   {"$order": [keys]}   inside a dict patch, the key order of the result (when it changed)
+#   {...}                any other dict patches the old dict key by key
+# Every patch is checked to rebuild its document exactly (same json.dumps); if not, that day is
+# stored as a keyframe instead. Reading a day decodes one segment up to that line (≤31 patches).
+#
+# data/archive/index.json lists the days per segment and the risk-history row of each day, so
+# history.build_history() keeps rows for snapshots that were pruned from data/history/.
+# engine.write_outputs() archives every run, packs any snapshot not archived yet (the first run
+# migrates an existing data/history/) and prunes data/history/*.json older than
+# SNAPSHOT_KEEP_DAYS once the archive is verified to rebuild them.
+#
+#   python pipelines/archive.py pack [--prune]      # archive every snapshot
+#   python pipelines/archive.py show 2025-09-14     # rebuilt document
+#   python pipelines/archive.py verify              # every snapshot still in data/history rebuilds
+import argparse, datetime, json, math, pathlib, sys, threading
+
+from history import extract_row
+from outputs import atomic_write
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+HIST = DATA / "history"
+ARCHIVE = DATA / "archive"
+INDEX_VERSION = 2
+SNAPSHOT_KEEP_DAYS = 35
+
+_dump = lambda v: json.dumps(v, separators=(",", ":"), ensure_ascii=False)
+
+def _same(a, b):
+    # == treats 0.0/-0.0 and 1/1.0 as equal, the serialized documents don't
+    return a == b and _dump(a) == _dump(b)
+
+# ---- patches ----
+def diff(old, new):
+    """Patch op turning old into new (see the header)."""
+    if isinstance(new, dict):
+        if not isinstance(old, dict):
+            return {"$set": new}
+        p = {k: diff(old.get(k), v) for k, v in new.items() if k not in old or not _same(old[k], v)}
+        gone = [k for k in old if k not in new]
+        if gone:
+            p["$del"] = gone
+        if [k for k in old if k in new] + [k for k in new if k not in old] != list(new):
+            p["$order"] = list(new)
+        return p
+    if isinstance(new, list) and isinstance(old, list) and new:
+        olds, news = [_dump(x) for x in old], [_dump(x) for x in new]
+        for h in range(len(new)):
+            keep = len(new) - h
+            if keep <= len(old) and news[h:] == olds[:keep]:
+                return {"$head": new[:h], "$keep": keep}
+        at = {x: i for i, x in reversed(list(enumerate(olds)))}
+        items = [at[x] if x in at else [v] for x, v in zip(news, new)]
+        if any(isinstance(i, int) for i in items):
+            return {"$items": items}
+    return new
+
+def apply(old, op):
+    if not isinstance(op, dict):
+        return op
+    if "$set" in op:
+        return op["$set"]
+    if "$keep" in op:
+        return op["$head"] + old[:op["$keep"]]
+    if "$items" in op:
+        return [old[i] if isinstance(i, int) else i[0] for i in op["$items"]]
+    new = dict(old)
+    for k in op.get("$del", ()):
+        new.pop(k, None)
+    for k, v in op.items():
+        if k not in ("$del", "$order"):
+            new[k] = apply(old.get(k), v)
+    if "$order" in op:
+        new = {k: new[k] for k in op["$order"]}
+    return new
+
+def encode_segment(days):
+    """[(date, doc)] in date order -> segment text."""
+    lines, prev = [], None
+    for d, doc in days:
+        p = diff(prev, doc) if prev is not None else None
+        if p is not None and _dump(apply(prev, p)) == _dump(doc) and len(_dump(p)) < len(_dump(doc)):
+            lines.append(_dump({"d": d, "p": p}))
+        else:
+            lines.append(_dump({"d": d, "k": doc}))
+        prev = doc
+    return "".join(l + "\n" for l in lines)
+
+def decode_segment(text, until=None):
+    """Segment text -> [(date, doc)], stopping after `until` (a date string) if given."""
+    out, doc = [], None
+    for line in text.splitlines():
+        if not line:
+            continue
+        e = json.loads(line)
+        doc = e["k"] if "k" in e else apply(doc, e["p"])
+        out.append((e["d"], doc))
+        if until is not None and e["d"] >= until:
+            break
+    return out
+
+# ---- archive ----
+def _row(doc, d):
+    row = extract_row(doc, d)
+    return row if math.isfinite(row["risk"]) else None
+
+class Archive:
+    """Month segments + index under `root`. Not safe for concurrent writers (one pipeline)."""
+
+    def __init__(self, root=ARCHIVE):
+        self.root = pathlib.Path(root)
+        self._lock = threading.Lock()
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            try:
+                ix = json.loads((self.root / "index.json").read_text())
+                if ix.get("version") != INDEX_VERSION:
+                    raise ValueError("index version")
+                self._index = ix
+            except Exception:
+                self._index = self.reindex(write=False) if self.root.exists() else \
+                    {"version": INDEX_VERSION, "segments": {}, "rows": {}}
+        return self._index
+
+    def _segment(self, month):
+        return self.root / f"{month}.jsonl"
+
+    def _read(self, month, until=None):
+        try:
+            return decode_segment(self._segment(month).read_text(encoding="utf-8"), until)
+        except FileNotFoundError:
+            return []
+
+    def dates(self):
+        return sorted(d for days in self.index["segments"].values() for d in days)
+
+    def __contains__(self, d):
+        return d in self.index["segments"].get(d[:7], ())
+
+    def get(self, d):
+        """The document archived for date d (YYYY-MM-DD), or None."""
+        if d not in self:
+            return None
+        for day, doc in self._read(d[:7], until=d):
+            if day == d:
+                return doc
+        return None
+
+    def iter_docs(self, since=None, until=None):
+        """(date, doc) in date order, decoding only the segments that overlap [since, until]."""
+        for month in sorted(self.index["segments"]):
+            if (since and month < since[:7]) or (until and month > until[:7]):
+                continue
+            for d, doc in self._read(month, until):
+                if (not since or d >= since) and (not until or d <= until):
+                    yield d, doc
+
+    def rows(self):
+        """{date: risk-history row} for every archived day with a finite risk."""
+        return {d: r for d, r in self.index["rows"].items() if r is not None}
+
+    def put_many(self, docs):
+        """Archive documents (keyed by their as_of; a day already present is replaced)."""
+        by_month = {}
+        for doc in docs:
+            by_month.setdefault(doc["as_of"][:7], {})[doc["as_of"]] = doc
+        with self._lock:
+            ix = self.index
+            self.root.mkdir(parents=True, exist_ok=True)
+            for month, new in by_month.items():
+                days = dict(self._read(month)) if month in ix["segments"] else {}
+                days.update(new)
+                days = sorted(days.items())
+                atomic_write(self._segment(month), encode_segment(days))
+                ix["segments"][month] = [d for d, _ in days]
+                ix["rows"].update({d: _row(doc, d) for d, doc in new.items()})
+            ix["segments"] = dict(sorted(ix["segments"].items()))
+            ix["rows"] = dict(sorted(ix["rows"].items()))
+            atomic_write(self.root / "index.json", _dump(ix))
+
+    def put(self, doc):
+        self.put_many([doc])
+
+    def reindex(self, write=True):
+        """Rebuild index.json from the segment files."""
+        ix = {"version": INDEX_VERSION, "segments": {}, "rows": {}}
+        for p in sorted(self.root.glob("*.jsonl")):
+            days = decode_segment(p.read_text(encoding="utf-8"))
+            ix["segments"][p.stem] = [d for d, _ in days]
+            ix["rows"].update({d: _row(doc, d) for d, doc in days})
+        if write:
+            atomic_write(self.root / "index.json", _dump(ix))
+            self._index = ix
+        return ix
+
+def _snapshots(hist_dir):
+    return sorted(p for p in pathlib.Path(hist_dir).glob("*.json") if p.is_file())
+
+def _load(p):
+    doc = json.loads(p.read_text())
+    doc.setdefault("as_of", p.stem)
+    return doc
+
+def load_docs(hist_dir=HIST, archive_dir=None, since=None, until=None):
+    """
+    (date, doc) for every stored day in date order: snapshot files in hist_dir, and archived
+    days (archive_dir, default <hist_dir>/../archive) that no longer have one.
+    Unreadable snapshots are skipped.
+    """
+    hist_dir = pathlib.Path(hist_dir)
+    arch = Archive(archive_dir or hist_dir.parent / "archive")
+    files = {p.stem: p for p in _snapshots(hist_dir)
+             if (not since or p.stem >= since) and (not until or p.stem <= until)}
+    out = {d: doc for d, doc in arch.iter_docs(since, until) if d not in files}
+    for d, p in files.items():
+        try:
+            out[d] = _load(p)
+        except Exception as e:
+            print(f"[archive] WARN skip {p.name}: {e}", file=sys.stderr)
+    return sorted(out.items())
+
+def pack_snapshots(hist_dir, arch, all_files=False):
+    """
+    Archive the snapshots in hist_dir that aren't archived yet (every one with all_files), then
+    read each back -> (packed, mismatched dates). prune_snapshots never deletes a mismatch.
+    """
+    docs = []
+    for p in _snapshots(hist_dir):
+        if not all_files and p.stem in arch:
+            continue
+        try:
+            docs.append(_load(p))
+        except Exception as e:
+            print(f"[archive] WARN skip {p.name}: {e}", file=sys.stderr)
+    if not docs:
+        return 0, []
+    arch.put_many(docs)
+    bad = [doc["as_of"] for doc in docs if arch.get(doc["as_of"]) != doc]
+    if bad:
+        print(f"[archive] WARN {len(bad)} snapshot(s) don't rebuild from the archive: {' '.join(bad)}",
+              file=sys.stderr)
+    return len(docs), bad
+
+def prune_snapshots(hist_dir, arch, keep_days=SNAPSHOT_KEEP_DAYS, today=None):
+    """Delete snapshots older than keep_days that the archive rebuilds exactly -> count removed."""
+    cutoff = ((today or datetime.date.today()) - datetime.timedelta(days=keep_days)).isoformat()
+    removed = 0
+    for p in _snapshots(hist_dir):
+        if p.stem >= cutoff or p.stem not in arch:
+            continue
+        try:
+            if arch.get(p.stem) != json.loads(p.read_text()):
+                continue
+        except Exception:
+            continue
+        p.unlink()
+        removed += 1
+    return removed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Delta-encoded snapshot archive (data/archive)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pk = sub.add_parser("pack", help="archive every data/history snapshot")
+    pk.add_argument("--prune", action="store_true",
+                    help=f"then delete snapshots older than {SNAPSHOT_KEEP_DAYS} days")
+    sh = sub.add_parser("show", help="print the rebuilt document of a day")
+    sh.add_argument("date")
+    sub.add_parser("verify", help="check every snapshot against the archive")
+    sub.add_parser("reindex", help="rebuild data/archive/index.json from the segments")
+    a = ap.parse_args(argv)
+    arch = Archive()
+    if a.cmd == "pack":
+        n, _ = pack_snapshots(HIST, arch, all_files=True)
+        raw = sum(p.stat().st_size for p in _snapshots(HIST))
+        packed = sum(p.stat().st_size for p in arch.root.glob("*.jsonl"))
+        print(f"[archive] {n} days, snapshots {raw:,} B -> archive {packed:,} B")
+        if a.prune:
+            print(f"[archive] pruned {prune_snapshots(HIST, arch)} snapshots")
+    elif a.cmd == "show":
+        doc = arch.get(a.date)
+        if doc is None:
+            sys.exit(f"{a.date} is not archived")
+        print(json.dumps(doc, indent=2))
+    elif a.cmd == "verify":
+        bad = [p.name for p in _snapshots(HIST) if p.stem in arch and arch.get(p.stem) != _load(p)]
+        print(f"[archive] {len(arch.dates())} days archived, {len(bad)} mismatch(es) {' '.join(bad)}")
+        sys.exit(1 if bad else 0)
+    else:
+        ix = arch.reindex()
+        print(f"[archive] {sum(map(len, ix['segments'].values()))} days in {len(ix['segments'])} segments")
+
+if __name__ == "__main__":
+    main()
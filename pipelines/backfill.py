@@ -0,0 +1,431 @@
+# pipelines/backfill.py
+# Point-in-time backfill of the risk history from full-length source series.
+# Every source is fetched once for the whole span (FRED since --since, Farside's full table,
+# CoinGecko market_chart, blockchain.com timespan=all, Binance funding + premium-index klines,
+# paged), then each driver is scored for every past day in one numpy pass over the calendar.
+# Day D sees only what the daily run (RUN_HOUR_UTC) would have seen that day: observations
+# published by then according to source_calendar.py, funding events and klines stamped before
+# then; every window ends at D, nothing leaks from later days. Scores use the engine's windows,
+# scales and rounding; the blend drops drivers a day has no data for (as blend_risk does) and
+# the EMA runs through replay.ema.
+# The documents go into the snapshot archive (data/archive, "backfilled": true), so
+# risk_history, the history pyramid, drivers.parquet and replay/sweep pick them up. Days a
+# real run recorded are never touched; --replace only rewrites earlier backfilled days.
+# Known differences from a live run: sources serve today's vintage (FRED revisions and late
+# ETF rows are already in), the stablecoin delta of day D ends at 00:00 UTC instead of the
+# run time, perp premium "now" is the last hourly kline, and mempool readings have no history.
+#
+#   python pipelines/backfill.py --since 2022-01-01                # BTC, up to yesterday
+#   python pipelines/backfill.py --since 2024-06-01 --asset ETH --dry-run
+import argparse, datetime, functools, math, sys
+
+import numpy as np
+
+import archive
+import history
+import metrics
+import outputs
+import replay
+import rolling
+from engine import DATA, NETLIQ_FFILL_DAYS, ONCHAIN_DAYS, apply_health, asset_data_dir, build_doc
+from model import DRIVERS, RiskConfig
+from source_calendar import expected_asof
+from sources import (ASSETS, BTC, ONCHAIN_CHARTS, fetch_parallel, fetch_fred_series, scale_series,
+                     fetch_stablecoin_caps, fetch_etf_history, fetch_price_history,
+                     fetch_blockchain_history, fetch_binance_funding_history,
+                     fetch_binance_premium_history)
+
+RUN_HOUR_UTC = 12                # the daily workflow's cron (.github/workflows/daily.yml)
+NETLIQ_LOOKBACK = 120            # engine: fetch_net_liquidity_inputs(120)
+FUNDING_EVENTS = 21              # sources: last 21 funding events (7 days at 8h)
+PREMIUM_HOURS = 168              # sources: last 168 hourly premium klines
+FRED_IDS = ("WALCL", "WTREGEN", "RRPONTSYD")
+DAY = rolling.DAY
+NAN = float("nan")
+
+# ---- calendar helpers ----
+def _run_at(d):
+    return datetime.datetime(d.year, d.month, d.day, RUN_HOUR_UTC, tzinfo=datetime.timezone.utc)
+
+def _run_ms(days):
+    """Run time of each day (datetime64[D] array) as epoch milliseconds."""
+    return (days.astype("datetime64[ms]") + np.timedelta64(RUN_HOUR_UTC, "h")).astype(np.int64)
+
+def published_through(source, days):
+    """Newest observation date of `source` out by each day's run (source_calendar.expected_asof)."""
+    return np.array([np.datetime64(expected_asof(source, _run_at(d)), "D")
+                     for d in days.astype(datetime.date)], dtype="datetime64[D]")
+
+def _dates(pairs):
+    """[(date, value)] -> (datetime64[D] dates, values), sorted, the last value of a repeated date."""
+    last = dict(pairs)
+    keys = sorted(last)
+    return np.array(keys, dtype="datetime64[D]"), np.array([last[k] for k in keys], dtype=float)
+
+def _utc_days(ms_pairs):
+    return [(datetime.datetime.utcfromtimestamp(ms / 1000).date(), v) for ms, v in ms_pairs]
+
+def _clamped(x):
+    return np.clip(replay.sigmoid(x), 0.0, 1.0)
+
+def _num(x, nd=None):
+    x = float(x)
+    if math.isnan(x):
+        return None
+    return x if nd is None else round(x, nd)
+
+@functools.lru_cache(maxsize=None)         # trailing arrays repeat each label up to `window` times
+def _dmy(d64):
+    return d64.astype(datetime.date).strftime("%d %b %Y")
+
+def _carried(d, v, t, cut, limit):
+    """Each day t's value carried from the last observation dated <= min(t, cut); NaN past `limit` days."""
+    if not len(d):
+        return np.full(len(t), NAN)
+    k = np.searchsorted(d, np.minimum(t, cut), side="right")
+    j = np.maximum(k - 1, 0)
+    return np.where((k > 0) & ((t - d[j]) / DAY <= limit), v[j], NAN)
+
+def _last_n_mean(stamps, vals, cut, n, keep):
+    """Mean of the `keep` values among the last n points stamped <= each cut; NaN if none."""
+    k = np.searchsorted(stamps, cut, side="right")
+    lo = np.maximum(k - n, 0)
+    s = np.concatenate([[0.0], np.cumsum(np.where(keep, vals, 0.0))])
+    c = np.concatenate([[0], np.cumsum(keep)])
+    cnt = c[k] - c[lo]
+    return np.where(cnt > 0, (s[k] - s[lo]) / np.maximum(cnt, 1), NAN)
+
+# ---- fetch stage ----
+@metrics.traced
+def fetch_history(asset, since, until):
+    """Every series for [since, until] plus the windows' lead-in: one request (or paged run) each."""
+    span = (datetime.date.today() - since).days
+    lead = datetime.datetime.combine(since - datetime.timedelta(days=8), datetime.time(), datetime.timezone.utc)
+    start_ms, end_ms = int(lead.timestamp() * 1000), int(_run_at(until).timestamp() * 1000)
+    calls = {f"fred:{sid}": (fetch_fred_series, sid, span + NETLIQ_LOOKBACK + 60) for sid in FRED_IDS}
+    calls.update({f"cg:{coin}": (fetch_stablecoin_caps, coin, span + 30) for coin in ("tether", "usd-coin")})
+    for a in dict.fromkeys([BTC, asset]):
+        calls[f"price:{a.symbol}"] = (fetch_price_history, a, span + 2)
+    calls["funding"] = (fetch_binance_funding_history, start_ms, end_ms, asset)
+    calls["premium"] = (fetch_binance_premium_history, start_ms, end_ms, asset)
+    if asset.farside:
+        calls["etf"] = (fetch_etf_history, asset)
+    if asset.onchain:
+        calls.update({f"bc:{name}": (fetch_blockchain_history, name) for name in ONCHAIN_CHARTS})
+    return fetch_parallel(calls)
+
+def daily_price(ms_pairs, days):
+    """CoinGecko daily points -> price on each day (the 00:00 UTC point), NaN where missing."""
+    if not ms_pairs:
+        return np.full(len(days), NAN)
+    ser = rolling.DailySeries.from_pairs(_utc_days(ms_pairs), days[0], days[-1], keep="first")
+    return ser.values
+
+# ---- per-driver readings ----
+# Each returns (scores (T,), reading): scores is NaN on days without a reading, reading(i) is
+# day i's driver dict in the engine's shape (without health, which apply_health adds).
+
+def etf_readings(rows, days, asset, window, config):
+    """etf_driver on the `window` newest Farside rows published by each day's run."""
+    d, v = _dates(rows)
+    k = np.searchsorted(d, published_through(f"farside:{asset.farside}", days), side="right")
+    n = np.minimum(k, window)
+    c = np.concatenate([[0.0], np.cumsum(v)])
+    sma = np.round((c[k] - c[k - n]) / np.maximum(n, 1), 2)
+    raw = _clamped(-sma / config.scales["etf_flows"])
+    score = np.where(k > 0, np.round(raw, 2), NAN)
+
+    def reading(i):
+        trail = [(_dmy(d[j]), float(v[j])) for j in range(k[i] - 1, k[i] - n[i] - 1, -1)]
+        return {
+            "score": float(score[i]),
+            "contribution": round((float(raw[i]) - 0.5) * 0.2, 2),
+            "raw_usd": trail[0][1],
+            "sma7_usd": float(sma[i]),
+            "asof": trail[0][0],
+            "trailing": [{"date": ds, "usd": u} for ds, u in trail],
+            "source": asset.farside_label
+        }
+    return score, reading
+
+def stablecoin_readings(tether, usdc, days, window, config):
+    """stablecoin_driver on the USDT+USDC issuance of the `window` days ending at each day."""
+    t = rolling.DailySeries.from_pairs(_utc_days(tether), end=days[-1], keep="first")
+    u = rolling.DailySeries.from_pairs(_utc_days(usdc), t.start, t.end, keep="first")
+    deltas = rolling.DailySeries(t.start, t.values + u.values).diff()
+    x = deltas.values
+    i = ((days - deltas.start) / DAY).astype(int)
+    at = np.clip(i, 0, len(x) - 1)
+    last = np.maximum.accumulate(np.where(np.isnan(x), -1, np.arange(len(x))))[at]
+    has = (i >= 0) & (last >= 0) & (last > i - window)
+    sma = np.round(rolling.rolling_stats(x, (window,), min_frac=0)[window]["mean"][at], 2)
+    raw = _clamped(-sma / config.scales["stablecoins"])
+    score = np.where(has, np.round(raw, 2), NAN)
+
+    def reading(j):
+        lo = max(at[j] - window + 1, 0)
+        obs = [(deltas.start + p * DAY, x[p]) for p in range(at[j], lo - 1, -1) if not math.isnan(x[p])]
+        trail = [{"date": _dmy(dd), "usd": round(float(val), 2)} for dd, val in obs]   # most recent first
+        return {
+            "score": float(score[j]),
+            "contribution": round((float(raw[j]) - 0.5) * 0.2, 2),
+            "raw_delta_usd": trail[0]["usd"],
+            "sma7_delta_usd": float(sma[j]),
+            "trailing": trail,
+            "source": "CoinGecko USDT + USDC market_caps (daily)"
+        }
+    return score, reading
+
+def net_liquidity_readings(fred, days, window, config):
+    """net_liquidity_driver on each day: levels carried (<= NETLIQ_FFILL_DAYS) from releases out by then."""
+    N = max(2, int(window or 7))
+    series = []
+    for sid in FRED_IDS:
+        d, v = _dates(scale_series(sid, fred[sid]))
+        series.append((d, v, published_through(f"fred:{sid}", days)))
+    # net level at D-lag as known at D: lag N-1 for the average change, 0..7 for the trailing deltas
+    net = {}
+    for lag in sorted({*range(8), N - 1}):
+        w, t, r = (_carried(d, v, days - lag * DAY, cut, NETLIQ_FFILL_DAYS) for d, v, cut in series)
+        net[lag] = w - t - r
+    level = net[0]
+    smaN = (level - net[N - 1]) / N
+    raw = _clamped(-smaN / config.scales["net_liquidity"])
+    score = np.where(np.isnan(smaN), NAN, np.round(raw, 2))
+
+    def reading(i):
+        asof = days[i].astype(datetime.date)
+        trailing = []
+        for lag in range(7):
+            delta = net[lag][i] - net[lag + 1][i]
+            if math.isnan(delta):
+                break
+            trailing.append({"date": _dmy(days[i] - lag * DAY), "usd": round(float(delta), 2)})
+        return {
+            "score": float(score[i]),
+            "contribution": round((float(raw[i]) - 0.5) * 0.2, 2),
+            "level_usd": round(float(level[i]), 2),
+            "delta1d_usd": _num(level[i] - net[1][i], 2) or 0.0,
+            "sma7_delta_usd": round(float(smaN[i]), 2),   # name kept for UI compatibility
+            "trailing": trailing,
+            "asof": asof.strftime("%d %b %Y"),
+            "asof_utc": f"{asof.isoformat()}T00:00:00Z",
+            "source": "FRED WALCL − WTREGEN − RRPONTSYD (USD)"
+        }
+    return score, reading
+
+def term_readings(funding, premium, days, config):
+    """term_structure_driver from the Binance funding events and hourly premium klines before each run."""
+    cut = _run_ms(days)
+    f_t, f_v = np.array([p[0] for p in funding], dtype=np.int64), np.array([p[1] for p in funding], dtype=float)
+    p_t, p_v = np.array([p[0] for p in premium], dtype=np.int64), np.array([p[1] for p in premium], dtype=float)
+    avg_8h = _last_n_mean(f_t, f_v, cut, FUNDING_EVENTS, np.abs(f_v) > 1e-10)
+    fann = avg_8h * 3 * 365 * 100.0
+    k = np.searchsorted(p_t, cut, side="right")
+    prem_now = np.where(k > 0, p_v[np.maximum(k - 1, 0)] * 100.0, NAN) if len(p_v) else np.full(len(days), NAN)
+    prem_7d = _last_n_mean(p_t, p_v, cut, PREMIUM_HOURS, np.abs(p_v) > 1e-12) * 100.0
+    prem_7d = np.where(np.isnan(prem_7d), prem_now, prem_7d)
+    parts = np.stack([replay.sigmoid((fann - config.funding_neutral_ann_pct) / config.funding_scale_ann_pct),
+                      replay.sigmoid(prem_7d / config.premium_scale_pct)])
+    parts = np.where(np.isnan(np.stack([fann, prem_7d])), NAN, parts)
+    n = (~np.isnan(parts)).sum(axis=0)
+    raw = np.clip(np.nansum(parts, axis=0) / np.maximum(n, 1), 0.0, 1.0)
+    score = np.where(n > 0, np.round(raw, 2), NAN)
+
+    def reading(i):
+        return {
+            "score": float(score[i]),
+            "contribution": round((float(raw[i]) - 0.5) * config.term_contrib_scale, 2),
+            "funding_ann_pct": _num(fann[i], 2),
+            "funding_8h_pct": _num(avg_8h[i] * 100.0, 4),
+            "perp_premium_now_pct": _num(prem_now[i], 3),
+            "perp_premium_7d_pct": _num(prem_7d[i], 3),
+            "funding_provider": "binance" if not math.isnan(fann[i]) else None,
+            "premium_provider": "binance" if not math.isnan(prem_now[i]) else None,
+            "source": "Binance/OKX/BitMEX/Bybit/Deribit/Proxy"
+        }
+    return score, reading
+
+def onchain_readings(charts, days, window, btc_price, config):
+    """compute_onchain_driver on each day: charts through the last finished UTC day, same windows."""
+    keys = (("addr", "n-unique-addresses"), ("fee", "transaction-fees"), ("tx", "n-transactions"),
+            ("hash", "hash-rate"))
+    start = min((p[0][0] for p in charts.values() if p), default=None)
+    if start is None:
+        return np.full(len(days), NAN), None
+    ser = {k: rolling.DailySeries.from_pairs(charts[name], start, days[-1]) for k, name in keys}
+    W = (window, 90, 180)
+    pos = np.arange(len(ser["addr"]))
+    last = {k: np.maximum.accumulate(np.where(np.isnan(sr.values), -1, pos)) for k, sr in ser.items()}
+    # the chart end the run would have seen: last point of addresses/fees out by then (UTC days)
+    a = ((published_through(f"blockchain:{keys[0][1]}", days) - ser["addr"].start) / DAY).astype(int)
+    end = np.where(a >= 0, np.minimum(last["addr"][np.clip(a, 0, len(pos) - 1)],
+                                      last["fee"][np.clip(a, 0, len(pos) - 1)]), -1)
+    e = np.maximum(end, 0)
+    m = {k: {w: st["mean"][e] for w, st in rolling.rolling_stats(sr.values, W).items()}
+         for k, sr in ser.items()}
+    ok = lambda x: ~np.isnan(x) & (x != 0.0)     # present, not NaN, non-zero
+
+    def rel(x, base, valid):
+        return np.where(valid, (x - base) / np.where(valid, base, 1.0), NAN)
+
+    dev = {k: np.nan_to_num(rel(m[k][window], m[k][180], ok(m[k][180]) & ok(m[k][window])))
+           for k in ("addr", "fee", "tx")}
+    hr_mom = rel(m["hash"][window], m["hash"][90], ok(m["hash"][90]) & ok(m["hash"][window]))
+    blend = 0.4 * dev["addr"] + 0.2 * dev["tx"] + 0.2 * dev["fee"] + 0.2 * np.nan_to_num(hr_mom)
+    raw = _clamped(-blend / config.scales["onchain"])
+    score = np.where(end >= 0, np.round(raw, 2), NAN)
+    today = {}
+    for k, sr in ser.items():
+        j = last[k][e]
+        today[k] = np.where((j >= 0) & (j > e - ONCHAIN_DAYS), sr.values[np.maximum(j, 0)], NAN)
+    seen = {k: np.concatenate([[0], np.cumsum(~np.isnan(sr.values))]) for k, sr in ser.items()}
+    nn = lambda x, nd=0: round(float(x), nd) if ok(x) else None
+
+    def reading(i):
+        bp = _num(btc_price[i], 2) or 0.0          # spot prices come rounded to cents
+        usd = lambda btc, nd=2: round(float(btc) * bp, nd) if bp else round(float(btc), 6)
+        fee = ser["fee"].values
+        trail = [{"date": _dmy(ser["fee"].start + p * DAY), "usd": usd(fee[p])}
+                 for p in range(e[i], max(e[i] - window, -1), -1) if not math.isnan(fee[p])]
+        return {
+            "score": float(score[i]),
+            "contribution": round((float(raw[i]) - 0.5) * 0.2, 2),
+            "addr_today": nn(today["addr"][i]),
+            "addr_avg_w": nn(m["addr"][window][i]),
+            "tx_today": nn(today["tx"][i]),
+            "tx_avg_w": nn(m["tx"][window][i]),
+            "fee_usd_today": usd(today["fee"][i]) if not math.isnan(today["fee"][i]) else None,
+            "fee_usd_avg_w": usd(m["fee"][window][i]) if ok(m["fee"][window][i]) else None,
+            "hash_mom_pct": _num(hr_mom[i] * 100.0, 2),
+            "mempool_vsize_mb": None,
+            "mempool_halfhour_satvb": None,
+            "gap_days": {k: int(180 - (s[e[i] + 1] - s[max(e[i] - 179, 0)])) for k, s in seen.items()},
+            "trailing": trail,
+            "source": "blockchain.com (addr/tx/fees/hash) + mempool.space"
+        }
+    return score, reading
+
+# ---- blend + documents ----
+def blend(scores, config):
+    """
+    scores {driver: (T,)} -> inst, risk (T,). A day's missing drivers drop out and the rest of the
+    weights are renormalized (blend_risk); days without any reading get NaN and stay out of the EMA.
+    """
+    names = [k for k in DRIVERS if k in scores]
+    S = np.stack([scores[k] for k in names], axis=1)
+    w = np.array([config.weights[k] for k in names])
+    have = ~np.isnan(S)
+    full = have.all(axis=1) & (len(names) == len(config.weights))
+    wsum = (have * w).sum(axis=1)
+    inst = np.where(full, np.where(have, S, 0.0) @ w, (np.where(have, S, 0.0) @ w) / np.where(wsum > 0, wsum, 1.0))
+    inst = np.where(wsum > 0, inst, NAN)
+    risk = np.full(len(inst), NAN)
+    ok = ~np.isnan(inst)
+    risk[ok] = np.clip(replay.ema(inst[ok], config.ema_keep), 0.0, 1.0)
+    return inst, risk
+
+def score_history(raw, asset, days, config):
+    """Fetched series -> {driver: (scores, reading)} for every driver the asset has data for."""
+    w = config.smooth_days
+    out = {}
+    if asset.farside and raw.get("etf"):
+        out["etf_flows"] = etf_readings(raw["etf"], days, asset, w, config)
+    if all(raw.get(f"fred:{sid}") for sid in FRED_IDS):
+        out["net_liquidity"] = net_liquidity_readings({sid: raw[f"fred:{sid}"] for sid in FRED_IDS}, days, w, config)
+    if raw.get("cg:tether") and raw.get("cg:usd-coin"):
+        out["stablecoins"] = stablecoin_readings(raw["cg:tether"], raw["cg:usd-coin"], days, w, config)
+    if raw.get("funding") or raw.get("premium"):
+        out["term_structure"] = term_readings(raw.get("funding") or [], raw.get("premium") or [], days, config)
+    if asset.onchain:
+        charts = {name: raw.get(f"bc:{name}") or [] for name in ONCHAIN_CHARTS}
+        if charts["n-unique-addresses"] and charts["transaction-fees"]:
+            out["onchain"] = onchain_readings(charts, days, w, daily_price(raw.get("price:BTC"), days), config)
+    return out
+
+def build_docs(raw, asset, since, until, config=None):
+    """Fetched series -> backfilled latest.json-shaped documents, one per day with any reading."""
+    config = config or RiskConfig()
+    days = np.arange(np.datetime64(since, "D"), np.datetime64(until, "D") + DAY, DAY)
+    drivers = score_history(raw, asset, days, config)
+    if not drivers:
+        return []
+    scores = {k: s for k, (s, _) in drivers.items()}
+    inst, risk = blend(scores, config)
+    price = daily_price(raw.get(f"price:{asset.symbol}"), days)
+    btc_price = daily_price(raw.get("price:BTC"), days)
+    docs = []
+    for i in np.flatnonzero(~np.isnan(risk)):
+        run_at = _run_at(days[i].astype(datetime.date))
+        stamp = run_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+        day = {k: reading(i) for k, (s, reading) in drivers.items() if not math.isnan(s[i])}
+        apply_health(day, stamp, run_at)
+        nl = (day.get("net_liquidity") or {}).get("score", 0.5)
+        blended = {"inst": float(inst[i]), "risk": float(risk[i]), "band": config.band(risk[i]),
+                   "regime": config.regime(nl)}
+        doc = build_doc(day, blended, _num(btc_price[i], 2), config, str(days[i]), stamp, asset,
+                        _num(price[i], 2))
+        doc["backfilled"] = True
+        docs.append(doc)
+    return docs
+
+def recorded_days(data_dir, arch, replace=False):
+    """Days that must not be overwritten: every snapshot, every archived day (but backfilled ones with replace)."""
+    days = {p.stem for p in (data_dir / "history").glob("*.json")}
+    days.update(d for d, doc in arch.iter_docs() if not (replace and doc.get("backfilled")))
+    return days
+
+def write(docs, data_dir, replace=False):
+    """Archive the documents of days nothing recorded yet, then refresh the history outputs -> days written."""
+    arch = archive.Archive(data_dir / "archive")
+    taken = recorded_days(data_dir, arch, replace)
+    new = [doc for doc in docs if doc["as_of"] not in taken]
+    if not new:
+        return 0
+    arch.put_many(new)
+    hist = data_dir / "history"
+    hist.mkdir(parents=True, exist_ok=True)
+    asset = new[0].get("asset")
+    rows = history.build_history(hist_dir=hist, data_dir=data_dir, manifest_path=data_dir / "history_manifest.json",
+                                 archived=arch.rows(), tiles_dir=data_dir / "history_tiles", asset=asset)
+    outputs.write_history_columns(rows, data_dir, history.price_field(asset))
+    try:
+        import driver_store
+        if driver_store.pl is not None:
+            driver_store.rebuild(hist, data_dir / "drivers.parquet")
+    except Exception as e:
+        print(f"[backfill] WARN drivers.parquet rebuild failed: {e}", file=sys.stderr)
+    return len(new)
+
+def main(argv=None):
+    yesterday = datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=1)
+    ap = argparse.ArgumentParser(description="Point-in-time backfill of the risk history")
+    ap.add_argument("--since", type=datetime.date.fromisoformat, help="first day (default: 730 days back)")
+    ap.add_argument("--until", type=datetime.date.fromisoformat, default=yesterday, help="last day (default: yesterday)")
+    ap.add_argument("--asset", default=BTC.symbol, choices=sorted(ASSETS))
+    ap.add_argument("--daily", action="store_true", help="daily model preset (run_daily.py --daily)")
+    ap.add_argument("--replace", action="store_true", help="rewrite days an earlier backfill wrote")
+    ap.add_argument("--dry-run", action="store_true", help="score and summarize, write nothing")
+    a = ap.parse_args(argv)
+    since = a.since or a.until - datetime.timedelta(days=730)
+    if since > a.until:
+        sys.exit(f"[backfill] --since {since} is after --until {a.until}")
+    asset, config = ASSETS[a.asset], RiskConfig.for_mode(weekly=False) if a.daily else RiskConfig()
+
+    raw = fetch_history(asset, since, a.until)
+    got = {k: len(v) for k, v in raw.items() if v}
+    print(f"[backfill] fetched {len(got)}/{len(raw)} series: "
+          + " ".join(f"{k}={n}" for k, n in sorted(got.items())), file=sys.stderr)
+    docs = build_docs(raw, asset, since, a.until, config)
+    if not docs:
+        sys.exit(f"[backfill] nothing to score for {asset.symbol} {since}..{a.until}")
+    bands = {b: sum(d["band"] == b for d in docs) for b in ("green", "yellow", "red")}
+    print(f"[backfill] {asset.symbol} {docs[0]['as_of']}..{docs[-1]['as_of']}: {len(docs)} days scored, "
+          f"bands {bands}", file=sys.stderr)
+    if a.dry_run:
+        return
+    n = write(docs, asset_data_dir(asset.symbol, DATA), a.replace)
+    print(f"[backfill] OK asset={asset.symbol} written={n} skipped={len(docs) - n} (already recorded)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# pipelines/budget.py
+# Run-wide time budget and per-source circuit breakers, consulted by http_client for every
+# network request (cache hits within TTL never get here):
+#  - deadline: a run gets RUN_BUDGET_S seconds; fetching stops OUTPUT_RESERVE_S before that so
+#    scoring and writing still fit. Past the deadline requests fail at once (URLError), which
+#    lets http_client serve stale cache entries and engine fall back to last-known-good drivers.
+#  - adaptive timeouts: per host, the time to headers of the last LATENCY_SAMPLES successful
+#    requests; the timeout becomes TIMEOUT_FACTOR × p95 (never above the caller's timeout,
+#    never below MIN_TIMEOUT_S) and is capped by the time left in the run.
+#  - circuit breakers: a host that failed (every request errored) on BREAKER_RUNS consecutive
+#    runs is skipped. Every BREAKER_PROBE_EVERY skipped runs one request is let through
+#    (half-open); if it succeeds the host is closed again for the rest of the run.
+# State (latencies, failure streaks) lives in data/cache/source_health.json between runs.
+# Outside start()/finish() (daemon, bench drivers, scripts) nothing is limited.
+import json, os, sys, threading, time, urllib.error
+
+import metrics
+from outputs import atomic_write
+
+RUN_BUDGET_S = float(os.environ.get("GG_RUN_BUDGET_S", "120"))
+OUTPUT_RESERVE_S = 20.0
+LATENCY_SAMPLES = 20
+MIN_SAMPLES = 5          # fewer observations: the caller's timeout is used as is
+TIMEOUT_FACTOR = 4.0
+MIN_TIMEOUT_S = 3.0
+BREAKER_RUNS = 3
+BREAKER_PROBE_EVERY = 3
+
+def _p95(xs):
+    xs = sorted(xs)
+    return xs[int(0.95 * (len(xs) - 1))]
+
+class RunBudget:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = False
+        self.deadline = None
+        self.hosts = {}          # host -> {"lat_ms": [...], "fails": runs, "skipped": runs}
+        self._run = {}           # host -> {"ok": n, "failed": n, "rejected": n} for this run
+        self._probed = set()
+        self.path = None
+
+    def start(self, data_dir, budget_s=None, now=None):
+        """Begin a run: load host state from data_dir/cache, set the fetch deadline."""
+        budget_s = RUN_BUDGET_S if budget_s is None else budget_s
+        self.path = data_dir / "cache" / "source_health.json"
+        try:
+            hosts = json.loads(self.path.read_text()).get("hosts", {})
+        except Exception:
+            hosts = {}
+        with self._lock:
+            self.hosts, self._run, self._probed = hosts, {}, set()
+            self.deadline = (now or time.monotonic()) + max(0.0, budget_s - OUTPUT_RESERVE_S)
+            self.active = True
+
+    def remaining(self):
+        """Seconds left for fetching, or None when no run is active."""
+        if not self.active:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def _tally(self, host, key):
+        r = self._run.setdefault(host, {"ok": 0, "failed": 0, "rejected": 0})
+        r[key] += 1
+
+    def admit(self, host):
+        """Raise URLError if the deadline passed or host's breaker is open (else count a probe)."""
+        if not self.active:
+            return
+        if self.remaining() <= 0:
+            metrics.count("deadline", host=host)
+            raise urllib.error.URLError(f"run deadline passed, {host} not requested")
+        with self._lock:
+            st = self.hosts.get(host) or {}
+            if st.get("fails", 0) < BREAKER_RUNS or self._run.get(host, {}).get("ok"):
+                return
+            if st.get("skipped", 0) + 1 >= BREAKER_PROBE_EVERY and host not in self._probed:
+                self._probed.add(host)
+                metrics.count("breaker", host=host, state="probe")
+                return
+            self._tally(host, "rejected")
+        metrics.count("breaker", host=host, state="open")
+        raise urllib.error.URLError(f"circuit open for {host} (failed {st['fails']} runs)")
+
+    def timeout_for(self, host, timeout):
+        """Caller's timeout tightened to the host's observed latency and the time left."""
+        if not self.active:
+            return timeout
+        with self._lock:
+            lat = (self.hosts.get(host) or {}).get("lat_ms") or []
+        if len(lat) >= MIN_SAMPLES:
+            timeout = min(timeout, max(MIN_TIMEOUT_S, TIMEOUT_FACTOR * _p95(lat) / 1000))
+        return max(0.5, min(timeout, self.remaining()))
+
+    def outcome(self, host, ok, ttfb_s=None):
+        """Record one request: ok = the host answered 2xx/304."""
+        if not self.active:
+            return
+        with self._lock:
+            self._tally(host, "ok" if ok else "failed")
+            if ok and ttfb_s is not None:
+                st = self.hosts.setdefault(host, {})
+                st["lat_ms"] = (st.get("lat_ms", []) + [round(ttfb_s * 1000, 1)])[-LATENCY_SAMPLES:]
+
+    def finish(self):
+        """End the run: update failure streaks, persist state -> {host: breaker state}."""
+        if not self.active:
+            return {}
+        with self._lock:
+            self.active = False
+            for host, r in self._run.items():
+                st = self.hosts.setdefault(host, {})
+                if r["ok"]:
+                    st["fails"], st["skipped"] = 0, 0
+                elif r["failed"]:
+                    st["fails"], st["skipped"] = st.get("fails", 0) + 1, 0
+                elif r["rejected"]:
+                    st["skipped"] = st.get("skipped", 0) + 1
+            state = {h: "open" if st.get("fails", 0) >= BREAKER_RUNS else "closed"
+                     for h, st in sorted(self.hosts.items())}
+            doc = {"updated_unix": round(time.time(), 3), "hosts": self.hosts}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.path, json.dumps(doc, indent=1, sort_keys=True))
+        except OSError as e:
+            print(f"[budget] WARN source health not saved: {e}", file=sys.stderr)
+        return state
+
+RUN = RunBudget()
@@ -0,0 +1,204 @@
+# pipelines/daemon.py
+# Long-running mode: drivers stay in memory and each source refreshes on its own cadence
+# (funding/premium every few minutes, mempool hourly, FRED/ETF/CoinGecko/charts daily).
+# After any refresh only the touched drivers are re-scored, then the blend is recomputed
+# and the outputs rewritten, so intraday risk stays current without re-fetching the
+# slow daily sources.
+#
+#   python pipelines/daemon.py                       # weekly preset, default cadences
+#   python pipelines/daemon.py --cadence term_structure=120 --cadence mempool=1800
+#
+# The EMA is anchored on the previous *day's* risk: within a day risk = blend of that
+# anchor and the current instantaneous score, so refreshing every 5 minutes does not
+# smooth faster than the once-a-day cron did. The anchor rolls at local midnight.
+#
+# BTC only: it keeps data/ current. Other assets (data/assets/<sym>/) are refreshed by the
+# daily run (run_daily.py) alone.
+import argparse, copy, datetime, json, sys, threading, time
+
+import archive
+import engine
+import memo
+import metrics
+from model import RiskConfig
+from sources import (HEDGE_DELAY_S, fetch_parallel, fetch_btc_price_usd, fetch_etf_trailing,
+                     fetch_blockchain_chart, fetch_mempool_summary, ONCHAIN_CHARTS)
+
+# job -> refresh interval (seconds)
+CADENCES_S = {
+    "term_structure": 5 * 60,
+    "price":          5 * 60,
+    "mempool":        60 * 60,
+    "onchain_charts": 24 * 60 * 60,
+    "etf_flows":      24 * 60 * 60,
+    "stablecoins":    24 * 60 * 60,
+    "net_liquidity":  24 * 60 * 60,
+}
+RETRY_S = 5 * 60        # a job whose fetch came back empty is retried this soon
+
+class RiskDaemon:
+    """In-memory driver state + per-job refresh schedule. step() runs whatever is due."""
+
+    def __init__(self, config=None, data_dir=engine.DATA, cadences=None,
+                 hedge_delay=HEDGE_DELAY_S, write=True):
+        self.config = config or RiskConfig()
+        self.data_dir = data_dir
+        self.cadences = dict(CADENCES_S, **(cadences or {}))
+        self.hedge_delay = hedge_delay
+        self.write = write
+        self.drivers = {}
+        self.btc_price = engine.load_prev_doc(data_dir).get("btc_price_usd")
+        self.onchain_inputs = {name: [] for name in ONCHAIN_CHARTS}
+        self.onchain_inputs["mempool"] = (None, None)
+        self.due = {job: 0.0 for job in self.cadences}    # monotonic time; 0 = now
+        self.day = None
+        self.anchor = None       # previous day's final risk (EMA anchor for today)
+        self.last = None         # latest blended result
+        self.doc = None
+        if write:
+            memo.MEMO.load(data_dir)     # write_outputs skips documents identical but for stamps
+
+    # ---- refresh jobs: each returns (changed, ok); not ok = retry after RETRY_S ----
+    def _run_job(self, job):
+        try:
+            return self._refresh(job)
+        except Exception as e:      # one broken job must not stop the loop
+            print(f"[daemon] WARN {job} failed: {e!r}", file=sys.stderr)
+            return False, False
+
+    def _refresh(self, job):
+        cfg, w = self.config, self.config.smooth_days
+        have = job in self.drivers
+        if job == "term_structure":
+            d = engine.compute_term_structure_driver(cfg, self.hedge_delay)
+            ok = d.get("funding_ann_pct") is not None or d.get("perp_premium_7d_pct") is not None
+            if not ok and have:
+                return False, False   # keep the last real reading over the random fallback
+            self.drivers[job] = d
+            return True, ok
+        if job == "price":
+            p = fetch_btc_price_usd()
+            if p is None:
+                return False, False
+            self.btc_price = p
+            return True, True
+        if job == "mempool":
+            mem = fetch_mempool_summary()
+            if mem == (None, None):
+                return False, False
+            self.onchain_inputs["mempool"] = mem
+            return True, True
+        if job == "onchain_charts":
+            got = fetch_parallel({n: (fetch_blockchain_chart, n, engine.ONCHAIN_DAYS) for n in ONCHAIN_CHARTS})
+            got = {n: v for n, v in got.items() if v}
+            self.onchain_inputs.update(got)
+            return bool(got), len(got) == len(ONCHAIN_CHARTS)
+        if job == "etf_flows":
+            trail = fetch_etf_trailing(w)
+            if not trail and have:
+                return False, False
+            self.drivers[job] = engine.etf_driver(trail, cfg)
+            return True, bool(trail)
+        if job == "stablecoins":
+            sc = engine.combine_stablecoin_issuance(w)
+            if sc[0] is None and have:
+                return False, False
+            self.drivers[job] = engine.stablecoin_driver(sc, cfg)
+            return True, sc[0] is not None
+        if job == "net_liquidity":
+            d = engine.compute_net_liquidity(w, 120, cfg)
+            if d is None and have:
+                return False, False
+            self.drivers[job] = d or engine.net_liquidity_pending()
+            return True, d is not None
+        raise ValueError(f"unknown job {job!r}")
+
+    def _rescore_onchain(self):
+        self.drivers["onchain"] = engine.compute_onchain_driver(
+            self.btc_price, self.config.smooth_days, self.onchain_inputs, self.config)
+
+    def _anchor_for(self, day):
+        """Risk at the end of the day before `day`: in memory, else the newest earlier snapshot."""
+        if self.last is not None and self.day is not None and self.day < day:
+            return self.last["risk"]
+        hist = self.data_dir / "history"
+        older = sorted(p for p in hist.glob("*.json") if p.stem < day) if hist.exists() else []
+        for p in reversed(older):
+            try:
+                return float(json.loads(p.read_text())["risk"])
+            except Exception:
+                continue
+        rows = archive.Archive(self.data_dir / "archive").rows()   # snapshots pruned to the archive
+        earlier = [d for d in rows if d < day]
+        return rows[max(earlier)]["risk"] if earlier else None
+
+    def recompute(self, now=None):
+        """Re-blend from the in-memory drivers -> latest doc (written unless write=False)."""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        day = now.astimezone().date().isoformat()
+        if day != self.day:
+            self.anchor = self._anchor_for(day)
+            self.day = day
+        as_of_utc = now.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        engine.apply_health(self.drivers, as_of_utc, now)
+        self.last = engine.blend_risk(self.drivers, self.anchor, self.config)
+        # deep copy: later refreshes replace driver dicts and apply_health updates their health
+        # dicts in place; the written doc stays as it was
+        self.doc = engine.build_doc(copy.deepcopy(self.drivers), self.last, self.btc_price,
+                                    self.config, day, as_of_utc)
+        if self.write:
+            engine.write_outputs(self.doc, self.data_dir)
+            memo.MEMO.save()
+            metrics.write(self.data_dir)
+        return self.doc
+
+    def step(self, now=None):
+        """Run every due job (in parallel), re-score/re-blend if anything changed -> seconds to next due."""
+        t = time.monotonic()
+        jobs = [j for j, due in self.due.items() if due <= t]
+        if jobs:
+            metrics.RUN.reset()
+            res = fetch_parallel({j: (self._run_job, j) for j in jobs})
+            for j, (_, ok) in res.items():
+                self.due[j] = t + (self.cadences[j] if ok else min(RETRY_S, self.cadences[j]))
+            changed = {j for j, (c, _) in res.items() if c}
+            charts = self.onchain_inputs["n-unique-addresses"] and self.onchain_inputs["transaction-fees"]
+            if "onchain" not in self.drivers or (charts and changed & {"price", "mempool", "onchain_charts"}):
+                self._rescore_onchain()
+                changed.add("onchain")
+            if changed and len(self.drivers) == len(self.config.weights):
+                doc = self.recompute(now)
+                print(f"[daemon] {doc['as_of_utc']} refreshed={','.join(sorted(changed))} "
+                      f"risk={self.last['risk']:.3f} inst={self.last['inst']:.3f} band={doc['band']}",
+                      file=sys.stderr)
+        return max(0.0, min(self.due.values()) - time.monotonic())
+
+    def run_forever(self, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            stop.wait(self.step())
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Keep the BTC risk engine running with per-source refresh cadences")
+    ap.add_argument("--daily", action="store_true", help="daily model preset (default: model.py defaults)")
+    ap.add_argument("--cadence", action="append", default=[], metavar="JOB=SECONDS",
+                    help=f"override a refresh interval; jobs: {', '.join(CADENCES_S)}")
+    ap.add_argument("--once", action="store_true", help="refresh everything once and exit")
+    a = ap.parse_args(argv)
+    cad = {}
+    for item in a.cadence:
+        job, _, sec = item.partition("=")
+        if job not in CADENCES_S:
+            ap.error(f"unknown job {job!r}")
+        cad[job] = float(sec)
+    d = RiskDaemon(RiskConfig.for_mode(weekly=False) if a.daily else RiskConfig(), cadences=cad)
+    if a.once:
+        d.step()
+        return
+    try:
+        d.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# pipelines/driver_store.py
+# Columnar per-run store: data/drivers.parquet, one row per as_of date, every driver
+# field flattened to "<driver>__<field>" (health → "<driver>__health_status"/"__age_hours").
+# Trailing arrays stay in the snapshots; everything scalar is here, so queries like
+# "term_structure score over the last year" are a column-pruned, predicate-pushed scan:
+#
+#   import driver_store as ds
+#   ds.scan(["term_structure__score"], since="2025-01-01").collect()
+#
+# CLI: python pipelines/driver_store.py rebuild
+#      python pipelines/driver_store.py query term_structure__score onchain__score --since 2025-09-01
+import argparse, datetime, os, pathlib, sys
+
+try:
+    import polars as pl
+except ImportError:   # optional: the pipeline runs without it, the store just isn't updated
+    pl = None
+
+import archive
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+HIST = DATA / "history"
+STORE = DATA / "drivers.parquet"
+
+ROOT_FIELDS = ("as_of_utc", "smooth_days", "risk", "band", "regime", "price_usd", "btc_price_usd")
+
+def _scalar(v):
+    if isinstance(v, bool) or v is None or isinstance(v, str):
+        return v
+    if isinstance(v, (int, float)):
+        return float(v)
+    return None   # lists/dicts are not columns
+
+def flatten_doc(doc):
+    """latest.json-shaped doc -> flat row dict."""
+    row = {"date": datetime.date.fromisoformat(doc["as_of"])}
+    for k in ROOT_FIELDS:
+        row[k] = _scalar(doc.get(k))
+    for name, d in (doc.get("drivers") or {}).items():
+        if not isinstance(d, dict):
+            continue
+        for k, v in d.items():
+            if k == "health" and isinstance(v, dict):
+                row[f"{name}__health_status"] = v.get("status")
+                row[f"{name}__age_hours"] = _scalar(v.get("age_hours"))
+            elif not isinstance(v, (list, dict)):
+                row[f"{name}__{k}"] = _scalar(v)
+    return row
+
+def _frame(rows):
+    return pl.concat([pl.DataFrame([r]) for r in rows], how="diagonal_relaxed")
+
+def _write(df, path=STORE):
+    tmp = path.with_name(path.name + ".tmp")
+    df.sort("date").write_parquet(tmp, compression="zstd", statistics=True)
+    os.replace(tmp, path)
+
+def rebuild(hist_dir=HIST, path=STORE):
+    """Build the store from every stored snapshot, archived or not (one-off bootstrap/migration)."""
+    if pl is None:
+        raise RuntimeError("polars is not installed (pip install -r pipelines/requirements.txt)")
+    rows = []
+    for d, doc in archive.load_docs(hist_dir):
+        try:
+            rows.append(flatten_doc(doc))
+        except Exception as e:
+            print(f"[driver_store] WARN skip {d}: {e}", file=sys.stderr)
+    df = _frame(rows).unique("date", keep="last")
+    _write(df, path)
+    return df.height
+
+def update(doc, path=STORE):
+    """Upsert this run's row; returns False (and leaves the store alone) without polars."""
+    if pl is None:
+        print("[driver_store] INFO polars not installed, skipping drivers.parquet", file=sys.stderr)
+        return False
+    if not path.exists():
+        rebuild(path.parent / "history", path)
+    new = _frame([flatten_doc(doc)])
+    old = pl.read_parquet(path).filter(pl.col("date") != new["date"][0])
+    _write(pl.concat([old, new], how="diagonal_relaxed"), path)
+    return True
+
+def scan(columns=None, since=None, until=None, path=STORE):
+    """LazyFrame over the store; `columns` prunes, since/until (ISO dates) push down as predicates."""
+    lf = pl.scan_parquet(path)
+    if since:
+        lf = lf.filter(pl.col("date") >= datetime.date.fromisoformat(str(since)))
+    if until:
+        lf = lf.filter(pl.col("date") <= datetime.date.fromisoformat(str(until)))
+    if columns:
+        lf = lf.select(["date", *[c for c in columns if c != "date"]])
+    return lf
+
+def read_columns(columns, since=None, until=None, path=STORE, hist_dir=HIST):
+    """
+    {"date": [date…], col: [value|None…]} sorted by date. Uses the Parquet store when polars
+    and the store are available, otherwise flattens the snapshot files directly.
+    """
+    if pl is not None and path.exists():
+        names = set(pl.scan_parquet(path).collect_schema().names())
+        df = scan([c for c in columns if c in names], since, until, path).collect()
+        return {c: (df[c].to_list() if c in df.columns else [None] * df.height)
+                for c in ["date", *[c for c in columns if c != "date"]]}
+    lo = datetime.date.fromisoformat(str(since)) if since else None
+    hi = datetime.date.fromisoformat(str(until)) if until else None
+    rows = {}
+    for _, doc in archive.load_docs(hist_dir, since=lo and lo.isoformat(), until=hi and hi.isoformat()):
+        try:
+            r = flatten_doc(doc)
+        except Exception:
+            continue
+        if (lo and r["date"] < lo) or (hi and r["date"] > hi):
+            continue
+        rows[r["date"]] = r
+    rows = [rows[d] for d in sorted(rows)]
+    return {c: [r.get(c) for r in rows] for c in ["date", *[c for c in columns if c != "date"]]}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Columnar driver store (data/drivers.parquet)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("rebuild", help="rebuild from data/history/*.json and data/archive")
+    q = sub.add_parser("query", help="print selected columns")
+    q.add_argument("columns", nargs="*")
+    q.add_argument("--since"); q.add_argument("--until")
+    sub.add_parser("columns", help="list available columns")
+    a = ap.parse_args(argv)
+    if pl is None:
+        sys.exit("polars is not installed (pip install -r pipelines/requirements.txt)")
+    if a.cmd == "rebuild":
+        print(f"[driver_store] rows={rebuild()} -> {STORE}")
+    elif a.cmd == "columns":
+        print("\n".join(pl.scan_parquet(STORE).collect_schema().names()))
+    else:
+        with pl.Config(tbl_rows=-1, tbl_cols=-1):
+            print(scan(a.columns, a.since, a.until).collect())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,682 @@
+# pipelines/engine.py
+# The risk engine as a library: nothing runs on import. One run is
+#
+#   drivers, btc_price = compute_drivers(config)         # fetch + score the five drivers
+#   blended = blend_risk(drivers, prev_risk, config)     # weighted blend, EMA, band, regime
+#   doc = build_doc(drivers, blended, btc_price, config, as_of, as_of_utc)
+#   write_outputs(doc)                                   # latest.json, snapshot, store, history
+#
+# or simply run(config). run_multi(config, ["BTC", "ETH"]) does the same for several assets
+# (sources.ASSETS) off one shared fetch stage; non-BTC outputs go under data/assets/<sym>/. `config` is a model.RiskConfig (None = model.py defaults), so a
+# long-lived process, notebook or test can hold several configs side by side; run_daily.py
+# is the CLI wrapper.
+import datetime, json, pathlib, random, sys
+
+import archive
+import budget
+import history
+import memo                                    # stage memo (data/cache/stage_memo.json)
+import metrics
+import outputs
+import rolling                                 # numpy-backed calendar series / rolling stats
+from model import RiskConfig, clamp, sigmoid
+from sources import (ASSETS, BTC, HEDGE_DELAY_S, fetch_parallel, fetch_spot_usd, fetch_etf_trailing,
+                     fetch_stablecoin_caps, fetch_fred_series, scale_series, get_funding_multi,
+                     get_premium_now_pct_multi, fetch_binance_premium_7d_avg_pct,
+                     fetch_onchain_inputs)
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+
+# ----- ETF flows (Farside) -----
+@metrics.traced
+def etf_driver(trail, config=None, asset=BTC):
+    """trail: [(date_str, usd)] newest first -> etf_flows driver dict."""
+    config = config or RiskConfig()
+    etf_usd  = trail[0][1] if trail else None
+    etf_date = trail[0][0] if trail else None
+    win = rolling.RollingWindow(len(trail))       # the trail is the window (trading days)
+    for _, v in trail:
+        win.push(v)
+    sma_etf  = round(win.mean, 2) if trail else None
+    etf_base = sma_etf if sma_etf is not None else (etf_usd or 0.0)
+    score = clamp(sigmoid(-etf_base / config.scales["etf_flows"]), 0.0, 1.0)
+    d = {
+        "score": round(score, 2),
+        "contribution": round((score - 0.5) * 0.2, 2),
+        "raw_usd": etf_usd,
+        "sma7_usd": sma_etf,            # window avg
+        "asof": etf_date,
+        "trailing": [{"date": d, "usd": v} for d, v in trail],
+        "source": _asset(asset).farside_label
+    }
+    if not trail:
+        d["fallback"] = "neutral"       # placeholder: never carried forward as last-known-good
+    return d
+
+# ----- Stablecoin issuance (CoinGecko) -----
+
+@metrics.traced
+def combine_stablecoin_issuance(window=7):
+    need_days = window + 2
+    got = fetch_parallel({
+        "tether":   (fetch_stablecoin_caps, "tether", need_days),
+        "usd-coin": (fetch_stablecoin_caps, "usd-coin", need_days),
+    })
+    teth, usdc = got["tether"], got["usd-coin"]
+    if not teth or not usdc: return None, None, []
+    # align both coins on the calendar; a day missing for either coin is a gap, not a guess.
+    # The last point is "now", dated today like today's 00:00 UTC point: keep the 00:00 one
+    day = lambda ms: datetime.datetime.utcfromtimestamp(ms/1000).date()
+    t = rolling.DailySeries.from_pairs([(day(ts), v) for ts, v in teth], keep="first")
+    u = rolling.DailySeries.from_pairs([(day(ts), v) for ts, v in usdc], t.start, t.end, keep="first")
+    deltas = rolling.DailySeries(t.start, t.values + u.values).diff().tail(window)
+    obs = deltas.pairs()
+    if not obs: return None, None, []
+    today = obs[-1][1]
+    smaW = round(rolling.last_means(deltas.values, (window,), min_frac=0)[window], 2)
+    trail = [{"date": d.strftime("%d %b %Y"), "usd": round(v, 2)} for d, v in reversed(obs)]  # most recent first
+    return (round(today, 2), smaW, trail)
+
+@metrics.traced
+def stablecoin_driver(issuance, config=None):
+    """(today, window_avg, trailing) from combine_stablecoin_issuance -> stablecoins driver dict."""
+    config = config or RiskConfig()
+    sc_today, sc_smaW, sc_trailing = issuance
+    sc_base = sc_smaW if sc_smaW is not None else (sc_today or 0.0)
+    score = clamp(sigmoid(-sc_base / config.scales["stablecoins"]), 0.0, 1.0)
+    d = {
+        "score": round(score, 2),
+        "contribution": round((score - 0.5) * 0.2, 2),
+        "raw_delta_usd": sc_today,
+        "sma7_delta_usd": sc_smaW,
+        "trailing": sc_trailing,
+        "source": "CoinGecko USDT + USDC market_caps (daily)"
+    }
+    if sc_today is None and sc_smaW is None:
+        d["fallback"] = "neutral"
+    return d
+
+# ----- FRED (Net Liquidity) -----
+NETLIQ_FFILL_DAYS = 14
+
+@metrics.traced
+def compute_net_liquidity(window=7, lookback=120, config=None):
+    return net_liquidity_driver(fetch_net_liquidity_inputs(lookback), window, lookback, config)
+
+def fetch_net_liquidity_inputs(lookback=120):
+    """{series id: [(date, value)]} for the three FRED series."""
+    # +60d so the weekly series have an observation to forward-fill from
+    return fetch_parallel({sid: (fetch_fred_series, sid, lookback + 60)
+                           for sid in ("WALCL", "WTREGEN", "RRPONTSYD")})
+
+def net_liquidity_driver(got, window=7, lookback=120, config=None, today=None):
+    """fetch_net_liquidity_inputs() result -> net_liquidity driver dict (None without all three)."""
+    config = config or RiskConfig()
+    walcl_raw, tga_raw, rrp_raw = got["WALCL"], got["WTREGEN"], got["RRPONTSYD"]
+    if not walcl_raw or not tga_raw or not rrp_raw:
+        return None
+
+    walcl = scale_series("WALCL", walcl_raw)
+    tga   = scale_series("WTREGEN", tga_raw)
+    rrp   = scale_series("RRPONTSYD", rrp_raw)
+
+    today = today or datetime.date.today()
+    start = max(min(walcl[0][0], tga[0][0], rrp[0][0]), today - datetime.timedelta(days=lookback))
+    # stock levels: carry each release forward (H.4.1 is weekly), at most NETLIQ_FFILL_DAYS,
+    # so a series that stops publishing becomes a gap instead of repeating forever
+    f_w, f_t, f_r = (rolling.DailySeries.from_pairs(p, start, today).ffill(limit=NETLIQ_FFILL_DAYS)
+                     for p in (walcl, tga, rrp))
+    obs = rolling.DailySeries(start, f_w.values - f_t.values - f_r.values).pairs()
+    if not obs:
+        return None
+    dates, net = [d for d, _ in obs], [v for _, v in obs]
+
+    level = net[-1]
+    # window-safe average change
+    N = max(2, min(int(window or 7), len(net) - 1))
+    deltaN = level - net[-N]
+    smaN = deltaN / N
+
+    trailing = []
+    for i in range(1, min(8, len(net))):
+        d = dates[-i].strftime("%d %b %Y")
+        trailing.append({"date": d, "usd": round(net[-i] - net[-i-1], 2)})
+
+    score = clamp(sigmoid(-smaN / config.scales["net_liquidity"]), 0.0, 1.0)  # more liq → lower risk
+    contrib = round((score - 0.5) * 0.2, 2)
+
+    asof_date = dates[-1]
+    return {
+        "score": round(score, 2),
+        "contribution": contrib,
+        "level_usd": round(level, 2),
+        "delta1d_usd": round(level - net[-2], 2) if len(net) >= 2 else 0.0,
+        "sma7_delta_usd": round(smaN, 2),  # name kept for UI compatibility
+        "trailing": trailing,
+        "asof": asof_date.strftime("%d %b %Y"),
+        "asof_utc": f"{asof_date.isoformat()}T00:00:00Z",
+        "source": "FRED WALCL − WTREGEN − RRPONTSYD (USD)"
+    }
+
+def net_liquidity_pending():
+    metrics.count("fallback", driver="net_liquidity", path="random")
+    return {
+        "score": round(random.uniform(0.4,0.7),2),
+        "contribution": round(random.uniform(-0.08,0.12),2),
+        "level_usd": None, "delta1d_usd": None, "sma7_delta_usd": None,
+        "trailing": [], "source": "FRED (pending key)", "fallback": "random"
+    }
+
+# ----- Term Structure & Leverage -----
+def term_structure_pending():
+    metrics.count("fallback", driver="term_structure", path="random")
+    return {
+        "score": round(random.uniform(0.3,0.7),2),
+        "contribution": round(random.uniform(-0.08,0.12),2),
+        "funding_ann_pct": None, "funding_8h_pct": None,
+        "perp_premium_now_pct": None, "perp_premium_7d_pct": None,
+        "funding_provider": None, "premium_provider": None,
+        "source": "Binance/OKX/BitMEX/Bybit/Deribit/Proxy", "fallback": "random"
+    }
+
+@metrics.traced
+def fetch_term_inputs(hedge_delay=HEDGE_DELAY_S, asset=BTC):
+    """Funding chain, premium-now chain and 7d premium (independent, fetched at once) -> raw dict."""
+    return fetch_parallel({
+        "funding":  (get_funding_multi, hedge_delay, asset),
+        "prem_now": (get_premium_now_pct_multi, hedge_delay, asset),
+        "prem_7d":  (fetch_binance_premium_7d_avg_pct, asset),
+    })
+
+@metrics.traced
+def compute_term_structure_driver(config=None, hedge_delay=HEDGE_DELAY_S, asset=BTC):
+    return term_structure_driver(fetch_term_inputs(hedge_delay, asset), config)
+
+def term_structure_driver(got, config=None):
+    """fetch_term_inputs() result -> term_structure driver dict."""
+    config = config or RiskConfig()
+    f8, fann, funding_src = got["funding"]
+    prem_now, premium_src = got["prem_now"]
+    prem_7d  = got["prem_7d"]
+    if prem_7d is None:
+        prem_7d = prem_now
+
+    parts = []
+    if fann is not None:
+        parts.append(sigmoid((fann - config.funding_neutral_ann_pct) / config.funding_scale_ann_pct))
+    if prem_7d is not None:
+        parts.append(sigmoid(prem_7d / config.premium_scale_pct))
+    if not parts:
+        return term_structure_pending()
+
+    score = clamp(sum(parts)/len(parts), 0.0, 1.0)
+    contrib = round((score - 0.5) * config.term_contrib_scale, 2)
+
+    return {
+        "score": round(score, 2),
+        "contribution": contrib,
+        "funding_ann_pct": None if fann is None else round(fann, 2),
+        "funding_8h_pct": None if f8 is None else round(f8, 4),
+        "perp_premium_now_pct": None if prem_now is None else round(prem_now, 3),
+        "perp_premium_7d_pct": None if prem_7d is None else round(prem_7d, 3),
+        "funding_provider": funding_src,    # which exchange won the hedged chain
+        "premium_provider": premium_src,
+        "source": "Binance/OKX/BitMEX/Bybit/Deribit/Proxy"
+    }
+
+# ----- On-chain (free: blockchain.com + mempool.space) -----
+ONCHAIN_DAYS = 220   # chart span; covers the 180d baseline
+
+def onchain_pending():
+    metrics.count("fallback", driver="onchain", path="random")
+    return {
+        "score": round(random.uniform(0.3,0.7),2),
+        "contribution": round(random.uniform(-0.08,0.12),2),
+        "trailing": [],
+        "source": "blockchain.com charts (fallback)", "fallback": "random"
+    }
+
+@metrics.traced
+def compute_onchain_driver(btc_price_usd: float, window: int = None, inputs=None, config=None):
+    config = config or RiskConfig()
+    window = window or config.smooth_days
+    if inputs is None:
+        inputs = fetch_onchain_inputs(ONCHAIN_DAYS)
+    addrs = inputs["n-unique-addresses"]
+    fees  = inputs["transaction-fees"]   # BTC/day
+    txs   = inputs["n-transactions"]
+    hrate = inputs["hash-rate"]
+
+    if not addrs or not fees:
+        return onchain_pending()
+
+    # calendar-align every chart on the span addresses+fees both cover; missing days stay
+    # NaN and are left out of the means (a window needs half its days observed)
+    end = min(addrs[-1][0], fees[-1][0])
+    start = end - datetime.timedelta(days=ONCHAIN_DAYS - 1)
+    ser = {k: rolling.DailySeries.from_pairs(v, start, end)
+           for k, v in (("addr", addrs), ("fee", fees), ("tx", txs), ("hash", hrate))}
+    W = (window, 90, 180)
+    m = {k: rolling.last_means(sr.values, W) for k, sr in ser.items()}
+    ok = lambda x: x is not None and x == x and x != 0.0   # present, not NaN, non-zero
+
+    # deviations of the window avg vs the ≈180d baseline
+    dev = lambda k: (m[k][window] - m[k][180]) / m[k][180] if ok(m[k][180]) and ok(m[k][window]) else 0.0
+    dev_ad, dev_fe, dev_tx = dev("addr"), dev("fee"), dev("tx")
+
+    # hash momentum: (SMA_window - SMA_90)/SMA_90
+    hr_mom = None
+    if ok(m["hash"][90]) and ok(m["hash"][window]):
+        hr_mom = (m["hash"][window] - m["hash"][90]) / m["hash"][90]
+
+    # blend: addr 40% + tx 20% + fees 20% + hash 20%  (higher → lower risk)
+    dev = 0.4*dev_ad + 0.2*dev_tx + 0.2*dev_fe + 0.2*(hr_mom or 0.0)
+    score = clamp(sigmoid(-dev / config.scales["onchain"]), 0.0, 1.0)
+    contrib = round((score - 0.5) * 0.2, 2)
+
+    # trailing sparkline: fees converted to USD-ish (visual only), observed days only
+    bp = btc_price_usd or 0.0
+    usd = lambda btc, nd=2: round(btc * bp, nd) if bp else round(btc, 6)
+    trail = [{"date": d.strftime("%d %b %Y"), "usd": usd(v)}
+             for d, v in reversed(ser["fee"].tail(window).pairs())]  # most recent first
+
+    _, ad_today = ser["addr"].last_valid()
+    _, tx_today = ser["tx"].last_valid()
+    _, fe_today = ser["fee"].last_valid()
+    nn = lambda x, nd=0: round(x, nd) if ok(x) else None
+    mem_mb, fee30 = inputs["mempool"]
+
+    return {
+        "score": round(score, 2),
+        "contribution": contrib,
+        "addr_today": nn(ad_today),
+        "addr_avg_w": nn(m["addr"][window]),
+        "tx_today": nn(tx_today),
+        "tx_avg_w": nn(m["tx"][window]),
+        "fee_usd_today": usd(fe_today) if fe_today is not None else None,
+        "fee_usd_avg_w": usd(m["fee"][window]) if ok(m["fee"][window]) else None,
+        "hash_mom_pct": round(hr_mom*100.0, 2) if hr_mom is not None else None,
+        "mempool_vsize_mb": round(mem_mb, 2) if mem_mb is not None else None,
+        "mempool_halfhour_satvb": round(fee30, 0) if fee30 is not None else None,
+        "gap_days": {k: sr.tail(180).gaps() for k, sr in ser.items()},   # missing days in the baseline
+        "trailing": trail,
+        "source": "blockchain.com (addr/tx/fees/hash) + mempool.space"
+    }
+
+# ---- per-driver freshness/health ----
+def _parse_dmy(s):
+    try:
+        return datetime.datetime.strptime(s, "%d %b %Y").date()
+    except Exception:
+        return None
+
+def add_health(d, kind, asof_str=None, asof_utc=None, now=None):
+    """
+    kind: 'daily' (expect <=72h fresh) or 'intraday' (<=6h fresh)
+    adds: d['health'] = {status: ok|stale|down, age_hours: float}
+          and normalizes asof/asof_utc if missing.
+    """
+    if not isinstance(d, dict):
+        return
+
+    # choose a timestamp
+    dt_utc = None
+    if asof_utc:
+        try:
+            dt_utc = datetime.datetime.fromisoformat(asof_utc.replace("Z", "+00:00"))
+        except Exception:
+            dt_utc = None
+    elif asof_str:
+        dt = _parse_dmy(asof_str)
+        if dt:
+            dt_utc = datetime.datetime(dt.year, dt.month, dt.day, tzinfo=datetime.timezone.utc)
+
+    age_hours = None
+    if dt_utc:
+        age_hours = ((now or datetime.datetime.now(datetime.timezone.utc)) - dt_utc).total_seconds() / 3600.0
+
+    status = "down"
+    if age_hours is not None:
+        thr = 6 if kind == "intraday" else 72
+        status = "ok" if age_hours <= thr else "stale"
+
+    if asof_str and not d.get("asof"):
+        d["asof"] = asof_str
+    if dt_utc and not d.get("asof_utc"):
+        d["asof_utc"] = dt_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    d["health"] = {"status": status, "age_hours": None if age_hours is None else round(age_hours, 1)}
+
+def apply_health(drivers, as_of_utc, now=None):
+    """Attach health to every driver: daily sources by their own asof, intraday by the run time."""
+    add_health(drivers.get("etf_flows"), "daily", asof_str=(drivers.get("etf_flows") or {}).get("asof"), now=now)
+    # compute_net_liquidity() already returns asof/asof_utc
+    if drivers.get("net_liquidity"):
+        add_health(drivers["net_liquidity"], "daily",
+                   asof_str=drivers["net_liquidity"].get("asof"),
+                   asof_utc=drivers["net_liquidity"].get("asof_utc"), now=now)
+    # stablecoins: most recent trailing date if present
+    sc_asof = None
+    try:
+        sc_asof = drivers["stablecoins"]["trailing"][0]["date"]
+    except Exception:
+        pass
+    add_health(drivers.get("stablecoins"), "daily", asof_str=sc_asof, now=now)
+    # intraday: stamped with the run time when first scored (the daemon keeps older stamps)
+    for k in ("term_structure", "onchain"):
+        d = drivers.get(k) or {}
+        add_health(drivers.get(k), "intraday", asof_utc=d.get("asof_utc") or as_of_utc, now=now)
+
+# ===== API =====
+def _utc_stamp(now):
+    return now.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+# ---- last-known-good drivers ----
+def stage_key(driver, symbol):
+    """compute_drivers_multi fetch-stage key that feeds `driver` for one asset."""
+    return {"stablecoins": "sc", "net_liquidity": "netliq"}.get(driver) or \
+        f"{ {'etf_flows': 'etf', 'term_structure': 'term'}.get(driver, driver)}:{symbol}"
+
+def last_good(prev_doc, key, reason):
+    """
+    prev_doc's reading of driver `key` (unless it was itself a random/neutral fallback), tagged
+    carried={reason, from}; `from` stays the run that actually produced it. None if there is none.
+    """
+    prev = ((prev_doc or {}).get("drivers") or {}).get(key)
+    if not isinstance(prev, dict) or prev.get("fallback") or "score" not in prev:
+        return None
+    d = dict(prev)
+    d["carried"] = {"reason": reason,
+                    "from": (prev.get("carried") or {}).get("from") or prev_doc.get("as_of_utc")}
+    return d
+
+def _pending(key, config, asset=BTC):
+    """Neutral / random reading for a driver with nothing fetched and no previous reading."""
+    return {
+        "etf_flows": lambda: etf_driver([], config, asset),
+        "net_liquidity": net_liquidity_pending,
+        "stablecoins": lambda: stablecoin_driver((None, None, []), config),
+        "term_structure": term_structure_pending,
+        "onchain": onchain_pending,
+    }[key]()
+
+def _asset(a):
+    return ASSETS[a.upper()] if isinstance(a, str) else a
+
+@metrics.traced
+def compute_drivers_multi(config=None, assets=(BTC,), prev_docs=None, now=None, hedge_delay=HEDGE_DELAY_S):
+    """
+    Fetch every source for all `assets` (Asset or symbol) in one parallel stage and score each
+    asset's drivers -> {symbol: (drivers, price_usd, btc_price_usd)}.
+    Stablecoin issuance and net liquidity don't depend on the asset: fetched and scored once,
+    shared by every asset. Per-asset requests (spot, perps, ETF table, BTC on-chain charts) all
+    run in the same stage, so an extra asset adds requests, not wall-clock. An asset without an
+    ETF table or on-chain source simply has no such driver (blend_risk renormalizes).
+    prev_docs ({symbol: previous latest.json}) supply the prices if the spot fetch fails, and the
+    last-known-good reading of any driver whose source is down or missed the run deadline
+    (budget.py); such drivers carry `carried` and health "stale".
+    Scoring goes through memo.MEMO: a driver whose raw inputs and config are unchanged since
+    the last run is served from the memo instead of being recomputed. On-chain is always
+    recomputed: its fee fields are priced at the BTC spot, which changes every run.
+    """
+    config = config or RiskConfig()
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    assets = [_asset(a) for a in assets]
+    prev_docs = prev_docs or {}
+    w = config.smooth_days
+    # fetch stage: every independent source at once, bounded by the run deadline (if any)
+    calls = {
+        "sc":     (combine_stablecoin_issuance, w),
+        "netliq": (fetch_net_liquidity_inputs, 120),
+    }
+    for a in dict.fromkeys([BTC, *assets]):      # BTC spot prices every document (and BTC on-chain fees)
+        calls[f"price:{a.symbol}"] = (fetch_spot_usd, a)
+    for a in assets:
+        calls[f"term:{a.symbol}"] = (fetch_term_inputs, hedge_delay, a)
+        if a.farside:
+            calls[f"etf:{a.symbol}"] = (fetch_etf_trailing, w, a)
+        if a.onchain:
+            calls[f"onchain:{a.symbol}"] = (fetch_onchain_inputs, ONCHAIN_DAYS)
+    stage = fetch_parallel(calls, timeout=budget.RUN.remaining())
+    missed = [k for k in calls if k not in stage]
+    if missed:
+        metrics.annotate(missed_deadline=missed)
+        print(f"[engine] WARN deadline passed before: {', '.join(missed)}", file=sys.stderr)
+
+    # scoring pass (memoized on the raw inputs): shared drivers once, then every asset's own
+    score = lambda name, fn, *inputs: memo.MEMO.cached(name, (inputs, config), lambda: fn(*inputs, config))
+    sc, netliq, today = stage.get("sc"), stage.get("netliq"), datetime.date.today()
+    shared = {
+        "net_liquidity": memo.MEMO.cached("net_liquidity", (netliq, w, config, today),
+                                          lambda: net_liquidity_driver(netliq, w, 120, config, today))
+                         if netliq else None,
+        "stablecoins": score("stablecoins", stablecoin_driver, sc) if sc and sc[0] is not None else None,
+    }
+    prev_btc = prev_docs.get(BTC.symbol) or {}
+    btc_price = stage.get("price:BTC") or prev_btc.get("btc_price_usd")
+    out = {}
+    for a in assets:
+        sym, prev_doc = a.symbol, prev_docs.get(a.symbol) or {}
+        price = stage.get(f"price:{sym}")
+        if price is None:
+            price = prev_doc.get("price_usd", prev_doc.get("btc_price_usd") if a is BTC else None)
+            if price is not None:
+                metrics.count("fallback", driver=f"{sym.lower()}_price", path="previous_doc")
+        btc = price if a is BTC else btc_price or prev_doc.get("btc_price_usd")
+        term, trail, onchain = (stage.get(f"{k}:{sym}") for k in ("term", "etf", "onchain"))
+        fresh = {}
+        if a.farside:
+            fresh["etf_flows"] = memo.MEMO.cached(f"etf_flows:{sym}", (trail, config),
+                                                  lambda: etf_driver(trail, config, a)) if trail else None
+        fresh["net_liquidity"] = dict(shared["net_liquidity"]) if shared["net_liquidity"] else None
+        fresh["stablecoins"] = dict(shared["stablecoins"]) if shared["stablecoins"] else None
+        fresh["term_structure"] = score(f"term_structure:{sym}", term_structure_driver, term) if term else None
+        if a.onchain:
+            fresh["onchain"] = compute_onchain_driver(btc, w, onchain, config) if onchain else None
+
+        drivers, carried = {}, []
+        for k, d in fresh.items():
+            if d is not None and not d.get("fallback"):
+                drivers[k] = d
+                continue
+            reason = "deadline" if stage_key(k, sym) in missed else "source_down"
+            last = last_good(prev_doc, k, reason)
+            if last is not None:
+                metrics.count("fallback", driver=k, path="last_good", asset=sym)
+                drivers[k] = last
+                carried.append(k)
+            else:
+                drivers[k] = d if d is not None else _pending(k, config, a)
+        apply_health(drivers, _utc_stamp(now), now)
+        for k in carried:
+            drivers[k]["health"]["status"] = "stale"
+        out[sym] = (drivers, price, btc)
+    return out
+
+def compute_drivers(config=None, prev_doc=None, now=None, hedge_delay=HEDGE_DELAY_S):
+    """
+    BTC only: fetch every source and score the five drivers -> (drivers, btc_price_usd).
+    See compute_drivers_multi.
+    """
+    drivers, price, _ = compute_drivers_multi(config, (BTC,), {BTC.symbol: prev_doc or {}},
+                                              now, hedge_delay)[BTC.symbol]
+    return drivers, price
+
+@metrics.traced
+def blend_risk(drivers, prev_risk=None, config=None):
+    """
+    Weighted blend of driver scores + EMA on prev_risk -> {inst, risk, band, regime}.
+    Drivers an asset doesn't have (no ETF table, no on-chain source) drop out and the remaining
+    weights are renormalized.
+    """
+    config = config or RiskConfig()
+    score = lambda k: float((drivers.get(k) or {}).get("score", 0.5))
+    weights = {k: wt for k, wt in config.weights.items() if k in drivers}
+    if len(weights) == len(config.weights) or not weights:
+        weights = config.weights
+    else:
+        total = sum(weights.values())
+        weights = {k: wt / total for k, wt in weights.items()}
+    inst = sum(wt * score(k) for k, wt in weights.items())
+    risk = inst if prev_risk is None else (config.ema_keep * prev_risk + (1.0 - config.ema_keep) * inst)
+    risk = clamp(risk)
+    return {"inst": inst, "risk": risk, "band": config.band(risk),
+            "regime": config.regime(score("net_liquidity"))}
+
+def build_doc(drivers, blended, btc_price, config, as_of, as_of_utc, asset=BTC, price_usd=None):
+    """
+    -> the latest.json document (see docs/ARCHITECTURE.md for the contract).
+    btc_price_usd is the BTC price for every asset; price_usd is the asset's own (default btc_price).
+    """
+    etf, sc = drivers.get("etf_flows") or {}, drivers.get("stablecoins") or {}
+    return {
+        "as_of": as_of,
+        "as_of_utc": as_of_utc,
+        "asset": _asset(asset).symbol,
+        "smooth_days": config.smooth_days,
+        "risk": round(blended["risk"], 2),
+        "band": blended["band"],
+        "regime": blended["regime"],
+        "price_usd": btc_price if price_usd is None and _asset(asset) is BTC else price_usd,
+        "btc_price_usd": btc_price,
+
+        # convenience root fields for UI
+        "etf_flow_usd": etf.get("raw_usd"),
+        "etf_flow_sma7_usd": etf.get("sma7_usd"),                 # window avg
+        "stablecoin_delta_usd": sc.get("raw_delta_usd"),
+        "stablecoin_delta_sma7_usd": sc.get("sma7_delta_usd"),    # window avg
+
+        # full drivers
+        "drivers": drivers
+    }
+
+def load_prev_doc(data_dir=DATA):
+    """Previous latest.json, or {} if missing/unreadable."""
+    try:
+        return json.loads((data_dir / "latest.json").read_text())
+    except Exception:
+        return {}
+
+def prev_risk_of(prev_doc):
+    try:
+        return float(prev_doc.get("risk"))
+    except (TypeError, ValueError):
+        return None
+
+# run-time stamps: differ on every run even when nothing else does
+VOLATILE_FIELDS = ("as_of_utc", "asof_utc", "age_hours")
+
+def substance(doc):
+    """doc without its run-time stamps (VOLATILE_FIELDS, at any depth)."""
+    if isinstance(doc, dict):
+        return {k: substance(v) for k, v in doc.items() if k not in VOLATILE_FIELDS}
+    if isinstance(doc, list):
+        return [substance(v) for v in doc]
+    return doc
+
+@metrics.traced
+def write_outputs(doc, data_dir=DATA):
+    """
+    latest.json (+ .min.json/.gz/.br), history/<as_of>.json (+ archive/), drivers.parquet row and
+    the risk history files (+ columnar form) -> history rows. Serialized once, every file written atomically.
+    Memoized: if the document differs from the last one written only in its run-time stamps
+    (same day, same readings, same health), nothing is rewritten; files whose bytes are
+    unchanged are never rewritten either (outputs.write_if_changed).
+    """
+    stage, key = f"outputs:{doc.get('asset') or BTC.symbol}", memo.digest(memo.code_version(), substance(doc))
+    if (data_dir / "latest.json").exists():
+        n = memo.MEMO.get(stage, key)
+        if n is not None:
+            print(f"[engine] outputs unchanged since the last write ({n} history rows), nothing rewritten",
+                  file=sys.stderr)
+            return n
+    hist = data_dir / "history"
+    hist.mkdir(parents=True, exist_ok=True)
+    body = json.dumps(doc, indent=2).encode("utf-8")
+    outputs.write_if_changed(data_dir / "latest.json", body)
+    outputs.write_if_changed(hist / f"{doc['as_of']}.json", body)
+    outputs.write_compact(data_dir / "latest.json", doc)
+
+    # delta-encoded snapshot archive; snapshots past archive.SNAPSHOT_KEEP_DAYS live only there.
+    # Snapshots not archived yet (an existing history/, a backfill) are packed and read back
+    # before anything is pruned.
+    arch = archive.Archive(data_dir / "archive")
+    archived = None
+    try:
+        arch.put(doc)
+        archive.pack_snapshots(hist, arch)
+        archive.prune_snapshots(hist, arch)
+        archived = arch.rows()
+    except Exception as e:
+        print(f"[engine] WARN snapshot archive update failed: {e}", file=sys.stderr)
+
+    # columnar per-driver store (one row per run); imported here, polars is slow to load
+    try:
+        import driver_store
+        driver_store.update(doc, path=data_dir / "drivers.parquet")
+    except Exception as e:
+        print(f"[engine] WARN drivers.parquet update failed: {e}", file=sys.stderr)
+
+    # risk history files (last ~2 years), incremental via data/history_manifest.json, and the
+    # full-length pyramid in data/history_tiles/
+    price = history.price_field(doc.get("asset"))
+    rows = history.build_history(hist_dir=hist, data_dir=data_dir,
+                                 manifest_path=data_dir / "history_manifest.json", archived=archived,
+                                 tiles_dir=data_dir / "history_tiles", asset=doc.get("asset"))
+    outputs.write_history_columns(rows, data_dir, price)
+    print(f"[engine] history rows={len(rows)} -> risk_history.json/csv/columns written", file=sys.stderr)
+    memo.MEMO.put(stage, key, len(rows))
+    return len(rows)
+
+def asset_data_dir(symbol, data_dir=DATA):
+    """Where an asset's outputs live: data/ for BTC (unchanged layout), data/assets/<sym>/ otherwise."""
+    return data_dir if symbol == BTC.symbol else data_dir / "assets" / symbol.lower()
+
+def run_multi(config=None, assets=(BTC.symbol,), data_dir=DATA, now=None, hedge_delay=HEDGE_DELAY_S,
+              write=True, budget_s=None):
+    """
+    One engine run over several assets -> {symbol: (doc, blended)}. Sources are fetched in one
+    stage and the shared drivers scored once (compute_drivers_multi); each asset then gets its
+    own blend, EMA state, document and output tree (asset_data_dir). One budget, one metrics file.
+    """
+    config = config or RiskConfig()
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    assets = [_asset(a) for a in assets]
+    metrics.RUN.reset()
+    memo.MEMO.load(data_dir)
+    prev_docs = {a.symbol: load_prev_doc(asset_data_dir(a.symbol, data_dir)) for a in assets}
+    budget.RUN.start(data_dir, budget_s)
+    try:
+        scored = compute_drivers_multi(config, assets, prev_docs, now, hedge_delay)
+    finally:
+        breakers = budget.RUN.finish()
+    opened = [h for h, st in breakers.items() if st == "open"]
+    if opened:
+        print(f"[engine] WARN circuit open: {', '.join(opened)}", file=sys.stderr)
+    out = {}
+    for a in assets:
+        drivers, price, btc_price = scored[a.symbol]
+        prev_risk = prev_risk_of(prev_docs[a.symbol])
+        blended = memo.MEMO.cached(f"blend:{a.symbol}",
+                                   ({k: d.get("score") for k, d in drivers.items()}, prev_risk, config),
+                                   lambda: blend_risk(drivers, prev_risk, config))
+        doc = build_doc(drivers, blended, btc_price, config,
+                        now.astimezone().date().isoformat(), _utc_stamp(now), a, price)
+        if write:
+            write_outputs(doc, asset_data_dir(a.symbol, data_dir))
+        out[a.symbol] = (doc, blended)
+    if write:
+        memo.MEMO.save()
+        try:
+            metrics.write(data_dir)
+        except Exception as e:
+            print(f"[engine] WARN run metrics not written: {e}", file=sys.stderr)
+    return out
+
+def run(config=None, data_dir=DATA, now=None, hedge_delay=HEDGE_DELAY_S, write=True, budget_s=None):
+    """
+    One full BTC engine run -> (doc, blended). `now` (aware datetime) fixes the as-of time.
+    Fetching is bounded by budget_s (default budget.RUN_BUDGET_S, minus the output reserve).
+    """
+    return run_multi(config, (BTC.symbol,), data_dir, now, hedge_delay, write, budget_s)[BTC.symbol]
@@ -0,0 +1,93 @@
+# pipelines/farside.py
+# Streaming parser for Farside's "all data" ETF flow tables.
+# The page grows by a row every trading day, so it is fed to the parser chunk by chunk
+# (http_stream) and only the n most recent dated rows are held, in a bounded heap.
+# The flow is read from the column headed "Total" rather than from the last number.
+import datetime, heapq, re
+from html.parser import HTMLParser
+
+DATE_RE = re.compile(r"^(\d{1,2})\s+([A-Za-z]{3})\s+(\d{4})$")
+
+def parse_number_token(tok: str):
+    tok = tok.strip().replace(",", "")
+    if tok in {"-", "–", "—", ""}: return None
+    neg = tok.startswith("(") and tok.endswith(")")
+    tok = tok.strip("()")
+    try: v = float(tok); return -v if neg else v
+    except: return None
+
+def parse_date(s):
+    m = DATE_RE.match(s)
+    if not m:
+        return None
+    try:
+        return datetime.datetime.strptime(f"{int(m.group(1)):02d} {m.group(2).title()} {m.group(3)}", "%d %b %Y").date()
+    except ValueError:
+        return None
+
+class FarsideTableParser(HTMLParser):
+    """Feed HTML incrementally; .rows() -> [(date_str, total_musd)] for the n latest dates, newest first."""
+
+    def __init__(self, n, column="Total"):
+        super().__init__(convert_charrefs=True)
+        self.n, self.column = n, column.lower()
+        self.col_idx = None          # index of the Total column, from the header row
+        self._heap = []              # (date, date_str, value) min-heap of size <= n
+        self._dates = set()
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self._finish_row(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def _finish_row(self, cells):
+        if not cells:
+            return
+        d = parse_date(cells[0])
+        if d is None:
+            low = [c.lower() for c in cells]
+            if self.column in low[1:]:       # header row; the "Total" summary row has it in cell 0
+                self.col_idx = low.index(self.column, 1)
+            return
+        idx = self.col_idx if self.col_idx is not None else len(cells) - 1
+        if idx >= len(cells):
+            return
+        v = parse_number_token(cells[idx])
+        if v is None:
+            return
+        if d in self._dates:
+            return
+        item = (d, d.strftime("%d %b %Y"), v)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            self._dates.discard(heapq.heapreplace(self._heap, item)[0])
+        else:
+            return
+        self._dates.add(d)
+
+    def rows(self):
+        return [(s, v) for _, s, v in sorted(self._heap, reverse=True)]
+
+def parse_trailing(chunks, n):
+    """chunks: iterable of HTML text -> [(date_str, total_musd)] newest first, at most n."""
+    p = FarsideTableParser(n)
+    for c in chunks:
+        p.feed(c)
+    p.close()
+    return p.rows()
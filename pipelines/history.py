@@ -0,0 +1,190 @@
+# pipelines/history.py
+# Incremental builder for data/risk_history.json / .csv.
+# data/history_manifest.json remembers, per snapshot file, (size, sha1) and the row extracted
+# from it, plus the rows last published. A run only parses snapshots that are new or whose
+# content changed, and patches the outputs in place from the first differing row (normally
+# just the tail) instead of regenerating them; rows before it are never re-serialized, and the
+# manifest is only rewritten when something changed. Patches go through a temp file + rename
+# like every other output (outputs.atomic_write), never in place.
+# Only the newest RECHECK_DAYS days are rewritten by later runs, so older snapshots already in
+# the manifest are trusted on their name (the date) alone, without a stat(); mtimes are not
+# used, since a fresh CI checkout resets them all. Still linear in the snapshot count, but
+# cheap next to parsing: one directory listing (names only), loading the manifest and the
+# row comparison.
+import datetime, json, hashlib, math, os, pathlib
+
+import pyramid
+from outputs import atomic_write
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+HIST = DATA / "history"
+MANIFEST = DATA / "history_manifest.json"
+MANIFEST_VERSION = 2
+RECHECK_DAYS = 2        # snapshots this close to the newest one are hashed on every run
+
+def price_field(asset=None):
+    """The price column of an asset's history: btc_price_usd, eth_price_usd, ..."""
+    return f"{(asset or 'BTC').lower()}_price_usd"
+
+def csv_header(price="btc_price_usd"):
+    return f"date,as_of_utc,risk,band,{price}"
+
+def extract_row(doc, stem):
+    # the asset's own price (price_usd; BTC snapshots predating it only have btc_price_usd)
+    price = price_field(doc.get("asset"))
+    return {
+        "date": doc.get("as_of") or stem,
+        "as_of_utc": doc.get("as_of_utc"),
+        "risk": float(doc.get("risk", "nan")),
+        "band": doc.get("band"),
+        price: doc.get(price, doc.get("price_usd"))
+    }
+
+def _json_item(r):
+    # one element exactly as json.dumps(rows, indent=2) lays it out
+    return "  " + json.dumps(r, indent=2).replace("\n", "\n  ")
+
+def _csv_line(r, price="btc_price_usd"):
+    bp = "" if r.get(price) is None else str(r[price])
+    return f'{r["date"]},{r.get("as_of_utc","")},{r["risk"]:.4f},{r.get("band","")},{bp}'
+
+def _load_manifest(path):
+    try:
+        m = json.loads(path.read_text())
+        if m.get("version") == MANIFEST_VERSION:
+            return m
+    except Exception:
+        pass
+    return {"version": MANIFEST_VERSION, "files": {}, "published": {"rows": [], "json_len": [], "csv_len": []}}
+
+def _day(name):
+    try:
+        return datetime.date.fromisoformat(name[:-5])
+    except ValueError:
+        return None
+
+def scan_snapshots(hist_dir, files):
+    """
+    Refresh `files` (name -> entry) in place -> (snapshots parsed, manifest changed).
+    Settled snapshots already in the manifest are trusted without a stat(); only names newer
+    than that (the last RECHECK_DAYS days, new files) are stat()ed and, if needed, hashed.
+    """
+    with os.scandir(hist_dir) as it:
+        names = {de.name: de.path for de in it if de.name.endswith(".json") and de.is_file()}
+    days = {name: _day(name) for name in names}
+    known = [d for d in days.values() if d]
+    settled = max(known) - datetime.timedelta(days=RECHECK_DAYS) if known else None
+    parsed, changed = 0, False
+    for name, path in names.items():
+        ent, day = files.get(name), days[name]
+        if ent and day is not None and day <= settled:
+            continue
+        size = os.stat(path).st_size
+        raw = pathlib.Path(path).read_bytes()
+        sha = hashlib.sha1(raw).hexdigest()
+        if ent and ent["sha1"] == sha:
+            if ent["size"] != size:
+                ent["size"], changed = size, True
+            continue
+        try:
+            row = extract_row(json.loads(raw), name[:-5])
+            if not math.isfinite(row["risk"]):
+                row = None
+        except Exception:
+            row = None
+        parsed += 1
+        files[name] = {"size": size, "sha1": sha, "row": row}
+    for name in set(files) - set(names):
+        del files[name]
+        changed = True
+    return parsed, changed or parsed > 0
+
+def _patch(path, head_len, keep_bytes, tail, expect_size):
+    """
+    New file = first keep_bytes of path + tail, swapped in atomically (the unchanged head is
+    copied, not re-serialized); False if the file isn't what we wrote.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        if path.stat().st_size != expect_size or keep_bytes < head_len:
+            return False
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            remaining = keep_bytes
+            while remaining:
+                buf = src.read(min(remaining, 1 << 20))
+                if not buf:
+                    raise OSError("short read")
+                dst.write(buf)
+                remaining -= len(buf)
+            dst.write(tail.encode("utf-8"))
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        try: tmp.unlink()
+        except OSError: pass
+        return False
+
+def write_outputs(rows, prev, data_dir=DATA, price="btc_price_usd"):
+    """
+    Patch risk_history.json/.csv from the first row that differs from `prev` (published state).
+    Only the rows from there on are serialized; `prev` itself is returned if nothing differs.
+    """
+    header = csv_header(price)
+    old = prev["rows"]
+    k = 0
+    while k < min(len(rows), len(old)) and rows[k] == old[k]:
+        k += 1
+    if k == len(rows) == len(old):
+        return prev
+    jl, cl = prev["json_len"], prev["csv_len"]
+    if len(jl) != len(old) or len(cl) != len(old):
+        k = 0                                   # lengths unknown: serialize everything
+    items = [_json_item(r) for r in rows[k:]]
+    lines = [_csv_line(r, price) for r in rows[k:]]
+    published = {"rows": rows, "json_len": jl[:k] + [len(s) for s in items],
+                 "csv_len": cl[:k] + [len(s) for s in lines]}
+
+    jpath, cpath = data_dir / "risk_history.json", data_dir / "risk_history.csv"
+    patched = False
+    if 0 < k and rows:
+        # json: "[\n" + ",\n".join(items) + "\n]"   csv: header + "\n" + "\n".join(lines)
+        j_size = 2 + sum(jl) + 2 * (len(jl) - 1) + 2
+        j_keep = 2 + sum(jl[:k]) + 2 * (k - 1)
+        c_size = len(header) + sum(cl) + len(cl)
+        c_keep = len(header) + sum(cl[:k]) + k
+        j_tail = "".join(",\n" + s for s in items) + "\n]"
+        c_tail = "".join("\n" + s for s in lines)
+        patched = (_patch(jpath, 2, j_keep, j_tail, j_size) and
+                   _patch(cpath, len(header), c_keep, c_tail, c_size))
+    if not patched:
+        atomic_write(jpath, json.dumps(rows, indent=2))
+        atomic_write(cpath, "\n".join([header] + [_csv_line(r, price) for r in rows[:k]] + lines))
+    return published
+
+def build_history(max_days=730, hist_dir=HIST, data_dir=DATA, manifest_path=MANIFEST, archived=None,
+                  tiles_dir=None, asset=None):
+    """
+    Incrementally rebuild the risk history (last ~2 years); returns the published rows.
+    archived: {date: row} of days kept only in the snapshot archive (archive.Archive.rows());
+    a snapshot file for the same date wins. tiles_dir: also write the full-length history
+    pyramid there (pyramid.py). asset: symbol of the snapshots, names the price column.
+    """
+    price = price_field(asset)
+    m = _load_manifest(manifest_path)
+    parsed, changed = scan_snapshots(hist_dir, m["files"])
+    rows = [e["row"] for _, e in sorted(m["files"].items()) if e["row"] is not None]
+    if archived:
+        have = {r["date"] for r in rows}
+        rows = sorted(rows + [r for d, r in archived.items() if d not in have], key=lambda r: r["date"])
+    if tiles_dir is not None:
+        pyramid.write(rows, tiles_dir, rows[-1]["as_of_utc"] if rows else None, price)
+    rows = rows[-max_days:]
+    if not (data_dir / "risk_history.json").exists() or not (data_dir / "risk_history.csv").exists():
+        m["published"] = {"rows": [], "json_len": [], "csv_len": []}
+    published = write_outputs(rows, m["published"], data_dir, price)
+    if changed or published is not m["published"] or m.get("parsed_last_run") != parsed \
+            or not manifest_path.exists():
+        m["published"], m["parsed_last_run"] = published, parsed
+        atomic_write(manifest_path, json.dumps(m, separators=(",", ":")))
+    return rows
@@ -0,0 +1,228 @@
+# pipelines/http_client.py
+# HTTP helpers shared by the pipelines, with an on-disk response cache:
+#  - entries live under data/cache/http/, keyed by URL with secrets (FRED api_key…) removed
+#  - per-source TTLs; within TTL the network is not touched at all
+#  - past TTL we revalidate with If-None-Match / If-Modified-Since (304 → reuse body)
+#  - on network/HTTP errors a stale entry is served if it is within stale-if-error
+# Every call is traced (metrics.py): status, cache outcome, bytes, timings, parse time.
+# Network requests go through http_pool.py (per-host keep-alive connections, gzip), after
+# budget.py has checked the run deadline and the host's circuit breaker and set the timeout.
+import codecs, json, hashlib, pathlib, time, urllib.error, urllib.parse, sys, os, threading
+
+import budget
+import http_pool
+import metrics
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "data" / "cache" / "http"
+CACHE_ENABLED = os.environ.get("GG_HTTP_CACHE", "1") != "0"
+# Route every request to a stand-in (bench/standin.py) as <UPSTREAM>/<host><path>?<query>;
+# cache keys and logs keep the original URL.
+UPSTREAM = os.environ.get("GG_HTTP_UPSTREAM", "").rstrip("/")
+
+USER_AGENT = "gh-actions/1.0"
+SECRET_PARAMS = {"api_key", "apikey", "key", "token", "secret"}
+
+# host → (ttl_s, stale_if_error_s); first match on URL host suffix wins
+CACHE_RULES = {
+    "api.stlouisfed.org":  (6 * 3600,  7 * 86400),   # weekly/daily series
+    "farside.co.uk":       (3 * 3600,  3 * 86400),   # one new row per trading day
+    "api.blockchain.info": (6 * 3600,  3 * 86400),   # daily charts
+    "api.coingecko.com":   (3 * 3600,  2 * 86400),
+    "mempool.space":       (10 * 60,   6 * 3600),
+    "fapi.binance.com":    (5 * 60,    6 * 3600),
+    "www.okx.com":         (5 * 60,    6 * 3600),
+    "www.bitmex.com":      (5 * 60,    6 * 3600),
+    "api.bybit.com":       (5 * 60,    6 * 3600),
+    "deribit.com":         (5 * 60,    6 * 3600),
+    "api.coinbase.com":    (60,        3600),
+}
+DEFAULT_RULE = (0, 3600)
+
+def redact_url(url):
+    """URL with secret query params dropped (cache key + logs)."""
+    parts = urllib.parse.urlsplit(url)
+    q = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+         if k.lower() not in SECRET_PARAMS]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(q)))
+
+def _route(url):
+    if not UPSTREAM:
+        return url
+    p = urllib.parse.urlsplit(url)
+    return f"{UPSTREAM}/{p.netloc}{p.path}" + (f"?{p.query}" if p.query else "")
+
+def _open(url, headers, timeout):
+    """Pooled GET of url (routed); connections are bounded per original host."""
+    host = urllib.parse.urlsplit(url).hostname
+    budget.RUN.admit(host)
+    t = time.perf_counter()
+    try:
+        resp = http_pool.get(_route(url), headers=headers, bucket=host,
+                             timeout=budget.RUN.timeout_for(host, timeout))
+    except urllib.error.HTTPError as e:
+        budget.RUN.outcome(host, e.code == 304, time.perf_counter() - t)
+        raise
+    except (urllib.error.URLError, OSError):
+        budget.RUN.outcome(host, False)
+        raise
+    budget.RUN.outcome(host, True, time.perf_counter() - t)
+    return resp
+
+def cache_rule(url):
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    for h, rule in CACHE_RULES.items():
+        if host == h or host.endswith("." + h):
+            return rule
+    return DEFAULT_RULE
+
+def _paths(url):
+    key = hashlib.sha256(redact_url(url).encode("utf-8")).hexdigest()[:32]
+    return CACHE_DIR / f"{key}.json", CACHE_DIR / f"{key}.body"
+
+def _atomic_write(path, text):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+def _store(url, body, resp_headers, meta=None):
+    meta_p, body_p = _paths(url)
+    meta = dict(meta or {})
+    meta.update({"url": redact_url(url), "fetched_at": time.time()})
+    if resp_headers is not None:   # a 304 may omit validators: keep the old ones
+        meta["etag"] = resp_headers.get("ETag") or (meta.get("etag") if body is None else None)
+        meta["last_modified"] = resp_headers.get("Last-Modified") or (meta.get("last_modified") if body is None else None)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if body is not None:
+            _atomic_write(body_p, body)
+        _atomic_write(meta_p, json.dumps(meta))
+    except OSError as e:
+        print(f"[http] WARN cache write failed: {e}", file=sys.stderr)
+
+CHUNK = 64 * 1024
+
+def _iter_file(path, chunk_size):
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            buf = f.read(chunk_size)
+            if not buf:
+                return
+            yield buf
+
+def _iter_resp(resp, url, chunk_size, cache, sp):
+    """Decode resp incrementally; when cache=True tee the text into the cache body."""
+    dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    tmp = None
+    if cache:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = open(_paths(url)[1].with_name(f"{_paths(url)[1].name}.{os.getpid()}.{threading.get_ident()}.part"),
+                       "w", encoding="utf-8")
+        except OSError:
+            tmp = None
+    try:
+        while True:
+            raw = resp.read(chunk_size)
+            sp["bytes"] += len(raw); sp["net_bytes"] = resp.wire_bytes
+            text = dec.decode(raw, final=not raw)
+            if tmp and text:
+                tmp.write(text)
+            if text:
+                yield text
+            if not raw:
+                break
+        if tmp:
+            tmp.close()
+            os.replace(tmp.name, _paths(url)[1])
+            tmp = None
+            _store(url, None, resp.headers, {})
+    finally:
+        if tmp:
+            tmp.close()
+            try: os.unlink(tmp.name)
+            except OSError: pass
+
+def _from_disk(body_p, chunk_size, sp, cache, status):
+    sp.update(cache=cache, status=status)
+    try: sp["bytes"] += body_p.stat().st_size
+    except OSError: pass
+    return _iter_file(body_p, chunk_size)
+
+def http_stream(url, timeout=20, headers=None, ttl=None, chunk_size=CHUNK):
+    """
+    Generator of decoded text chunks for url, with the same caching as http_get:
+    fresh/revalidated/stale-on-error bodies stream from disk, network bodies are
+    streamed to the caller and written to the cache as they go.
+    """
+    # nest=False: a generator's body runs in its consumer's context
+    with metrics.span("http", redact_url(url), nest=False, bytes=0, net_bytes=0) as sp:
+        yield from _stream(url, timeout, headers, ttl, chunk_size, sp)
+
+def _stream(url, timeout, headers, ttl, chunk_size, sp):
+    t0 = time.perf_counter()
+    if headers is None:
+        headers = {"User-Agent": USER_AGENT}
+    if not CACHE_ENABLED:
+        with _open(url, headers, timeout) as resp:
+            sp.update(cache="off", status=resp.status, conn="reused" if resp.reused else "new",
+                      ttfb_ms=round((time.perf_counter() - t0) * 1000, 2))
+            yield from _iter_resp(resp, url, chunk_size, False, sp)
+        return
+
+    rule_ttl, stale_s = cache_rule(url)
+    ttl = rule_ttl if ttl is None else ttl
+    meta_p, body_p = _paths(url)
+    try:
+        meta = json.loads(meta_p.read_text()) if body_p.exists() else None
+    except Exception:
+        meta = None
+    age = time.time() - meta["fetched_at"] if meta else None
+    if meta and age <= ttl:
+        yield from _from_disk(body_p, chunk_size, sp, "fresh", 200)
+        return
+
+    hdrs = dict(headers)
+    if meta and meta.get("etag"):
+        hdrs["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        hdrs["If-Modified-Since"] = meta["last_modified"]
+    try:
+        resp = _open(url, hdrs, timeout)
+    except urllib.error.HTTPError as e:
+        sp["ttfb_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        if e.code == 304 and meta:
+            _store(url, None, e.headers, meta)   # body unchanged, refresh timestamp
+            yield from _from_disk(body_p, chunk_size, sp, "revalidated", 304)
+            return
+        if meta and age <= ttl + stale_s:
+            print(f"[http] WARN serving stale ({age/3600:.1f}h) after HTTP {e.code}: {redact_url(url)}", file=sys.stderr)
+            yield from _from_disk(body_p, chunk_size, sp, "stale", e.code)
+            return
+        sp.update(cache="miss", status=e.code)
+        raise
+    except (urllib.error.URLError, OSError) as e:
+        if meta and age <= ttl + stale_s:
+            print(f"[http] WARN serving stale ({age/3600:.1f}h) after {e}: {redact_url(url)}", file=sys.stderr)
+            yield from _from_disk(body_p, chunk_size, sp, "stale", "error")
+            return
+        sp.update(cache="miss", status="error")
+        raise
+    sp.update(cache="miss", status=resp.status, conn="reused" if resp.reused else "new",
+              ttfb_ms=round((time.perf_counter() - t0) * 1000, 2))
+    with resp:
+        yield from _iter_resp(resp, url, chunk_size, True, sp)
+
+def http_get(url, timeout=20, headers=None, ttl=None):
+    """GET url as text. ttl (seconds) overrides the per-source rule; ttl=0 forces revalidation."""
+    return "".join(http_stream(url, timeout=timeout, headers=headers, ttl=ttl))
+
+def http_json(url, timeout=20, headers=None, ttl=None):
+    text = http_get(url, timeout=timeout, headers=headers, ttl=ttl)
+    t = time.perf_counter()
+    try:
+        return json.loads(text)
+    finally:
+        sp = metrics.last_span()
+        if sp is not None and sp["kind"] == "http":
+            sp["parse_ms"] = round((time.perf_counter() - t) * 1000, 2)
@@ -0,0 +1,164 @@
+# pipelines/http_pool.py
+# Keep-alive connection pool behind http_client.py (replaces one urlopen, i.e. one TCP+TLS
+# handshake, per request):
+#  - per-host idle connections (LIFO), reused across requests and threads
+#  - at most POOL_SIZE connections per host in use at once (callers wait for a free slot);
+#    `bucket` lets a caller pool per logical upstream when several share one endpoint
+#    (http_client routing everything to a stand-in via GG_HTTP_UPSTREAM)
+#  - idle connections are dropped after IDLE_S; a reused connection the server already
+#    closed is retried once on a fresh one (GETs only, so the retry is safe)
+#  - Accept-Encoding: gzip, decoded transparently (Response.wire_bytes = bytes on the wire)
+#  - redirects followed (each hop through the pool of its own host)
+# Errors keep urllib's shape: non-2xx -> urllib.error.HTTPError (incl. 304), transport
+# failures -> urllib.error.URLError / OSError, so callers handle both clients the same way.
+import http.client, io, os, ssl, threading, time, urllib.error, urllib.parse, zlib
+
+POOL_SIZE = int(os.environ.get("GG_HTTP_POOL_SIZE", "4"))
+IDLE_S = 30.0
+MAX_REDIRECTS = 5
+REDIRECTS = {301, 302, 303, 307, 308}
+
+_ssl_ctx = None
+
+def _context():
+    global _ssl_ctx
+    if _ssl_ctx is None:
+        _ssl_ctx = ssl.create_default_context()
+    return _ssl_ctx
+
+class Response:
+    """Body reader over a pooled connection; close() hands the connection back (or drops it)."""
+
+    def __init__(self, pool, key, conn, resp, reused):
+        self.status, self.reason, self.headers = resp.status, resp.reason, resp.headers
+        self.reused, self.wire_bytes = reused, 0
+        self._pool, self._key, self._conn, self._r = pool, key, conn, resp
+        gz = (resp.headers.get("Content-Encoding") or "").lower() in ("gzip", "x-gzip")
+        self._dec = zlib.decompressobj(16 + zlib.MAX_WBITS) if gz else None
+
+    def read(self, n=-1):
+        """Up to n decoded bytes (b"" at end of body)."""
+        while True:
+            raw = self._r.read() if n is None or n < 0 else self._r.read(n)
+            self.wire_bytes += len(raw)
+            if self._dec is None:
+                return raw
+            if n is None or n < 0:
+                return self._dec.decompress(raw) + self._dec.flush()
+            if not raw:
+                return self._dec.flush()
+            out = self._dec.decompress(raw)
+            if out:
+                return out
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        reusable = self._r.isclosed() and not self._r.will_close   # body fully consumed
+        if not reusable:
+            self._r.close()
+        self._pool.release(self._key, conn, reusable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Pool:
+    def __init__(self, size=POOL_SIZE, idle_s=IDLE_S):
+        self.size, self.idle_s = size, idle_s
+        self._lock = threading.Lock()
+        self._idle = {}     # (bucket, scheme, host, port) -> [(conn, last_used), ...]
+        self._slots = {}    # (bucket, scheme, host, port) -> BoundedSemaphore(size)
+        self.stats = {"new": 0, "reused": 0}
+
+    def _slot(self, key):
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.size)
+            return self._slots[key]
+
+    def _checkout(self, key, timeout):
+        """-> (conn, reused). Caller already holds a slot for key."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, used = idle.pop()
+                if now - used <= self.idle_s and conn.sock is not None:
+                    self.stats["reused"] += 1
+                    conn.timeout = timeout
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+            self.stats["new"] += 1
+        _, scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=_context()), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def release(self, key, conn, reusable):
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.size:
+                    idle.append((conn, time.monotonic()))
+                    conn = None
+        if conn is not None:
+            conn.close()
+        self._slot(key).release()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    def _send(self, key, target, headers, timeout):
+        """One request on a pooled connection -> Response (slot held until it is closed)."""
+        slot = self._slot(key)
+        if not slot.acquire(timeout=timeout):
+            raise urllib.error.URLError(f"no free connection to {key[2]} within {timeout}s")
+        for attempt in (0, 1):
+            conn, reused = self._checkout(key, timeout)
+            try:
+                conn.request("GET", target, headers=headers)
+                return Response(self, key, conn, conn.getresponse(), reused)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if reused and attempt == 0:    # server dropped an idle keep-alive: retry fresh
+                    continue
+                slot.release()
+                raise urllib.error.URLError(e)
+            except http.client.HTTPException as e:
+                conn.close(); slot.release()
+                raise urllib.error.URLError(e)
+            except BaseException:
+                conn.close(); slot.release()
+                raise
+
+    def get(self, url, headers=None, timeout=20, bucket=None):
+        """GET url -> Response (2xx). Non-2xx raise urllib.error.HTTPError like urlopen."""
+        hdrs = {"Accept-Encoding": "gzip", **(headers or {})}
+        for _ in range(MAX_REDIRECTS + 1):
+            p = urllib.parse.urlsplit(url)
+            key = (bucket or p.hostname, p.scheme, p.hostname, p.port or (443 if p.scheme == "https" else 80))
+            target = (p.path or "/") + (f"?{p.query}" if p.query else "")
+            resp = self._send(key, target, hdrs, timeout)
+            if 200 <= resp.status < 300:
+                return resp
+            body = resp.read()          # drain so the connection can be reused
+            resp.close()
+            if resp.status in REDIRECTS and resp.headers.get("Location"):
+                url, bucket = urllib.parse.urljoin(url, resp.headers["Location"]), None
+                continue
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(body))
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+POOL = Pool()
+
+def get(url, headers=None, timeout=20, bucket=None):
+    return POOL.get(url, headers=headers, timeout=timeout, bucket=bucket)
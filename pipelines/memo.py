@@ -0,0 +1,107 @@
+# pipelines/memo.py
+# Stage memo for the engine's pure stages (normalize + score per driver, blend, outputs).
+# Each entry is keyed by a content hash of the stage's inputs, its config and the engine code
+# (code_version(): any edit to the scoring modules invalidates every entry). A hit returns a
+# fresh copy of the stored result instead of recomputing it; a miss computes and stores it.
+# Results must be JSON values; fallback results (a "fallback" key: random/neutral placeholders)
+# are never stored. Entries live in data/cache/stage_memo.json (git-ignored, restored with the
+# HTTP cache); a lost file only means one run recomputes everything.
+import dataclasses, datetime, hashlib, json, pathlib, sys, threading
+
+import metrics
+from outputs import atomic_write
+
+HERE = pathlib.Path(__file__).resolve().parent
+CODE_FILES = ("engine.py", "model.py", "rolling.py", "history.py", "pyramid.py", "outputs.py")
+
+def _default(o):
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if isinstance(o, (datetime.date, datetime.datetime)):
+        return o.isoformat()
+    return str(o)
+
+def digest(*parts):
+    """Stable hash of JSON-able parts (dates, dataclass configs and tuples included)."""
+    body = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=_default)
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+_code_version = None
+
+def code_version():
+    global _code_version
+    if _code_version is None:
+        h = hashlib.sha1()
+        for name in CODE_FILES:
+            try:
+                h.update((HERE / name).read_bytes())
+            except OSError:
+                pass
+        _code_version = h.hexdigest()[:12]
+    return _code_version
+
+class StageMemo:
+    """stage name -> {"key": input hash, "value": result}; one entry per stage (the last run's)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.path = None
+        self.entries = {}
+        self.dirty = False
+
+    def load(self, data_dir):
+        path = pathlib.Path(data_dir) / "cache" / "stage_memo.json"
+        with self._lock:
+            if path == self.path:
+                return
+            try:
+                doc = json.loads(path.read_text())
+                entries = doc.get("stages", {}) if doc.get("code") == code_version() else {}
+            except Exception:
+                entries = {}
+            self.path, self.entries, self.dirty = path, entries, False
+
+    def get(self, stage, key):
+        """Copy of the stored result if stage was last computed from `key`, else None."""
+        with self._lock:
+            e = self.entries.get(stage)
+            hit = e is not None and e["key"] == key
+        metrics.count("memo", stage=stage.split(":")[0], result="hit" if hit else "miss")
+        return json.loads(json.dumps(e["value"])) if hit else None
+
+    def put(self, stage, key, value):
+        if isinstance(value, dict) and value.get("fallback"):
+            return
+        with self._lock:
+            self.entries[stage] = {"key": key, "value": json.loads(json.dumps(value))}
+            self.dirty = True
+
+    def cached(self, stage, inputs, fn):
+        """fn() memoized on digest(inputs); without a loaded store it just calls fn."""
+        if self.path is None:
+            return fn()
+        key = digest(code_version(), inputs)
+        value = self.get(stage, key)
+        if value is None:
+            value = fn()
+            if value is not None:
+                self.put(stage, key, value)
+        return value
+
+    def reset(self):
+        with self._lock:
+            self.path, self.entries, self.dirty = None, {}, False
+
+    def save(self):
+        with self._lock:
+            if self.path is None or not self.dirty:
+                return
+            doc = {"code": code_version(), "stages": dict(sorted(self.entries.items()))}
+            self.dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.path, json.dumps(doc, separators=(",", ":")))
+        except OSError as e:
+            print(f"[memo] WARN stage memo not saved: {e}", file=sys.stderr)
+
+MEMO = StageMemo()
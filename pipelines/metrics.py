@@ -0,0 +1,168 @@
+# pipelines/metrics.py
+# Lightweight run tracing. Spans are plain dicts collected by one process-wide Recorder:
+#  - kind "http": one per http_stream call (redacted URL, status, cache outcome, new/reused
+#    connection, body and wire bytes, time to headers, total time, JSON parse time)
+#  - kind "stage": @traced fetch/compute functions, with any annotate()d attributes
+#    (winning provider, fallback path…)
+# Parent links follow contextvars, and fetch_parallel/hedged_first copy the context into
+# their threads, so a request is attributed to the stage that issued it. count() keeps
+# labelled counters (fallbacks, provider wins).
+#
+# write() produces data/run_metrics.json (full detail) and data/run_metrics.prom (Prometheus
+# textfile-collector format, per-source aggregates) for tracking latency per source over time.
+import collections, contextlib, contextvars, functools, itertools, json, threading, time, urllib.parse
+
+from outputs import atomic_write
+
+_current = contextvars.ContextVar("gg_span", default=None)
+_local = threading.local()
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.t0 = time.perf_counter()
+            self.spans = []
+            self.counters = collections.Counter()
+            self._ids = itertools.count(1)
+
+    def next_id(self):
+        return next(self._ids)
+
+    def add(self, sp):
+        with self._lock:
+            self.spans.append(sp)
+
+    def count(self, name, n=1, **labels):
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += n
+
+RUN = Recorder()
+
+@contextlib.contextmanager
+def span(kind, name, nest=True, **attrs):
+    """
+    Time a block -> the span dict (callers may add fields). nest=False doesn't make it the
+    parent of spans opened inside (used by generators, whose body runs in the caller's context).
+    """
+    parent = _current.get()
+    sp = {"id": RUN.next_id(), "kind": kind, "name": name,
+          "parent": parent["id"] if parent else None,
+          "thread": threading.current_thread().name,
+          "start_ms": round((time.perf_counter() - RUN.t0) * 1000, 2), **attrs}
+    tok = _current.set(sp) if nest else None
+    t = time.perf_counter()
+    try:
+        yield sp
+    except BaseException as e:
+        sp["error"] = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        sp["ms"] = round((time.perf_counter() - t) * 1000, 2)
+        if tok is not None:
+            _current.reset(tok)
+        RUN.add(sp)
+        _local.last = sp
+
+def traced(fn):
+    """Decorator: run fn inside a "stage" span named after it."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span("stage", fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+def annotate(**attrs):
+    """Add attributes to the innermost open span of this context (no-op outside one)."""
+    sp = _current.get()
+    if sp is not None:
+        sp.update(attrs)
+
+def last_span():
+    """Most recently closed span on this thread (e.g. the request http_json just parsed)."""
+    return getattr(_local, "last", None)
+
+def count(name, n=1, **labels):
+    RUN.count(name, n, **labels)
+
+def run_in_context(fn):
+    """fn bound to a copy of the caller's context, for handing to another thread."""
+    ctx = contextvars.copy_context()
+    return lambda *a, **k: ctx.run(fn, *a, **k)
+
+# ---- reports ----
+def summary(rec=RUN):
+    with rec._lock:
+        spans = sorted(rec.spans, key=lambda s: s["start_ms"])
+        counters = dict(rec.counters)
+    http = [s for s in spans if s["kind"] == "http"]
+    cache = collections.Counter(s.get("cache", "?") for s in http)
+    return {
+        "started_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(rec.started)),
+        "started_unix": round(rec.started, 3),
+        "duration_s": round(time.perf_counter() - rec.t0, 3),
+        "http": {
+            "requests": len(http),
+            "errors": sum(1 for s in http if s.get("error")),
+            "bytes": sum(s.get("bytes", 0) for s in http),
+            "network_bytes": sum(s.get("net_bytes", 0) for s in http),
+            "by_cache": dict(cache),
+            "connections": dict(collections.Counter(s["conn"] for s in http if "conn" in s)),
+            "slowest": [{"url": s["name"], "ms": s["ms"]} for s in sorted(http, key=lambda s: -s["ms"])[:5]],
+        },
+        "stages": [s for s in spans if s["kind"] != "http"],
+        "requests": http,
+        "counters": [{"name": n, **dict(l), "value": v} for (n, l), v in sorted(counters.items())],
+    }
+
+def _esc(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def _labels(d):
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in d.items()) + "}" if d else ""
+
+def prometheus(doc, prefix="grayghost"):
+    """summary() -> Prometheus text exposition (gauges of the last run)."""
+    out = []
+    def metric(name, help_, rows):
+        out.append(f"# HELP {prefix}_{name} {help_}")
+        out.append(f"# TYPE {prefix}_{name} gauge")
+        out.extend(f"{prefix}_{name}{_labels(lbl)} {float(val)!r}" for lbl, val in rows)
+
+    metric("run_duration_seconds", "Wall-clock duration of the last run.", [({}, doc["duration_s"])])
+    metric("run_timestamp_seconds", "Start of the last run (unix time).", [({}, doc["started_unix"])])
+
+    agg = collections.defaultdict(lambda: [0, 0.0, 0, 0.0])   # count, seconds, bytes, parse s
+    for s in doc["requests"]:
+        u = urllib.parse.urlsplit(s["name"])
+        key = (u.hostname or "", u.path, str(s.get("status", "error")), s.get("cache", "?"))
+        a = agg[key]
+        a[0] += 1; a[1] += s["ms"] / 1000; a[2] += s.get("bytes", 0); a[3] += s.get("parse_ms", 0) / 1000
+    lbl = lambda k: {"host": k[0], "path": k[1], "status": k[2], "cache": k[3]}
+    metric("http_requests", "Requests in the last run by source and outcome.", [(lbl(k), a[0]) for k, a in sorted(agg.items())])
+    metric("http_request_seconds", "Total request time (incl. streaming) in the last run.", [(lbl(k), a[1]) for k, a in sorted(agg.items())])
+    metric("http_response_bytes", "Body bytes delivered in the last run.", [(lbl(k), a[2]) for k, a in sorted(agg.items())])
+    metric("http_parse_seconds", "JSON parse time in the last run.", [(lbl(k), a[3]) for k, a in sorted(agg.items())])
+
+    stages = collections.defaultdict(float)
+    for s in doc["stages"]:
+        stages[s["name"]] += s["ms"] / 1000
+    metric("stage_seconds", "Time spent in each traced stage in the last run.", [({"stage": k}, v) for k, v in sorted(stages.items())])
+
+    byname = collections.defaultdict(list)
+    for c in doc["counters"]:
+        byname[c["name"]].append(({k: v for k, v in c.items() if k not in ("name", "value")}, c["value"]))
+    for name, rows in sorted(byname.items()):
+        metric(f"{name}_total", f"{name} events in the last run.", rows)
+    return "\n".join(out) + "\n"
+
+def write(data_dir, rec=RUN):
+    """data/run_metrics.json + data/run_metrics.prom (atomic) -> summary dict."""
+    doc = summary(rec)
+    atomic_write(data_dir / "run_metrics.json", json.dumps(doc, indent=2))
+    atomic_write(data_dir / "run_metrics.prom", prometheus(doc))
+    return doc
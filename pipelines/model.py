@@ -0,0 +1,89 @@
+# pipelines/model.py
+# Risk model constants and scoring math shared by the daily run and the offline
+# tools (replay, sweep). Stdlib only, no side effects on import.
+# The module constants are the defaults; engine.py takes a RiskConfig built from them.
+import dataclasses, math
+
+# ====== CONFIG ======
+WEEKLY_MODE   = True          # A) daily runs, slower-moving risk
+SMOOTH_DAYS   = 21 if WEEKLY_MODE else 7
+EMA_KEEP      = 0.85 if WEEKLY_MODE else 0.60    # risk = KEEP*prev + (1-KEEP)*instant
+# Driver weights (sum ~1)
+WEIGHTS_WEEKLY = {
+    "etf_flows":     0.22,
+    "net_liquidity": 0.30,
+    "stablecoins":   0.22,
+    "term_structure":0.12,
+    "onchain":       0.14,
+}
+WEIGHTS_DAILY = {
+    "etf_flows":     0.24,
+    "net_liquidity": 0.26,
+    "stablecoins":   0.22,
+    "term_structure":0.16,
+    "onchain":       0.12,
+}
+WEIGHTS = WEIGHTS_WEEKLY if WEEKLY_MODE else WEIGHTS_DAILY
+DRIVERS = tuple(WEIGHTS_WEEKLY)
+
+# Sigmoid scales: signal / scale → score. Sign is "more → lower risk" except term structure.
+SCALES = {
+    "etf_flows":     200_000_000.0,      # window-avg daily net flow, USD
+    "stablecoins":   1_000_000_000.0,    # window-avg daily issuance, USD
+    "net_liquidity": 100_000_000_000.0,  # window-avg daily Δ net liquidity, USD
+    "onchain":       0.5,                # blended deviation vs 180d baseline
+}
+FUNDING_NEUTRAL_ANN_PCT = 10.0   # 10% ann ~ neutral
+FUNDING_SCALE_ANN_PCT   = 10.0
+PREMIUM_SCALE_PCT       = 0.20   # +0.20% premium ~ riskier
+
+# Bands / regime
+BAND_GREEN_BELOW = 0.25
+BAND_RED_ABOVE   = 0.60
+REGIME_NETLIQ_ON_BELOW = 0.5
+
+def clamp(x, lo=0.0, hi=1.0): return max(lo, min(hi, x))
+
+def sigmoid(x):
+    try: return 1.0 / (1.0 + math.exp(-x))
+    except OverflowError: return 0.0 if x < 0 else 1.0
+
+def band_for(risk, green_below=BAND_GREEN_BELOW, red_above=BAND_RED_ABOVE):
+    return "green" if risk < green_below else ("red" if risk > red_above else "yellow")
+
+def regime_for(net_liquidity_score, on_below=REGIME_NETLIQ_ON_BELOW):
+    return "liquidity_on" if net_liquidity_score < on_below else "liquidity_off"
+
+@dataclasses.dataclass(frozen=True)
+class RiskConfig:
+    """Model parameters for one engine run. RiskConfig() = the module defaults above."""
+    weekly_mode: bool = WEEKLY_MODE
+    smooth_days: int = SMOOTH_DAYS
+    ema_keep: float = EMA_KEEP
+    weights: dict = dataclasses.field(default_factory=lambda: dict(WEIGHTS))
+    scales: dict = dataclasses.field(default_factory=lambda: dict(SCALES))
+    funding_neutral_ann_pct: float = FUNDING_NEUTRAL_ANN_PCT
+    funding_scale_ann_pct: float = FUNDING_SCALE_ANN_PCT
+    premium_scale_pct: float = PREMIUM_SCALE_PCT
+    band_green_below: float = BAND_GREEN_BELOW
+    band_red_above: float = BAND_RED_ABOVE
+    regime_netliq_on_below: float = REGIME_NETLIQ_ON_BELOW
+
+    @classmethod
+    def for_mode(cls, weekly=True, **overrides):
+        """Weekly (slow) or daily preset; keyword overrides win."""
+        base = dict(weekly_mode=weekly,
+                    smooth_days=21 if weekly else 7,
+                    ema_keep=0.85 if weekly else 0.60,
+                    weights=dict(WEIGHTS_WEEKLY if weekly else WEIGHTS_DAILY))
+        return cls(**{**base, **overrides})
+
+    @property
+    def term_contrib_scale(self):
+        return 0.18 if self.weekly_mode else 0.2
+
+    def band(self, risk):
+        return band_for(risk, self.band_green_below, self.band_red_above)
+
+    def regime(self, net_liquidity_score):
+        return regime_for(net_liquidity_score, self.regime_netliq_on_below)
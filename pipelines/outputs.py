@@ -0,0 +1,83 @@
+# pipelines/outputs.py
+# Output stage helpers: every file is written to a temp sibling and renamed into place, so
+# a reader (the dashboard, serve.py, git) never sees a half-written file. Published
+# documents also get compact siblings for consumers that don't need indentation:
+#
+#   latest.json              pretty (contract, unchanged)
+#   latest.min.json          minified
+#   latest.min.json.gz/.br   precompressed (brotli only if installed), for static hosts
+#   risk_history.columns.json  {"date": [...], "risk": [...], ...}  parallel arrays for the chart
+#
+# gzip output is byte-stable (mtime=0), so an unchanged document yields an unchanged file, and
+# write_if_changed()/write_encoded() leave files that already hold the same bytes untouched.
+import gzip, json, os, pathlib
+
+try:
+    import brotli
+except ImportError:   # optional: .br siblings are skipped
+    brotli = None
+
+def atomic_write(path, data):
+    """Write bytes/str to path via temp file + rename (same directory, so the rename is atomic)."""
+    path = pathlib.Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try: tmp.unlink()
+        except OSError: pass
+        raise
+
+def write_if_changed(path, data):
+    """atomic_write unless path already holds exactly these bytes -> True if written."""
+    path = pathlib.Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    atomic_write(path, data)
+    return True
+
+def minify(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+def write_encoded(path, body):
+    """
+    body bytes -> path, path.gz and (with brotli) path.br; returns {file name: size}.
+    An unchanged body with its siblings in place is left alone (nothing compressed or written).
+    """
+    path = pathlib.Path(path)
+    out = {path.name: len(body)}
+    sibs = [path.with_name(path.name + ext) for ext in (".gz", ".br" if brotli is not None else None) if ext]
+    if not write_if_changed(path, body) and all(p.exists() for p in sibs):
+        out.update({p.name: p.stat().st_size for p in sibs})
+        return out
+    gz = gzip.compress(body, 9, mtime=0)
+    atomic_write(path.with_name(path.name + ".gz"), gz)
+    out[path.name + ".gz"] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(body, quality=11)
+        atomic_write(path.with_name(path.name + ".br"), br)
+        out[path.name + ".br"] = len(br)
+    return out
+
+def write_compact(path, obj):
+    """<name>.json -> <name>.min.json + .gz (+ .br)."""
+    path = pathlib.Path(path)
+    return write_encoded(path.with_name(path.stem + ".min.json"), minify(obj).encode("utf-8"))
+
+def history_columns(rows, fields=("date", "risk", "band", "btc_price_usd", "as_of_utc")):
+    """[{date, risk, ...}] -> {field: [values...]} (parallel arrays, date order)."""
+    return {f: [r.get(f) for r in rows] for f in fields}
+
+def write_history_columns(rows, data_dir, price="btc_price_usd"):
+    """risk_history.columns.json (already minified) + .gz (+ .br); price: the price column's name."""
+    body = minify(history_columns(rows, ("date", "risk", "band", price, "as_of_utc"))).encode("utf-8")
+    return write_encoded(pathlib.Path(data_dir) / "risk_history.columns.json", body)
@@ -0,0 +1,95 @@
+# pipelines/pyramid.py
+# Multi-resolution risk history for the dashboard, under data/history_tiles/:
+#
+#   index.json         what exists: levels, tile files, date spans, row counts, content hashes
+#   monthly.json       one row per calendar month   } rollups: days, risk min/max/mean,
+#   weekly.json        one row per ISO week         } dominant band, last BTC price
+#   daily-<YYYY>.json  every day of one year (same columns as risk_history.columns.json)
+#
+# All files are columnar ({field: [values...]}), minified, with .gz (+ .br) siblings. The chart
+# draws the weekly overview first and fetches daily tiles as it needs them; `v` in the index is
+# the tile's content hash, so clients can cache a tile until it changes. A run only rewrites
+# files whose bytes changed (normally the current year's tile and the latest week/month); the
+# index's as_of_utc is only restamped along with a tile.
+import collections, datetime, hashlib, json, pathlib
+
+from outputs import minify, write_encoded
+
+INDEX_VERSION = 1
+# {price}: the asset's price column (history.price_field)
+DAILY_FIELDS = ("date", "risk", "band", "{price}", "as_of_utc")
+ROLLUP_FIELDS = ("period", "start", "end", "days", "risk_min", "risk_max", "risk_mean", "band",
+                 "{price}")
+
+def _fields(fields, price):
+    return tuple(f.format(price=price) for f in fields)
+
+def _week(d):
+    y, w, _ = datetime.date.fromisoformat(d).isocalendar()
+    return f"{y}-W{w:02d}"
+
+PERIODS = {"weekly": _week, "monthly": lambda d: d[:7]}
+
+def rollup(rows, period_of, price="btc_price_usd"):
+    """Date-ordered rows -> one aggregate per period (columnar)."""
+    groups = collections.OrderedDict()
+    for r in rows:
+        groups.setdefault(period_of(r["date"]), []).append(r)
+    out = {f: [] for f in _fields(ROLLUP_FIELDS, price)}
+    for period, rs in groups.items():
+        risks = [r["risk"] for r in rs]
+        bands = collections.Counter(r.get("band") for r in rs if r.get("band"))
+        # dominant band; ties go to the band seen last in the period
+        band = max(bands, key=lambda b: (bands[b], max(i for i, r in enumerate(rs) if r.get("band") == b)),
+                   default=None)
+        prices = [r.get(price) for r in rs if r.get(price) is not None]
+        for f, v in (("period", period), ("start", rs[0]["date"]), ("end", rs[-1]["date"]),
+                     ("days", len(rs)), ("risk_min", round(min(risks), 4)), ("risk_max", round(max(risks), 4)),
+                     ("risk_mean", round(sum(risks) / len(risks), 4)), ("band", band),
+                     (price, prices[-1] if prices else None)):
+            out[f].append(v)
+    return out
+
+def _write_if_changed(path, body):
+    """-> entry for the index; the file (+ .gz/.br) is rewritten only when its bytes differ."""
+    try:
+        same = path.read_bytes() == body
+    except OSError:
+        same = False
+    if not same:
+        write_encoded(path, body)
+    return {"file": path.name, "bytes": len(body), "v": hashlib.sha1(body).hexdigest()[:12]}
+
+def write(rows, out_dir, as_of_utc=None, price="btc_price_usd"):
+    """Every stored row (date order) -> tiles + index.json in out_dir; returns the index."""
+    daily_fields, rollup_fields = _fields(DAILY_FIELDS, price), _fields(ROLLUP_FIELDS, price)
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index = {"version": INDEX_VERSION, "as_of_utc": as_of_utc,
+             "from": rows[0]["date"] if rows else None, "to": rows[-1]["date"] if rows else None,
+             "levels": {}}
+    for level, period_of in reversed(PERIODS.items()):       # coarsest first
+        cols = rollup(rows, period_of, price)
+        ent = _write_if_changed(out_dir / f"{level}.json", minify(cols).encode("utf-8"))
+        index["levels"][level] = {**ent, "rows": len(cols["period"]), "fields": list(rollup_fields)}
+    years = collections.OrderedDict()
+    for r in rows:
+        years.setdefault(r["date"][:4], []).append(r)
+    tiles = []
+    for year, rs in years.items():
+        body = minify({f: [r.get(f) for r in rs] for f in daily_fields}).encode("utf-8")
+        ent = _write_if_changed(out_dir / f"daily-{year}.json", body)
+        tiles.append({**ent, "year": int(year), "from": rs[0]["date"], "to": rs[-1]["date"], "rows": len(rs)})
+    index["levels"]["daily"] = {"fields": list(daily_fields), "tiles": tiles}
+    for p in out_dir.glob("daily-*.json*"):            # years that no longer have rows
+        if p.name.split(".")[0][len("daily-"):] not in years:
+            p.unlink()
+    # as_of_utc alone doesn't restamp the index: it stays that of the run that changed a tile
+    try:
+        old = json.loads((out_dir / "index.json").read_text())
+    except Exception:
+        old = None
+    if isinstance(old, dict) and dict(old, as_of_utc=None) == dict(index, as_of_utc=None):
+        return old
+    _write_if_changed(out_dir / "index.json", json.dumps(index, indent=1).encode("utf-8"))
+    return index
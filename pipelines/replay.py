@@ -0,0 +1,167 @@
+# pipelines/replay.py
+# Vectorized historical replay: recompute the whole risk series from stored driver
+# scores (or re-score the stored raw inputs) in one numpy pass — WEIGHTS blend, EMA_KEEP
+# recursion, clamp, bands and regime — then report band flips and forward BTC returns
+# by band. Inputs come from data/drivers.parquet, or the snapshots when polars is absent.
+#
+#   python pipelines/replay.py                         # current model vs recorded risk
+#   python pipelines/replay.py --keep 0.7 --weights daily --rescore --json out.json
+import argparse, json, math
+
+import numpy as np
+
+import driver_store
+import model
+
+BANDS = np.array(["green", "yellow", "red"])
+FWD_HORIZONS = (7, 30, 90)
+
+RAW_COLUMNS = (
+    "etf_flows__sma7_usd", "stablecoins__sma7_delta_usd", "net_liquidity__sma7_delta_usd",
+    "term_structure__funding_ann_pct", "term_structure__perp_premium_7d_pct",
+)
+
+def _arr(vals):
+    return np.array([np.nan if v is None else float(v) for v in vals], dtype=float)
+
+def load_inputs(since=None, until=None):
+    """-> dates (datetime64[D]), scores (T×D in model.DRIVERS order), raw {col: (T,)}, price, risk."""
+    cols = [f"{d}__score" for d in model.DRIVERS] + list(RAW_COLUMNS) + ["btc_price_usd", "risk"]
+    c = driver_store.read_columns(cols, since, until)
+    dates = np.array([np.datetime64(d, "D") for d in c["date"]], dtype="datetime64[D]")
+    scores = np.stack([_arr(c[f"{d}__score"]) for d in model.DRIVERS], axis=1) if len(dates) \
+        else np.zeros((0, len(model.DRIVERS)))
+    raw = {k: _arr(c[k]) for k in RAW_COLUMNS}
+    return dates, scores, raw, _arr(c["btc_price_usd"]), _arr(c["risk"])
+
+def sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -500, 500)))
+
+def rescore(scores, raw, scales=None):
+    """Recompute scores from stored raw inputs with `scales`; drivers without raw inputs keep theirs."""
+    sc = dict(model.SCALES, **(scales or {}))
+    out = scores.copy()
+    idx = {d: i for i, d in enumerate(model.DRIVERS)}
+    for drv, col in (("etf_flows", "etf_flows__sma7_usd"),
+                     ("stablecoins", "stablecoins__sma7_delta_usd"),
+                     ("net_liquidity", "net_liquidity__sma7_delta_usd")):
+        x = raw[col]
+        out[:, idx[drv]] = np.where(np.isnan(x), out[:, idx[drv]], sigmoid(-x / sc[drv]))
+    f, p = raw["term_structure__funding_ann_pct"], raw["term_structure__perp_premium_7d_pct"]
+    parts = np.stack([sigmoid((f - model.FUNDING_NEUTRAL_ANN_PCT) / model.FUNDING_SCALE_ANN_PCT),
+                      sigmoid(p / model.PREMIUM_SCALE_PCT)])
+    ts = np.nanmean(np.where(np.isnan(np.stack([f, p])), np.nan, parts), axis=0) \
+        if len(f) else np.zeros(0)
+    out[:, idx["term_structure"]] = np.where(np.isnan(ts), out[:, idx["term_structure"]], ts)
+    return out
+
+def ema(x, keep, init=None, block=128):
+    """
+    r[t] = keep*r[t-1] + (1-keep)*x[t] along the last axis, r[0] = x[0] (or from `init`).
+    `keep` broadcasts against x.shape[:-1], so one call evaluates many EMA settings.
+    Closed form per block (r = k^(j+1) * (prev + (1-k) * cumsum(x / k^(i+1)))), so there is
+    no Python loop over days; blocks keep k^-j inside float range.
+    """
+    x = np.asarray(x, dtype=float)
+    raw = np.asarray(keep, dtype=float)[..., None]
+    k = np.clip(raw, 1e-3, 1.0)     # the closed form divides by k; keep == 0 is handled below
+    shape = np.broadcast_shapes(x.shape, k.shape)
+    x = np.broadcast_to(x, shape)
+    out = np.empty(shape)
+    if shape[-1] == 0:
+        return out
+    if init is None:
+        prev, start = x[..., 0].copy(), 1
+        out[..., 0] = prev
+    else:
+        prev, start = np.broadcast_to(np.asarray(init, dtype=float), shape[:-1]).copy(), 0
+    block = max(1, min(block, int(300 / max(1e-9, -math.log10(float(k.min()))))))
+    for s in range(start, shape[-1], block):
+        xb = x[..., s:s + block]
+        p = k ** np.arange(1, xb.shape[-1] + 1)
+        rb = p * (prev[..., None] + (1.0 - k) * np.cumsum(xb / p, axis=-1))
+        out[..., s:s + xb.shape[-1]] = rb
+        prev = rb[..., -1]
+    return np.where(raw == 0, x, out) if (raw == 0).any() else out   # keep == 0: r = x, as the engine
+
+def blend(scores, weights=None, keep=None, init=None):
+    """
+    scores T×D (NaN → 0.5, as get_score() does live) -> (inst, risk).
+    weights: dict (default model.WEIGHTS) or a W×D array, giving W×T outputs.
+    """
+    if weights is None or isinstance(weights, dict):
+        w = np.array([(weights or model.WEIGHTS)[d] for d in model.DRIVERS])
+    else:
+        w = np.asarray(weights, dtype=float)
+    s = np.where(np.isnan(scores), 0.5, scores)
+    inst = (s @ w.T).T
+    risk = ema(inst, model.EMA_KEEP if keep is None else keep, init)
+    # weights are a convex combination, so clamping after the recursion equals clamping each step
+    return inst, np.clip(risk, 0.0, 1.0)
+
+def bands(risk):
+    return BANDS[np.where(risk < model.BAND_GREEN_BELOW, 0, np.where(risk > model.BAND_RED_ABOVE, 2, 1))]
+
+def band_flips(dates, band):
+    i = np.flatnonzero(band[1:] != band[:-1]) + 1
+    return [{"date": str(dates[j]), "from": str(band[j - 1]), "to": str(band[j])} for j in i]
+
+def forward_returns(dates, price, band, horizons=FWD_HORIZONS):
+    """Mean/median forward BTC return per band, matching each date to the price h calendar days later."""
+    out = {}
+    order = np.argsort(dates)
+    dd, pp = dates[order], price[order]
+    for h in horizons:
+        tgt = dates + np.timedelta64(h, "D")
+        fwd = np.full(len(dates), np.nan)
+        if len(dd):
+            j = np.clip(np.searchsorted(dd, tgt), 0, len(dd) - 1)
+            fwd = np.where(dd[j] == tgt, pp[j] / price - 1.0, np.nan)
+        out[f"{h}d"] = {}
+        for b in BANDS:
+            v = fwd[(band == b) & np.isfinite(fwd)]
+            out[f"{h}d"][str(b)] = {"n": int(v.size),
+                                    "mean_pct": round(float(v.mean()) * 100, 2) if v.size else None,
+                                    "median_pct": round(float(np.median(v)) * 100, 2) if v.size else None}
+    return out
+
+def replay(weights=None, keep=None, rescore_raw=False, scales=None, since=None, until=None):
+    dates, scores, raw, price, recorded = load_inputs(since, until)
+    if rescore_raw:
+        scores = rescore(scores, raw, scales)
+    inst, risk = blend(scores, weights, keep)
+    band = bands(risk)
+    regime = np.where(np.nan_to_num(scores[:, model.DRIVERS.index("net_liquidity")], nan=0.5)
+                      < model.REGIME_NETLIQ_ON_BELOW, "liquidity_on", "liquidity_off")
+    ok = np.isfinite(recorded)
+    return {
+        "rows": len(dates),
+        "from": str(dates[0]) if len(dates) else None,
+        "to": str(dates[-1]) if len(dates) else None,
+        "mae_vs_recorded": round(float(np.abs(risk[ok] - recorded[ok]).mean()), 4) if ok.any() else None,
+        "band_days": {str(b): int((band == b).sum()) for b in BANDS},
+        "band_flips": band_flips(dates, band),
+        "forward_returns": forward_returns(dates, price, band),
+        "series": [{"date": str(d), "inst": round(float(i), 4), "risk": round(float(r), 4),
+                    "band": str(b), "regime": str(g)}
+                   for d, i, r, b, g in zip(dates, inst, risk, band, regime)],
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Vectorized replay of the risk model over stored history")
+    ap.add_argument("--weights", choices=["weekly", "daily"], help="weight set (default: model.WEIGHTS)")
+    ap.add_argument("--keep", type=float, help="EMA keep (default: model.EMA_KEEP)")
+    ap.add_argument("--rescore", action="store_true", help="re-score drivers from stored raw inputs")
+    ap.add_argument("--since"); ap.add_argument("--until")
+    ap.add_argument("--json", help="write the full result (incl. series) here")
+    a = ap.parse_args(argv)
+    w = {"weekly": model.WEIGHTS_WEEKLY, "daily": model.WEIGHTS_DAILY}.get(a.weights)
+    res = replay(w, a.keep, a.rescore, since=a.since, until=a.until)
+    if a.json:
+        with open(a.json, "w") as f:
+            json.dump(res, f, indent=2)
+    summary = {k: v for k, v in res.items() if k != "series"}
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
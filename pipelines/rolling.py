@@ -0,0 +1,169 @@
+# pipelines/rolling.py
+# Rolling statistics for the drivers, backed by numpy.
+#  - DailySeries: values on a contiguous daily calendar; missing days are NaN and only
+#    filled when a caller asks for it (ffill with a limit), never silently
+#  - rolling_stats: mean/std/count for several windows from one set of cumulative sums,
+#    so every extra window is O(n) array arithmetic, no per-window Python loops
+#  - RollingWindow: O(1) push/evict mean & variance for streaming updates, or for windows
+#    counted in observations rather than days (ETF flows: trading days)
+import collections, datetime, math
+
+import numpy as np
+
+DAY = np.timedelta64(1, "D")
+
+def _d64(d):
+    return np.datetime64(d, "D")
+
+class DailySeries:
+    """Values indexed by calendar day from `start`; NaN marks a missing day."""
+    __slots__ = ("start", "values")
+
+    def __init__(self, start, values):
+        self.start = _d64(start)
+        self.values = np.asarray(values, dtype=float)
+
+    @classmethod
+    def from_pairs(cls, pairs, start=None, end=None, keep="last"):
+        """
+        [(date, value)] -> series over [start or first date, end or last date]. Several values
+        for one day: keep="last" takes the latest in `pairs`, keep="first" the earliest.
+        """
+        if keep == "first":
+            pairs = pairs[::-1]
+        if pairs:
+            d = np.array([_d64(p[0]) for p in pairs], dtype="datetime64[D]")
+            v = np.array([np.nan if p[1] is None else float(p[1]) for p in pairs])
+        else:
+            d, v = np.array([], dtype="datetime64[D]"), np.array([])
+        lo = _d64(start) if start is not None else (d.min() if d.size else None)
+        hi = _d64(end) if end is not None else (d.max() if d.size else None)
+        if lo is None or hi is None or hi < lo:
+            return cls(lo if lo is not None else "1970-01-01", [])
+        out = np.full(int((hi - lo) / DAY) + 1, np.nan)
+        m = (d >= lo) & (d <= hi)
+        out[((d[m] - lo) / DAY).astype(int)] = v[m]
+        return cls(lo, out)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def dates(self):
+        return self.start + np.arange(len(self.values)) * DAY
+
+    @property
+    def end(self):
+        return self.start + (len(self.values) - 1) * DAY
+
+    def gaps(self):
+        return int(np.isnan(self.values).sum())
+
+    def ffill(self, limit=None):
+        """Carry the last observation forward, at most `limit` days past it."""
+        v = self.values
+        idx = np.where(np.isnan(v), -1, np.arange(len(v)))
+        last = np.maximum.accumulate(idx) if len(v) else idx
+        out = np.where(last >= 0, v[np.maximum(last, 0)], np.nan)
+        if limit is not None:
+            out = np.where((np.arange(len(v)) - last) <= limit, out, np.nan)
+        return DailySeries(self.start, out)
+
+    def diff(self):
+        return DailySeries(self.start, np.concatenate([[np.nan], np.diff(self.values)]) if len(self.values) else [])
+
+    def tail(self, n):
+        n = min(n, len(self.values))
+        return DailySeries(self.start + (len(self.values) - n) * DAY, self.values[len(self.values) - n:])
+
+    def last_valid(self):
+        """-> (date, value) of the latest non-NaN day, or (None, None)."""
+        ok = np.flatnonzero(~np.isnan(self.values))
+        if not ok.size:
+            return None, None
+        i = ok[-1]
+        return (self.start + i * DAY).astype(datetime.date), float(self.values[i])
+
+    def pairs(self):
+        """[(date, value)] for observed days, oldest first."""
+        ok = ~np.isnan(self.values)
+        return list(zip(self.dates[ok].astype(datetime.date), self.values[ok].tolist()))
+
+def rolling_stats(values, windows, min_frac=0.5):
+    """
+    values (n,) with NaN gaps -> {w: {"mean", "std", "count"}} arrays (n,), trailing windows
+    ending at each index. Gaps are excluded; a window needs >= min_frac*w observations
+    (else NaN). All windows share one cumulative pass.
+    """
+    x = np.asarray(values, dtype=float)
+    ok = ~np.isnan(x)
+    shift = x[ok][0] if ok.any() else 0.0        # centre before squaring (cancellation)
+    xs = np.where(ok, x - shift, 0.0)
+    c0 = np.concatenate([[0], np.cumsum(ok)])
+    c1 = np.concatenate([[0.0], np.cumsum(xs)])
+    c2 = np.concatenate([[0.0], np.cumsum(xs * xs)])
+    idx = np.arange(1, len(x) + 1)
+    out = {}
+    for w in windows:
+        lo = np.maximum(idx - w, 0)
+        n = c0[idx] - c0[lo]
+        s1 = c1[idx] - c1[lo]
+        s2 = c2[idx] - c2[lo]
+        enough = n >= max(1, math.ceil(min_frac * w))
+        nn = np.maximum(n, 1)
+        mean = s1 / nn
+        var = np.maximum(s2 / nn - mean * mean, 0.0) * nn / np.maximum(nn - 1, 1)
+        out[w] = {"mean": np.where(enough, mean + shift, np.nan),
+                  "std": np.where(enough & (n > 1), np.sqrt(var), np.nan),
+                  "count": n}
+    return out
+
+def last_means(values, windows, min_frac=0.5):
+    """{w: mean of the trailing window ending at the last index} (NaN if too sparse)."""
+    st = rolling_stats(values, windows, min_frac)
+    return {w: float(st[w]["mean"][-1]) if len(values) else float("nan") for w in windows}
+
+class RollingWindow:
+    """Mean/variance of the last `size` pushes in O(1) per push. NaN pushes count as gaps."""
+
+    def __init__(self, size):
+        self.size = size
+        self._buf = collections.deque()
+        self._n = 0
+        self._sum = 0.0         # plain sum for the mean; shifted sums for the variance
+        self._s1 = 0.0
+        self._s2 = 0.0
+        self._shift = None
+
+    def push(self, x):
+        x = float("nan") if x is None else float(x)
+        if len(self._buf) == self.size:
+            old = self._buf.popleft()
+            if not math.isnan(old):
+                self._n -= 1; self._sum -= old
+                self._s1 -= old - self._shift; self._s2 -= (old - self._shift) ** 2
+        self._buf.append(x)
+        if not math.isnan(x):
+            if self._shift is None:
+                self._shift = x
+            self._n += 1; self._sum += x
+            self._s1 += x - self._shift; self._s2 += (x - self._shift) ** 2
+
+    @property
+    def count(self):
+        return self._n
+
+    @property
+    def mean(self):
+        return self._sum / self._n if self._n else float("nan")
+
+    @property
+    def var(self):
+        if self._n < 2:
+            return float("nan")
+        m = self._s1 / self._n
+        return max(self._s2 / self._n - m * m, 0.0) * self._n / (self._n - 1)
+
+    @property
+    def std(self):
+        return math.sqrt(self.var) if self._n >= 2 else float("nan")
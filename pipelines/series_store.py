@@ -0,0 +1,48 @@
+# pipelines/series_store.py
+# Append-only local store for dated observations: data/series/<name>.csv (date,value).
+# Every observation ever fetched is kept; merging new pairs overwrites same-date values
+# (source revisions) and appends the rest. Files are small and committed with the data.
+import datetime, pathlib, os
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+SERIES_DIR = ROOT / "data" / "series"
+
+def _path(name):
+    return SERIES_DIR / f"{name}.csv"
+
+def load(name, since=None):
+    """-> [(date, value)] sorted by date, optionally only dates >= since."""
+    p = _path(name)
+    if not p.exists():
+        return []
+    out = []
+    for line in p.read_text().splitlines()[1:]:
+        try:
+            d, v = line.split(",", 1)
+            d = datetime.date.fromisoformat(d)
+            if since is None or d >= since:
+                out.append((d, float(v)))
+        except ValueError:
+            continue
+    return out
+
+def last_date(name):
+    obs = load(name)
+    return obs[-1][0] if obs else None
+
+def merge(name, pairs):
+    """Upsert (date, value) pairs; returns the number of dates added or revised."""
+    if not pairs:
+        return 0
+    cur = dict(load(name))
+    changed = sum(1 for d, v in pairs if cur.get(d) != v)
+    if not changed:
+        return 0
+    cur.update(pairs)
+    SERIES_DIR.mkdir(parents=True, exist_ok=True)
+    lines = ["date,value"] + [f"{d.isoformat()},{v!r}" for d, v in sorted(cur.items())]
+    p = _path(name)
+    tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+    tmp.write_text("\n".join(lines) + "\n")
+    os.replace(tmp, p)
+    return changed
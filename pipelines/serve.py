@@ -0,0 +1,266 @@
+# pipelines/serve.py
+# Small read-only HTTP service over the data/ outputs, for the dashboard and local testing.
+#
+#   python pipelines/serve.py --port 8765
+#   curl -s 'localhost:8765/latest.json?fields=risk,band,drivers.term_structure.score'
+#   curl -s 'localhost:8765/risk_history.json?from=2025-09-01&fields=date,risk'
+#   curl -s 'localhost:8765/assets/eth/risk_history.csv?from=2025-09-01'   # price column eth_price_usd
+#
+# Every response is built once per (path, query, source file version) and kept in memory
+# with its gzip (and brotli, if installed) encodings already compressed, under a strong
+# ETag per encoding. Clients revalidate with If-None-Match and get a body-less 304, so a
+# page view with nothing new costs a stat() and a dict lookup. Source files are re-read
+# only when their mtime/size changes. Stdlib ThreadingHTTPServer, HTTP/1.1 keep-alive.
+import argparse, bisect, collections, gzip, hashlib, json, os, pathlib, sys, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import history
+
+try:
+    import brotli
+except ImportError:   # optional: gzip only
+    brotli = None
+
+DATA = history.DATA
+MAX_ENTRIES = 512          # cached responses (LRU)
+MIN_COMPRESS = 256         # bytes; smaller bodies go out as-is
+CACHE_CONTROL = "public, no-cache"   # store, but revalidate every time (cheap 304s)
+TYPES = {".json": "application/json", ".csv": "text/csv; charset=utf-8"}
+HISTORY_FILES = ("risk_history.json", "risk_history.csv")
+
+def price_column(name):
+    """History price column of a data-relative path: data/assets/<sym>/ holds <sym>_price_usd."""
+    parts = pathlib.PurePosixPath(name).parts
+    return history.price_field(parts[1] if len(parts) == 3 and parts[0] == "assets" else None)
+
+def history_fields(name):
+    return history.csv_header(price_column(name)).split(",")
+
+class Entry:
+    """One response body, precompressed. variant(enc) -> (body, etag)."""
+    __slots__ = ("ctype", "tag", "bodies")
+
+    def __init__(self, body, ctype):
+        self.ctype = ctype
+        self.tag = hashlib.sha1(body).hexdigest()[:24]
+        self.bodies = {"identity": body}
+        if len(body) >= MIN_COMPRESS:
+            self.bodies["gzip"] = gzip.compress(body, 6, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body)
+
+    def variant(self, enc):
+        if enc not in self.bodies:
+            enc = "identity"
+        return enc, self.bodies[enc], f'"{self.tag}"' if enc == "identity" else f'"{self.tag}-{enc}"'
+
+def negotiate(accept_encoding):
+    """Accept-Encoding -> best of br / gzip / identity (q=0 excludes)."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try: q = float(params.strip()[2:])
+            except ValueError: q = 0.0
+        if name:
+            offered[name.strip().lower()] = q
+    for enc in ("br", "gzip"):
+        if offered.get(enc, offered.get("*", 0.0)) > 0:
+            return enc
+    return "identity"
+
+def etag_matches(if_none_match, etag):
+    if if_none_match.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
+
+def project(doc, fields):
+    """Keep only dotted paths (e.g. drivers.onchain.score) from a nested dict; missing paths are skipped."""
+    out = {}
+    for f in fields:
+        src, dst, parts = doc, out, f.split(".")
+        for p in parts[:-1]:
+            if not isinstance(src, dict) or not isinstance(src.get(p), dict):
+                break
+            src = src[p]
+            dst = dst.setdefault(p, {})
+        else:
+            if isinstance(src, dict) and parts[-1] in src:
+                dst[parts[-1]] = src[parts[-1]]
+    return out
+
+def _fields(q):
+    raw = ",".join(q.get("fields", []))
+    return [f.strip() for f in raw.split(",") if f.strip()] or None
+
+class Store:
+    """Parsed sources + response cache, keyed on each source file's (mtime_ns, size)."""
+
+    def __init__(self, data_dir=DATA, max_entries=MAX_ENTRIES):
+        self.data_dir = pathlib.Path(data_dir).resolve()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._parsed = {}                                 # path -> (stamp, value)
+        self._responses = collections.OrderedDict()        # (path, query, stamp) -> Entry
+
+    def _file(self, name):
+        p = (self.data_dir / name.lstrip("/")).resolve()
+        if self.data_dir not in p.parents or p.suffix not in TYPES or not p.is_file():
+            raise LookupError(name)
+        st = p.stat()
+        return p, (st.st_mtime_ns, st.st_size)
+
+    def _load(self, p, stamp, parse):
+        with self._lock:
+            hit = self._parsed.get(p)
+            if hit and hit[0] == stamp:
+                return hit[1]
+        value = parse(p.read_bytes())
+        with self._lock:
+            self._parsed[p] = (stamp, value)
+        return value
+
+    def get(self, path, query):
+        """-> Entry for a request path + parsed query; LookupError = 404, ValueError = 400."""
+        name = path.strip("/") or "latest.json"
+        if name.startswith("data/"):
+            name = name[len("data/"):]
+        q = {k: v for k, v in query.items() if k in ("from", "to", "fields")}
+        # filtered CSV is cut from the JSON rows; unfiltered files go out byte-for-byte
+        pp = pathlib.PurePosixPath(name)
+        p, stamp = self._file(str(pp.with_name("risk_history.json")) if pp.name == "risk_history.csv" and q
+                              else name)
+        key = (name, tuple(sorted((k, tuple(v)) for k, v in q.items())), stamp)
+        with self._lock:
+            e = self._responses.get(key)
+            if e is not None:
+                self._responses.move_to_end(key)
+                return e
+        e = Entry(*self._build(name, p, stamp, q))
+        with self._lock:
+            self._responses[key] = e
+            while len(self._responses) > self.max_entries:
+                self._responses.popitem(last=False)
+        return e
+
+    def _build(self, name, p, stamp, q):
+        ctype = TYPES[pathlib.PurePath(name).suffix]
+        fields = _fields(q)
+        if pathlib.PurePosixPath(name).name in HISTORY_FILES and q:
+            rows = self._load(p, stamp, json.loads)
+            dates = [r.get("date") or "" for r in rows]
+            lo = bisect.bisect_left(dates, q["from"][0]) if "from" in q else 0
+            hi = bisect.bisect_right(dates, q["to"][0]) if "to" in q else len(rows)
+            rows = rows[lo:hi]
+            if fields:
+                bad = [f for f in fields if f not in history_fields(name)]
+                if bad:
+                    raise ValueError(f"unknown history field(s): {', '.join(bad)}")
+            if name.endswith(".csv"):
+                if not fields:
+                    price = price_column(name)
+                    lines = [history.csv_header(price)] + [history._csv_line(r, price) for r in rows]
+                else:
+                    cell = lambda v: "" if v is None else str(v)
+                    lines = [",".join(fields)] + [",".join(cell(r.get(f)) for f in fields) for r in rows]
+                return ("\n".join(lines) + "\n").encode(), ctype
+            if fields:
+                rows = [{f: r.get(f) for f in fields} for r in rows]
+            return json.dumps(rows, separators=(",", ":")).encode(), ctype
+        if fields and p.suffix == ".json":
+            doc = self._load(p, stamp, json.loads)
+            return json.dumps(project(doc, fields), separators=(",", ":")).encode(), ctype
+        return p.read_bytes(), ctype
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "grayghost-serve/1.0"
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._common()
+        self.send_header("Access-Control-Allow-Methods", "GET, HEAD, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "If-None-Match")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _common(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+
+    def _send_json(self, code, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self._common()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve(self, head):
+        url = urlsplit(self.path)
+        if url.path == "/healthz":
+            return self._send_json(200, {"status": "ok"})
+        try:
+            e = self.server.store.get(url.path, parse_qs(url.query))
+        except LookupError:
+            return self._send_json(404, {"error": "not found"})
+        except ValueError as ex:
+            return self._send_json(400, {"error": str(ex)})
+        enc, body, etag = e.variant(negotiate(self.headers.get("Accept-Encoding")))
+        inm = self.headers.get("If-None-Match")
+        status = 304 if inm and etag_matches(inm, etag) else 200
+        self.send_response(status)
+        self._common()
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("Vary", "Accept-Encoding")
+        if status == 304:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", e.ctype)
+        if enc != "identity":
+            self.send_header("Content-Encoding", enc)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            sys.stderr.write("[serve] %s %s\n" % (self.address_string(), fmt % args))
+
+def make_server(host="127.0.0.1", port=8765, data_dir=DATA, verbose=False):
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    srv.store = Store(data_dir)
+    srv.verbose = verbose
+    return srv
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve data/ outputs with ETags, gzip and range/field queries")
+    ap.add_argument("--host", default=os.environ.get("GG_SERVE_HOST", "127.0.0.1"))
+    ap.add_argument("--port", type=int, default=int(os.environ.get("GG_SERVE_PORT", "8765")))
+    ap.add_argument("--data", type=pathlib.Path, default=DATA)
+    ap.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    a = ap.parse_args(argv)
+    srv = make_server(a.host, a.port, a.data, a.verbose)
+    print(f"[serve] http://{a.host}:{srv.server_address[1]}/ over {a.data}", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# pipelines/source_calendar.py
+# Publication calendars of the slow sources, so a run only asks for data that can exist:
+#
+#   fred:WALCL, fred:WTREGEN   H.4.1, weekly: Wednesday level, out Thursday ~16:30 ET
+#   fred:RRPONTSYD             daily: each Fed business day, out ~13:15 ET
+#   farside:<slug>             one row per US trading day, in by the evening (ET); late funds
+#                              still fill in overnight, so a row settles at 12:00 UTC next day
+#   blockchain:<chart>         one point per UTC day, after the day has ended
+#
+# expected_asof(source, now) is the newest observation date that should be published by `now`.
+# A fetcher may skip the network when its stored series (series_store) already reaches that
+# date and it last fetched after the stored date settled; the stored observations are returned
+# instead and health stays correct because it is computed from their own asof. A source that is
+# late keeps being fetched on every run until the observation shows up. The last fetch time of
+# each source is run-local state in data/cache/calendar.json (restored by the workflow's cache,
+# not committed); without it, or without a stored series, or with GG_CALENDAR=0, nothing is skipped.
+# Holidays: NYSE closures for trading days, Federal Reserve holidays for business days.
+import datetime, json, os, sys, threading
+
+import metrics
+import series_store
+from outputs import atomic_write
+
+ENABLED = os.environ.get("GG_CALENDAR", "1") != "0"
+UTC = datetime.timezone.utc
+MAX_SKIP = datetime.timedelta(days=7)     # fetch at least this often whatever the calendar says
+
+def _nth_weekday(y, m, weekday, n):
+    """n-th (1-based; -1 = last) weekday (Mon=0) of month m."""
+    if n > 0:
+        d = datetime.date(y, m, 1)
+        return d + datetime.timedelta(days=(weekday - d.weekday()) % 7 + 7 * (n - 1))
+    d = datetime.date(y + (m == 12), m % 12 + 1, 1) - datetime.timedelta(days=1)
+    return d - datetime.timedelta(days=(d.weekday() - weekday) % 7)
+
+def _easter(y):
+    # anonymous Gregorian algorithm
+    a, b, c = y % 19, y // 100, y % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return datetime.date(y, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+def _observed(d, saturday_to_friday=True):
+    if d.weekday() == 6:
+        return d + datetime.timedelta(days=1)
+    if d.weekday() == 5 and saturday_to_friday:
+        return d - datetime.timedelta(days=1)
+    return d
+
+def nyse_holidays(y):
+    hol = {_nth_weekday(y, 1, 0, 3), _nth_weekday(y, 2, 0, 3), _easter(y) - datetime.timedelta(days=2),
+           _nth_weekday(y, 5, 0, -1), _nth_weekday(y, 9, 0, 1), _nth_weekday(y, 11, 3, 4),
+           _observed(datetime.date(y, 7, 4)), _observed(datetime.date(y, 12, 25))}
+    hol.add(_observed(datetime.date(y, 1, 1), saturday_to_friday=False))   # no Friday-before closure
+    if y >= 2022:
+        hol.add(_observed(datetime.date(y, 6, 19)))
+    return hol
+
+def fed_holidays(y):
+    # the Fed doesn't move Saturday holidays to Friday
+    fixed = [(1, 1), (7, 4), (11, 11), (12, 25)] + ([(6, 19)] if y >= 2022 else [])
+    return {_observed(datetime.date(y, m, d), saturday_to_friday=False) for m, d in fixed} | {
+        _nth_weekday(y, 1, 0, 3), _nth_weekday(y, 2, 0, 3), _nth_weekday(y, 5, 0, -1),
+        _nth_weekday(y, 9, 0, 1), _nth_weekday(y, 10, 0, 2), _nth_weekday(y, 11, 3, 4)}
+
+def _open_day(holidays):
+    return lambda d: d.weekday() < 5 and d not in holidays(d.year)
+
+trading_day = _open_day(nyse_holidays)
+fed_business_day = _open_day(fed_holidays)
+
+def _latest(now, is_obs, released_at):
+    """Newest date d (searching back from now) with is_obs(d) and released_at(d) <= now."""
+    d = now.date()
+    for _ in range(21):
+        if is_obs(d) and released_at(d) <= now:
+            return d
+        d -= datetime.timedelta(days=1)
+    return d
+
+def _at(d, hour, minute=0, days=0):
+    return datetime.datetime.combine(d + datetime.timedelta(days=days), datetime.time(hour, minute), UTC)
+
+# kind -> (expected observation date at `now`, time an observation of date d has settled)
+# Release times are the earliest UTC equivalent (EDT); in winter data lands an hour later and
+# the source is simply fetched again until it shows up.
+KINDS = {
+    "fred_weekly": (lambda now: _latest(now, lambda d: d.weekday() == 2, lambda d: _at(d, 20, 30, days=1)),
+                    lambda d: _at(d, 20, 30, days=1)),
+    "fred_daily":  (lambda now: _latest(now, fed_business_day, lambda d: _at(d, 17, 15)),
+                    lambda d: _at(d, 17, 15)),
+    "farside":     (lambda now: _latest(now, trading_day, lambda d: _at(d, 22)),
+                    lambda d: _at(d, 12, days=1)),
+    "utc_daily":   (lambda now: now.date() - datetime.timedelta(days=1),
+                    lambda d: _at(d, 0, days=1)),
+}
+
+def kind_of(source):
+    prefix, _, name = source.partition(":")
+    if prefix == "fred":
+        return "fred_weekly" if name in ("WALCL", "WTREGEN") else "fred_daily"
+    return {"farside": "farside", "blockchain": "utc_daily"}[prefix]
+
+def expected_asof(source, now=None):
+    return KINDS[kind_of(source)][0](now or datetime.datetime.now(UTC))
+
+class SourceCalendar:
+    """Last fetch time per source (data/cache/calendar.json) + the skip decision."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fetched, self._loaded_from = None, None
+
+    def _path(self):
+        return series_store.SERIES_DIR.parent / "cache" / "calendar.json"   # follows a relocated series store
+
+    def _load(self):
+        if self._fetched is None or self._loaded_from != self._path():
+            self._loaded_from = self._path()
+            try:
+                self._fetched = json.loads(self._loaded_from.read_text()).get("fetched", {})
+            except Exception:
+                self._fetched = {}
+        return self._fetched
+
+    def can_skip(self, source, asof, now=None):
+        """
+        True if nothing newer than `asof` (the newest stored observation date, or None) can be
+        published yet, and `asof` itself either settled before the last fetch or hasn't settled
+        yet (it is fetched once more when it does).
+        """
+        if not ENABLED or asof is None:
+            return False
+        now = now or datetime.datetime.now(UTC)
+        expected, settled = expected_asof(source, now), KINDS[kind_of(source)][1]
+        with self._lock:
+            last = self._load().get(source)
+        if last is None:
+            return False
+        last = datetime.datetime.fromtimestamp(last, UTC)
+        due = settled(asof)
+        skip = asof >= expected and (last >= due or now < due) and now - last < MAX_SKIP
+        if skip:
+            metrics.count("calendar_skip", source=source)
+            metrics.annotate(calendar_skip=source, asof=asof.isoformat(), expected=expected.isoformat())
+        return skip
+
+    def fetched(self, source, now=None):
+        """Record a successful fetch of source."""
+        ts = (now or datetime.datetime.now(UTC)).timestamp()
+        with self._lock:
+            fetched = self._load()
+            fetched[source] = round(ts, 3)
+            doc = {"fetched": dict(sorted(fetched.items()))}
+            try:
+                self._path().parent.mkdir(parents=True, exist_ok=True)
+                atomic_write(self._path(), json.dumps(doc, indent=1))
+            except OSError as e:
+                print(f"[source_calendar] WARN state not saved: {e}", file=sys.stderr)
+
+    def reset(self):
+        with self._lock:
+            self._fetched, self._loaded_from = None, None
+
+CAL = SourceCalendar()
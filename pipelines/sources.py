@@ -0,0 +1,513 @@
+# pipelines/sources.py
+# Raw data fetchers for the risk engine: one function per upstream endpoint, each
+# swallowing its own errors (logged to stderr) and returning plain values or None/[].
+# No scoring here — engine.py turns these into driver scores. Importing has no side effects.
+# Per-asset fetchers take an Asset (symbols per venue, see ASSETS) and default to BTC.
+import dataclasses, datetime, functools, os, queue, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from http_client import http_json, http_stream   # cached (data/cache/http), see http_client.py
+import farside
+import metrics                                 # run tracing -> data/run_metrics.json
+import series_store                            # data/series/<id>.csv
+from source_calendar import CAL                # skip fetches when nothing new can be published
+
+# Fallback chains (funding, perp premium): start the next provider after this many
+# seconds if nobody has answered yet; 0 races every provider at once.
+HEDGE_DELAY_S = 1.0
+
+@dataclasses.dataclass(frozen=True)
+class Asset:
+    """
+    One coin's symbols per venue. farside=None: no ETF table (farside_label: the table's title,
+    the etf_flows source); onchain: blockchain.com charts; coingecko: coin id for the price
+    history (backfill.py).
+    """
+    symbol: str
+    coinbase: str            # spot pair
+    binance: str             # USDT-margined perp
+    okx: str
+    bitmex: str
+    bybit: str
+    deribit: str
+    farside: str = None      # ETF flow page slug on farside.co.uk
+    farside_label: str = None
+    onchain: bool = False
+    coingecko: str = None
+
+BTC = Asset("BTC", coinbase="BTC-USD", binance="BTCUSDT", okx="BTC-USDT-SWAP", bitmex="XBTUSD",
+            bybit="BTCUSDT", deribit="BTC-PERPETUAL", farside="bitcoin-etf-flow-all-data",
+            farside_label="Farside Bitcoin ETF Flow – All Data", onchain=True, coingecko="bitcoin")
+ETH = Asset("ETH", coinbase="ETH-USD", binance="ETHUSDT", okx="ETH-USDT-SWAP", bitmex="ETHUSD",
+            bybit="ETHUSDT", deribit="ETH-PERPETUAL", farside="ethereum-etf-flow-all-data",
+            farside_label="Farside Ethereum ETF Flow – All Data", coingecko="ethereum")
+ASSETS = {a.symbol: a for a in (BTC, ETH)}
+
+# ----- utils -----
+def fetch_parallel(calls, timeout=None):
+    """
+    calls: {key: (fn, *args)} -> {key: fn(*args)}
+    Starts every call at once on its own thread; wall-clock ≈ slowest call.
+    Fetchers swallow their own errors, so results are plain values/fallbacks.
+    With timeout (seconds), calls still running by then are left out of the result;
+    they finish on daemon threads and are ignored (urllib can't be interrupted).
+    """
+    if not calls:
+        return {}
+    if timeout is None:
+        with ThreadPoolExecutor(max_workers=len(calls)) as ex:
+            futs = {k: ex.submit(metrics.run_in_context(c[0]), *c[1:]) for k, c in calls.items()}
+            return {k: f.result() for k, f in futs.items()}
+    q, out = queue.Queue(), {}
+
+    def run(key, fn, *args):
+        try:
+            q.put((key, fn(*args)))
+        except Exception as e:
+            print(f"[sources] WARN {key} failed: {e}", file=sys.stderr)
+            q.put((key, None))
+
+    for k, c in calls.items():
+        threading.Thread(target=metrics.run_in_context(run), args=(k, *c), daemon=True).start()
+    end = time.monotonic() + timeout
+    while len(out) < len(calls):
+        try:
+            k, v = q.get(timeout=max(0.0, end - time.monotonic()))
+        except queue.Empty:
+            break
+        out[k] = v
+    return out
+
+def hedged_first(providers, delay=HEDGE_DELAY_S, valid=lambda v: v is not None):
+    """
+    providers: [(name, fn), ...] in priority order -> (name, value) of the winner, or (None, None).
+    Provider i+1 starts `delay` seconds after provider i, or immediately once i fails.
+    The first valid answer wins; if several land together the higher-priority one wins.
+    Losers keep running on daemon threads and are ignored (urllib can't be interrupted).
+    """
+    q = queue.Queue()
+
+    def run(idx, fn):
+        with metrics.span("provider", providers[idx][0], rank=idx) as sp:
+            try: v = fn()
+            except Exception: v = None
+            sp["valid"] = bool(valid(v))
+        q.put((idx, v))
+
+    n, started, finished = len(providers), 0, 0
+    while finished < n:
+        if started < n:
+            threading.Thread(target=metrics.run_in_context(run), args=(started, providers[started][1]),
+                             daemon=True).start()
+            started += 1
+        try:
+            batch = [q.get(timeout=delay if started < n else None)]
+        except queue.Empty:
+            continue
+        while True:
+            try: batch.append(q.get_nowait())
+            except queue.Empty: break
+        finished += len(batch)
+        ok = [(i, v) for i, v in batch if valid(v)]
+        if ok:
+            i, v = min(ok, key=lambda t: t[0])
+            metrics.annotate(provider=providers[i][0], providers_started=started)
+            return providers[i][0], v
+    metrics.annotate(provider=None, providers_started=started)
+    return None, None
+
+# ----- Spot price -----
+@metrics.traced
+def fetch_spot_usd(asset=BTC):
+    try:
+        j = http_json(f"https://api.coinbase.com/v2/prices/{asset.coinbase}/spot", timeout=10)
+        return round(float(j["data"]["amount"]), 2)
+    except Exception as e:
+        print(f"[sources] WARN {asset.symbol} price fetch failed: {e}", file=sys.stderr)
+        return None
+
+def fetch_btc_price_usd():
+    return fetch_spot_usd(BTC)
+
+# ----- ETF flows (Farside) -----
+@metrics.traced
+def fetch_etf_trailing(n=7, asset=BTC):
+    """
+    [(date_str, usd)] for the n most recent trading days, newest first (streamed parse).
+    Rows are kept in data/series/etf_<asset>.csv; when the newest stored row is the latest that
+    can exist and has settled (source_calendar.py), they are served from there.
+    """
+    url = f"https://farside.co.uk/{asset.farside}/"
+    name, source = f"etf_{asset.symbol.lower()}", f"farside:{asset.farside}"
+    stored = series_store.load(name)
+    if len(stored) >= n and CAL.can_skip(source, stored[-1][0]):
+        return [(d.strftime("%d %b %Y"), v) for d, v in reversed(stored[-n:])]
+    try:
+        rows = farside.parse_trailing(http_stream(url, timeout=20), n)
+        out = [(d, round(float(musd)*1_000_000, 2)) for d, musd in rows]
+        if out:
+            series_store.merge(name, [(datetime.datetime.strptime(d, "%d %b %Y").date(), v) for d, v in out])
+            CAL.fetched(source)
+        return out
+    except Exception as e:
+        print(f"[sources] WARN fetch_etf_trailing {asset.symbol} failed: {e}", file=sys.stderr)
+        return []
+
+# ----- Stablecoin issuance (CoinGecko) -----
+@metrics.traced
+def fetch_stablecoin_caps(coin_id, days=8):
+    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency=usd&days={days}&interval=daily"
+    try:
+        caps = http_json(url, timeout=20).get("market_caps", [])
+        return [(int(ts), float(val)) for ts, val in caps if val is not None]
+    except Exception as e:
+        print(f"[sources] WARN CG fetch {coin_id} failed: {e}", file=sys.stderr)
+        return []
+
+# ----- FRED -----
+FRED_REVISION_DAYS = 14   # re-request this much before the last stored date (revisions)
+FRED_START_SLACK_DAYS = 14   # a store starting this late still covers the window (weekly series)
+
+@metrics.traced
+def fetch_fred_series(series_id, days=180, api_key=None):
+    """
+    Observations for the last `days` days, served from data/series/<id>.csv.
+    api_key defaults to $FRED_API_KEY; without one the local store is served as-is.
+    Only the delta since the last stored date (minus FRED_REVISION_DAYS) is requested;
+    a full window is fetched when the store is empty or doesn't reach back far enough.
+    Nothing is requested while the release calendar says no newer observation exists yet.
+    """
+    need_start = datetime.date.today() - datetime.timedelta(days=days+5)
+    if api_key is None:
+        api_key = os.environ.get("FRED_API_KEY", "").strip()
+    stored = series_store.load(series_id)
+    if not api_key:
+        print(f"[sources] INFO no FRED_API_KEY, {series_id} from local store only", file=sys.stderr)
+        return series_store.load(series_id, since=need_start)
+    if stored and stored[0][0] <= need_start + datetime.timedelta(days=FRED_START_SLACK_DAYS):
+        if CAL.can_skip(f"fred:{series_id}", stored[-1][0]):
+            return series_store.load(series_id, since=need_start)
+        start = (stored[-1][0] - datetime.timedelta(days=FRED_REVISION_DAYS)).isoformat()
+    else:
+        start = need_start.isoformat()
+    url = ("https://api.stlouisfed.org/fred/series/observations"
+           f"?series_id={series_id}&api_key={api_key}&file_type=json&observation_start={start}")
+    try:
+        obs = http_json(url, timeout=20).get("observations", [])
+        out = []
+        for o in obs:
+            d = o.get("date"); v = o.get("value")
+            if not d or v in (None, ".", ""): continue
+            try: out.append((datetime.date.fromisoformat(d), float(v)))
+            except: continue
+        series_store.merge(series_id, out)
+        CAL.fetched(f"fred:{series_id}")
+    except Exception as e:
+        print(f"[sources] WARN FRED {series_id} failed: {e}", file=sys.stderr)
+    return series_store.load(series_id, since=need_start)
+
+def scale_series(series_id, pairs):
+    if series_id in ("WALCL", "WTREGEN"):   # millions USD → dollars
+        factor = 1_000_000.0
+    elif series_id == "RRPONTSYD":          # billions USD → dollars
+        factor = 1_000_000_000.0
+    else:
+        factor = 1.0
+    return [(d, v*factor) for d, v in pairs]
+
+# ----- Term Structure & Leverage -----
+def fetch_binance_funding_7d_annual_pct(asset=BTC):
+    try:
+        j = http_json(f"https://fapi.binance.com/fapi/v1/fundingRate?symbol={asset.binance}&limit=1000", timeout=20)
+        rates = [float(x.get("fundingRate", 0.0)) for x in j][-21:] if isinstance(j, list) else []
+        rates = [r for r in rates if abs(r) > 1e-10]
+        if rates:
+            avg_8h = sum(rates)/len(rates)
+            return avg_8h*100.0, avg_8h*3*365*100.0
+    except Exception as e:
+        print(f"[sources] WARN funding binance hist failed: {e}", file=sys.stderr)
+    try:
+        now = http_json(f"https://fapi.binance.com/fapi/v1/premiumIndex?symbol={asset.binance}", timeout=20)
+        last = float(now.get("lastFundingRate", 0.0))
+        if abs(last) > 1e-10:
+            return last*100.0, last*3*365*100.0
+    except Exception as e:
+        print(f"[sources] WARN funding binance fallback failed: {e}", file=sys.stderr)
+    return None, None
+
+def fetch_okx_funding_7d_annual_pct(asset=BTC):
+    try:
+        hdr = {"User-Agent":"gh-actions/1.0"}
+        j = http_json(f"https://www.okx.com/api/v5/public/funding-rate-history?instId={asset.okx}&limit=100",
+                      headers=hdr, timeout=20)
+        arr = j.get("data", []) if isinstance(j, dict) else []
+        rates = [float(x.get("fundingRate", 0.0)) for x in arr][-21:]
+        rates = [r for r in rates if abs(r) > 1e-10]
+        if rates:
+            avg_8h = sum(rates)/len(rates)
+            return avg_8h*100.0, avg_8h*3*365*100.0
+    except Exception as e:
+        print(f"[sources] WARN funding okx hist failed: {e}", file=sys.stderr)
+    try:
+        hdr = {"User-Agent":"gh-actions/1.0"}
+        j = http_json(f"https://www.okx.com/api/v5/public/funding-rate?instId={asset.okx}",
+                      headers=hdr, timeout=20)
+        arr = j.get("data", []) if isinstance(j, dict) else []
+        if arr:
+            last = float(arr[0].get("fundingRate", 0.0))
+            if abs(last) > 1e-10:
+                return last*100.0, last*3*365*100.0
+    except Exception as e:
+        print(f"[sources] WARN funding okx fallback failed: {e}", file=sys.stderr)
+    return None, None
+
+def fetch_bitmex_funding_7d_annual_pct(asset=BTC):
+    try:
+        j = http_json(f"https://www.bitmex.com/api/v1/funding?symbol={asset.bitmex}&count=100&reverse=true", timeout=20)
+        rates = [float(x.get("fundingRate", 0.0)) for x in j][:21] if isinstance(j, list) else []
+        rates = [r for r in rates if abs(r) > 1e-10]
+        if rates:
+            avg_8h = sum(rates)/len(rates)
+            return avg_8h*100.0, avg_8h*3*365*100.0
+    except Exception as e:
+        print(f"[sources] WARN funding bitmex failed: {e}", file=sys.stderr)
+    return None, None
+
+def fetch_okx_premium_now_pct(asset=BTC):
+    try:
+        hdr = {"User-Agent":"gh-actions/1.0"}
+        j = http_json(f"https://www.okx.com/api/v5/public/mark-price?instId={asset.okx}",
+                      headers=hdr, timeout=20)
+        arr = j.get("data", []) if isinstance(j, dict) else []
+        if arr:
+            mark = float(arr[0].get("markPx"))
+            index = float(arr[0].get("indexPx"))
+            if index:
+                return (mark - index) / index * 100.0
+    except Exception as e:
+        print(f"[sources] WARN okx premium now failed: {e}", file=sys.stderr)
+    return None
+
+def fetch_bybit_premium_now_pct(asset=BTC):
+    try:
+        j = http_json(f"https://api.bybit.com/v5/market/tickers?category=linear&symbol={asset.bybit}", timeout=20)
+        root = (j.get("result") or j.get("data") or {})
+        lst = root.get("list") or []
+        if lst:
+            it = lst[0]
+            mark = float(it.get("markPrice"))
+            index = float(it.get("indexPrice"))
+            if index:
+                return (mark - index) / index * 100.0
+    except Exception as e:
+        print(f"[sources] WARN bybit premium now failed: {e}", file=sys.stderr)
+    return None
+
+def fetch_deribit_premium_now_pct(asset=BTC):
+    try:
+        j = http_json(f"https://deribit.com/api/v2/public/ticker?instrument_name={asset.deribit}", timeout=20)
+        res = j.get("result", {})
+        mark = float(res.get("mark_price"))
+        index = float(res.get("index_price"))
+        if index:
+            return (mark - index) / index * 100.0
+    except Exception as e:
+        print(f"[sources] WARN deribit premium now failed: {e}", file=sys.stderr)
+    return None
+
+def fetch_proxy_premium_now_pct(asset=BTC):
+    try:
+        fut = float(http_json(f"https://fapi.binance.com/fapi/v1/ticker/price?symbol={asset.binance}", timeout=15).get("price"))
+        spot = fetch_spot_usd(asset)
+        if spot:
+            return (fut - spot) / spot * 100.0
+    except Exception as e:
+        print(f"[sources] WARN proxy premium failed: {e}", file=sys.stderr)
+    return None
+
+def fetch_binance_premium_now_pct(asset=BTC):
+    try:
+        now = http_json(f"https://fapi.binance.com/fapi/v1/premiumIndex?symbol={asset.binance}", timeout=20)
+        mark = float(now.get("markPrice")); index = float(now.get("indexPrice"))
+        if index: return (mark - index) / index * 100.0
+    except Exception as e:
+        print(f"[sources] WARN premium now binance failed: {e}", file=sys.stderr)
+    return None
+
+@metrics.traced
+def get_premium_now_pct_multi(delay=HEDGE_DELAY_S, asset=BTC):
+    """-> (premium_pct, provider); hedged across exchanges in priority order."""
+    name, v = hedged_first([(n, functools.partial(fn, asset)) for n, fn in (
+        ("binance", fetch_binance_premium_now_pct),
+        ("okx",     fetch_okx_premium_now_pct),
+        ("bybit",   fetch_bybit_premium_now_pct),
+        ("deribit", fetch_deribit_premium_now_pct),
+        ("proxy",   fetch_proxy_premium_now_pct),
+    )], delay=delay)
+    metrics.count("provider", chain="premium_now", provider=name or "none", asset=asset.symbol)
+    return v, name
+
+@metrics.traced
+def fetch_binance_premium_7d_avg_pct(asset=BTC):
+    try:
+        arr = http_json(f"https://fapi.binance.com/fapi/v1/premiumIndexKlines?symbol={asset.binance}&interval=1h&limit=168", timeout=20)
+        closes = [float(x[4]) for x in arr] if isinstance(arr, list) else []
+        closes = [c for c in closes if abs(c) > 1e-12]
+        if closes:
+            return (sum(closes)/len(closes)) * 100.0
+    except Exception as e:
+        print(f"[sources] WARN premium klines binance failed: {e}", file=sys.stderr)
+    return None
+
+@metrics.traced
+def get_funding_multi(delay=HEDGE_DELAY_S, asset=BTC):
+    """-> (funding_8h_pct, funding_ann_pct, provider); hedged Binance → OKX → BitMEX."""
+    name, v = hedged_first([(n, functools.partial(fn, asset)) for n, fn in (
+        ("binance", fetch_binance_funding_7d_annual_pct),
+        ("okx",     fetch_okx_funding_7d_annual_pct),
+        ("bitmex",  fetch_bitmex_funding_7d_annual_pct),
+    )], delay=delay, valid=lambda v: v is not None and v[1] is not None)
+    f8, fann = v if v else (None, None)
+    metrics.count("provider", chain="funding", provider=name or "none", asset=asset.symbol)
+    return f8, fann, name
+
+# ----- On-chain (free: blockchain.com + mempool.space) -----
+@metrics.traced
+def fetch_blockchain_chart(name: str, days: int = 220):
+    """[(date, value)] daily points for the last `days` days, kept in data/series/bc_<name>.csv."""
+    url = f"https://api.blockchain.info/charts/{name}?timespan={days}days&format=json"
+    series, source = f"bc_{name}", f"blockchain:{name}"
+    since = datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=days)
+    stored = series_store.load(series)
+    if stored and stored[0][0] <= since + datetime.timedelta(days=7) and CAL.can_skip(source, stored[-1][0]):
+        return series_store.load(series, since=since)
+    try:
+        j = http_json(url, timeout=20)
+        vals = j.get("values", [])
+        out = []
+        for it in vals:
+            ts = it.get("x"); y = it.get("y")
+            if ts is None or y is None: continue
+            d = datetime.datetime.utcfromtimestamp(int(ts)).date()
+            out.append((d, float(y)))
+        if out:
+            series_store.merge(series, out)
+            CAL.fetched(source)
+        return out
+    except Exception as e:
+        print(f"[sources] WARN blockchain.com {name} failed: {e}", file=sys.stderr)
+        return []
+
+def fetch_mempool_vsize_mb():
+    try:
+        j = http_json("https://mempool.space/api/mempool", timeout=15)
+        vsize = float(j.get("vsize", 0.0))
+        return vsize / 1_000_000.0
+    except Exception as e:
+        print(f"[sources] WARN mempool size failed: {e}", file=sys.stderr)
+    return None
+
+def fetch_mempool_halfhour_fee():
+    try:
+        f = http_json("https://mempool.space/api/v1/fees/recommended", timeout=15)
+        return float(f.get("halfHourFee", f.get("fastestFee", None)))
+    except Exception as e:
+        print(f"[sources] WARN fee rec failed: {e}", file=sys.stderr)
+    return None
+
+@metrics.traced
+def fetch_mempool_summary():
+    got = fetch_parallel({"size": (fetch_mempool_vsize_mb,), "fee": (fetch_mempool_halfhour_fee,)})
+    return got["size"], got["fee"]
+
+ONCHAIN_CHARTS = ("n-unique-addresses", "transaction-fees", "n-transactions", "hash-rate")
+
+def fetch_onchain_inputs(days: int = 220):
+    """All on-chain requests at once; needs no BTC price, so it can run alongside the other drivers."""
+    calls = {name: (fetch_blockchain_chart, name, days) for name in ONCHAIN_CHARTS}
+    calls["mempool"] = (fetch_mempool_summary,)
+    return fetch_parallel(calls)
+
+# ----- Full history (backfill.py) -----
+# One fetch per series covering the whole span; the ETF rows are merged into the series store
+# like a daily run's (FRED goes through fetch_fred_series). Binance pages are requested back to
+# back (startTime cursor).
+ETF_HISTORY_ROWS = 10_000            # more trading days than any ETF table has
+
+@metrics.traced
+def fetch_etf_history(asset=BTC):
+    """Every row of the asset's Farside table -> [(date, usd)] oldest first (also merged into etf_<sym>)."""
+    try:
+        rows = farside.parse_trailing(http_stream(f"https://farside.co.uk/{asset.farside}/", timeout=60),
+                                      ETF_HISTORY_ROWS)
+        out = sorted((datetime.datetime.strptime(d, "%d %b %Y").date(), round(float(musd)*1_000_000, 2))
+                     for d, musd in rows)
+        series_store.merge(f"etf_{asset.symbol.lower()}", out)
+        return out
+    except Exception as e:
+        print(f"[sources] WARN fetch_etf_history {asset.symbol} failed: {e}", file=sys.stderr)
+        return []
+
+@metrics.traced
+def fetch_price_history(asset=BTC, days=365):
+    """CoinGecko daily USD prices -> [(ts_ms, price)] oldest first."""
+    url = (f"https://api.coingecko.com/api/v3/coins/{asset.coingecko}/market_chart"
+           f"?vs_currency=usd&days={days}&interval=daily")
+    try:
+        prices = http_json(url, timeout=60).get("prices", [])
+        return [(int(ts), float(val)) for ts, val in prices if val is not None]
+    except Exception as e:
+        print(f"[sources] WARN CG price history {asset.symbol} failed: {e}", file=sys.stderr)
+        return []
+
+@metrics.traced
+def fetch_blockchain_history(name):
+    """
+    Every daily point of a blockchain.com chart (timespan=all, unsampled) -> [(date, value)].
+    Not merged into the series store: years of points would make every daily run load them.
+    """
+    url = f"https://api.blockchain.info/charts/{name}?timespan=all&sampled=false&format=json"
+    try:
+        return [(datetime.datetime.utcfromtimestamp(int(it["x"])).date(), float(it["y"]))
+                for it in http_json(url, timeout=60).get("values", [])
+                if it.get("x") is not None and it.get("y") is not None]
+    except Exception as e:
+        print(f"[sources] WARN blockchain.com history {name} failed: {e}", file=sys.stderr)
+        return []
+
+def _binance_pages(url, start_ms, end_ms, limit, stamp):
+    """Rows of a startTime-paged Binance endpoint stamped within [start_ms, end_ms], oldest first."""
+    rows, t = {}, start_ms
+    while t <= end_ms:
+        page = http_json(f"{url}&startTime={t}&endTime={end_ms}&limit={limit}", timeout=30)
+        if not isinstance(page, list) or not page:
+            break
+        for r in page:
+            if start_ms <= stamp(r) <= end_ms:
+                rows[stamp(r)] = r
+        last = max(stamp(r) for r in page)
+        if len(page) < limit or last < t:
+            break
+        t = last + 1
+    return [rows[k] for k in sorted(rows)]
+
+@metrics.traced
+def fetch_binance_funding_history(start_ms, end_ms, asset=BTC):
+    """Every funding event in [start_ms, end_ms] -> [(funding_time_ms, rate)] oldest first."""
+    try:
+        rows = _binance_pages(f"https://fapi.binance.com/fapi/v1/fundingRate?symbol={asset.binance}",
+                              start_ms, end_ms, 1000, lambda r: int(r["fundingTime"]))
+        return [(int(r["fundingTime"]), float(r.get("fundingRate", 0.0))) for r in rows]
+    except Exception as e:
+        print(f"[sources] WARN funding history binance failed: {e}", file=sys.stderr)
+        return []
+
+@metrics.traced
+def fetch_binance_premium_history(start_ms, end_ms, asset=BTC):
+    """Hourly premium-index klines in [start_ms, end_ms] -> [(open_time_ms, close)] oldest first."""
+    try:
+        rows = _binance_pages(f"https://fapi.binance.com/fapi/v1/premiumIndexKlines?symbol={asset.binance}&interval=1h",
+                              start_ms, end_ms, 1500, lambda r: int(r[0]))
+        return [(int(r[0]), float(r[4])) for r in rows]
+    except Exception as e:
+        print(f"[sources] WARN premium history binance failed: {e}", file=sys.stderr)
+        return []
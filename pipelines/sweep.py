@@ -0,0 +1,210 @@
+# pipelines/sweep.py
+# Parallel parameter sweep over the stored history: weights (simplex grid), EMA_KEEP,
+# SMOOTH_DAYS and the per-driver sigmoid scales. Work is split by (window, scales) across
+# a process pool; inside a task every weight × keep combination is evaluated in one
+# batched numpy pass (replay.ema). Combinations are ranked by stability: band flips,
+# risk turnover and lead time of red-band warnings ahead of BTC drawdowns.
+#
+#   python pipelines/sweep.py --step 0.05 --keeps 0.6,0.75,0.85,0.9 --windows 7,14,21 --top 20
+#
+# Signals per window come from the snapshots' `trailing` arrays (ETF / stablecoin daily
+# values, net-liquidity 1d deltas); when the window equals the run's smooth_days the stored
+# window average is used as-is. A window longer than some snapshot's stored trailing array
+# (net liquidity keeps only 7 deltas) can't be recomputed and is skipped with a warning.
+# On-chain keeps its stored deviation (recovered from the score), term structure its stored score.
+import argparse, itertools, json, os, pathlib, sys, time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import archive
+import model
+import replay
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+HIST = ROOT / "data" / "history"
+
+# driver -> (stored window-average field, trailing key)
+WINDOWED = {
+    "etf_flows":     ("sma7_usd",       "trailing"),
+    "stablecoins":   ("sma7_delta_usd", "trailing"),
+    "net_liquidity": ("sma7_delta_usd", "trailing"),
+}
+FLIP_PENALTY_DAYS = 2.0     # objective: lead days lost per band flip per year
+LEAD_LOOKBACK_DAYS = 90
+
+def _f(v):
+    try: return float(v)
+    except (TypeError, ValueError): return np.nan
+
+def load_sweep_inputs(hist_dir=HIST):
+    """Parse snapshots (files + archive) once -> dict of aligned numpy arrays (T rows, date order)."""
+    docs = [d for _, d in archive.load_docs(hist_dir) if np.isfinite(_f(d.get("risk")))]
+    T, L = len(docs), 31
+    out = {"dates": np.array([d.get("as_of") for d in docs], dtype="datetime64[D]"),
+           "price": np.array([_f(d.get("btc_price_usd")) for d in docs]),
+           "smooth_days": np.array([_f(d.get("smooth_days")) for d in docs])}
+    for drv, (field, tkey) in WINDOWED.items():
+        trail, length = np.full((T, L), np.nan), np.zeros(T, dtype=int)
+        for i, d in enumerate(docs):
+            vals = [_f(x.get("usd")) for x in ((d.get("drivers") or {}).get(drv) or {}).get(tkey) or []][:L]
+            trail[i, :len(vals)] = vals      # most recent first
+            length[i] = len(vals)
+        out[f"{drv}.trailing"], out[f"{drv}.length"] = trail, length
+        out[f"{drv}.stored"] = np.array([_f(((d.get("drivers") or {}).get(drv) or {}).get(field)) for d in docs])
+    for drv in ("term_structure", "onchain"):
+        out[f"{drv}.score"] = np.array([_f(((d.get("drivers") or {}).get(drv) or {}).get("score")) for d in docs])
+    return out
+
+def short_drivers(inp, window):
+    """Drivers whose stored trailing array is shorter than `window` in a snapshot that needs it."""
+    need = inp["smooth_days"] != window
+    return [drv for drv in WINDOWED
+            if np.any(need & (inp[f"{drv}.length"] > 0) & (inp[f"{drv}.length"] < window))]
+
+def signals(inp, window):
+    """-> {driver: (T,) signal} for a smoothing window (USD, before the sigmoid scale)."""
+    sig = {}
+    for drv in WINDOWED:
+        tr = inp[f"{drv}.trailing"][:, :window]
+        n = np.sum(np.isfinite(tr), axis=1)
+        avg = np.where(n > 0, np.nansum(tr, axis=1) / np.maximum(n, 1), np.nan)
+        sig[drv] = np.where(inp["smooth_days"] == window, inp[f"{drv}.stored"], avg)
+    s = np.clip(inp["onchain.score"], 0.01, 0.99)
+    sig["onchain"] = -model.SCALES["onchain"] * np.log(s / (1 - s))   # dev, from stored score
+    return sig
+
+def score_matrix(inp, window, mults):
+    """T×D scores in model.DRIVERS order for a window and per-driver scale multipliers."""
+    sig = signals(inp, window)
+    cols = []
+    for drv in model.DRIVERS:
+        if drv == "term_structure":
+            cols.append(inp["term_structure.score"])
+        else:
+            cols.append(replay.sigmoid(-sig[drv] / (model.SCALES[drv] * mults[drv])))
+    return np.stack(cols, axis=1)
+
+def weight_grid(step=0.05, lo=None):
+    """All weight vectors on a `step` grid summing to 1, each weight >= lo (default: step)."""
+    n, m = round(1 / step), round((step if lo is None else lo) / step)
+    rows = [c + (n - sum(c),) for c in itertools.product(range(m, n + 1), repeat=len(model.DRIVERS) - 1)
+            if n - sum(c) >= m]
+    return np.array(rows, dtype=float) / n
+
+def drawdown_events(price, min_dd=0.15):
+    """Indices of running peaks that were followed by a >= min_dd drawdown before a new high."""
+    p = price.copy()
+    for i in range(1, len(p)):            # ffill gaps
+        if not np.isfinite(p[i]): p[i] = p[i - 1]
+    events, peak = [], 0
+    for i in range(1, len(p)):
+        if not np.isfinite(p[peak]) or p[i] > p[peak]:
+            peak = i
+        elif p[i] <= p[peak] * (1 - min_dd) and (not events or events[-1] != peak):
+            events.append(peak)
+    return events
+
+def evaluate(risk, events, years):
+    """risk (..., T) -> dict of (...,) metric arrays."""
+    b = np.where(risk < model.BAND_GREEN_BELOW, 0, np.where(risk > model.BAND_RED_ABOVE, 2, 1)).astype(np.int8)
+    flips = (b[..., 1:] != b[..., :-1]).sum(-1)
+    turnover = np.abs(np.diff(risk, axis=-1)).mean(-1) if risk.shape[-1] > 1 else np.zeros(risk.shape[:-1])
+    red = b == 2
+    lead = np.zeros(risk.shape[:-1]); hits = np.zeros(risk.shape[:-1])
+    for p in events:
+        a = max(0, p - LEAD_LOOKBACK_DAYS)
+        win = red[..., a:p + 1]
+        has = win.any(-1)
+        lead += np.where(has, p - (a + win.argmax(-1)), 0)
+        hits += has
+    ne = max(1, len(events))
+    flips_py = flips / max(years, 1e-9)
+    obj = ((lead / ne) * (hits / ne) if events else 0.0) - FLIP_PENALTY_DAYS * flips_py - turnover
+    return {"objective": obj, "flips": flips, "flips_per_year": flips_py, "turnover": turnover,
+            "lead_days_mean": lead / ne, "hit_rate": hits / ne}
+
+# ---- worker side ----
+_W = {}
+
+def _init(inp, weights, keeps, events, years, top):
+    _W.update(inp=inp, weights=weights, keeps=keeps, events=events, years=years, top=top)
+
+def _task(window, mult_tuple, chunk=1024):
+    mults = dict(zip(("etf_flows", "stablecoins", "net_liquidity", "onchain"), mult_tuple))
+    S = score_matrix(_W["inp"], window, mults)
+    keeps = _W["keeps"]
+    best = []
+    for s in range(0, len(_W["weights"]), chunk):
+        W = _W["weights"][s:s + chunk]
+        _, risk = replay.blend(S, W, keeps[:, None])          # (K, W, T)
+        m = evaluate(risk, _W["events"], _W["years"])
+        flat = m["objective"].ravel()
+        k = min(_W["top"], flat.size)
+        for j in np.argpartition(-flat, k - 1)[:k]:
+            ki, wi = np.unravel_index(j, m["objective"].shape)
+            best.append({
+                "smooth_days": window, "ema_keep": float(keeps[ki]),
+                "weights": {d: round(float(x), 4) for d, x in zip(model.DRIVERS, W[wi])},
+                "scale_mult": mults,
+                **{name: round(float(v[ki, wi]), 4) for name, v in m.items()},
+            })
+    best.sort(key=lambda r: -r["objective"])
+    return best[:_W["top"]], len(_W["weights"]) * len(keeps)
+
+def sweep(step=0.05, keeps=(0.6, 0.7, 0.8, 0.85, 0.9), windows=(7, 14, 21),
+          scale_mults=(0.5, 1.0, 2.0), min_dd=0.15, top=20, workers=None, hist_dir=HIST):
+    inp = load_sweep_inputs(hist_dir)
+    T = len(inp["dates"])
+    if T < 2:
+        raise SystemExit("not enough history to sweep")
+    skipped = {w: short_drivers(inp, w) for w in windows}
+    skipped = {w: drvs for w, drvs in skipped.items() if drvs}
+    for w, drvs in skipped.items():
+        print(f"[sweep] WARN skipping window {w}: stored trailing shorter than {w} days for "
+              f"{', '.join(drvs)}", file=sys.stderr)
+    windows = [w for w in windows if w not in skipped]
+    if not windows:
+        raise SystemExit("no window fits the stored trailing arrays")
+    weights = weight_grid(step)
+    events = drawdown_events(inp["price"], min_dd)
+    years = T / 365.0
+    tasks = [(w, m) for w in windows for m in itertools.product(scale_mults, repeat=4)]
+    results, evaluated = [], 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init,
+                             initargs=(inp, weights, np.asarray(keeps, dtype=float), events, years, top)) as ex:
+        for best, n in ex.map(_task, *zip(*tasks)):
+            results.extend(best); evaluated += n
+    results.sort(key=lambda r: -r["objective"])
+    return {"rows": T, "drawdown_events": [str(inp["dates"][i]) for i in events],
+            "skipped_windows": {str(w): drvs for w, drvs in skipped.items()},
+            "combinations": evaluated, "top": results[:top]}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parallel parameter sweep over stored history")
+    ap.add_argument("--step", type=float, default=0.05, help="weight grid step (min weight = step)")
+    ap.add_argument("--keeps", default="0.6,0.7,0.8,0.85,0.9")
+    ap.add_argument("--windows", default="7,14,21")
+    ap.add_argument("--scale-mults", default="0.5,1,2", help="multipliers on model.SCALES")
+    ap.add_argument("--min-dd", type=float, default=0.15, help="drawdown size that counts as an event")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--json", help="write results here")
+    a = ap.parse_args(argv)
+    fl = lambda s: tuple(float(x) for x in s.split(",") if x)
+    t0 = time.time()
+    res = sweep(a.step, fl(a.keeps), tuple(int(x) for x in fl(a.windows)), fl(a.scale_mults),
+                a.min_dd, a.top, a.workers)
+    res["seconds"] = round(time.time() - t0, 2)
+    if a.json:
+        pathlib.Path(a.json).write_text(json.dumps(res, indent=2))
+    print(f"[sweep] {res['combinations']} combinations over {res['rows']} days in {res['seconds']}s; "
+          f"drawdown events: {len(res['drawdown_events'])}", file=sys.stderr)
+    for r in res["top"]:
+        w = " ".join(f"{k[:4]}={v:.2f}" for k, v in r["weights"].items())
+        print(f"obj={r['objective']:+.3f} flips={r['flips']:.0f} lead={r['lead_days_mean']:.1f}d "
+              f"hit={r['hit_rate']:.2f} keep={r['ema_keep']} win={r['smooth_days']} {w} "
+              f"mult={r['scale_mult']}")
+
+if __name__ == "__main__":
+    main()